@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Headless batch loader for dimension and attribute JSON files.
+
+Loads every dimensions/attributes JSON file in a directory without prompts:
+1. Dimension files are applied first so attribute files can resolve their FKs
+2. Attribute files are applied concurrently, one pooled connection per worker
+3. Every file is committed (or rolled back) in its own transaction
+4. A machine-readable summary is printed or written for CI/provisioning jobs
+
+Example:
+    python batch_import.py ./ --program Acquisition --program-type "M&A" --workers 4 --json
+    python batch_import.py ./ --program Acquisition --dry-run --summary-file diff.json
+    python batch_import.py ./ --program Acquisition --partitioned   # program_dimensions/program_attributes
+"""
+
+import os
+import sys
+import json
+import glob
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from psycopg2 import sql
+
+from db_function import (
+    load_json_file, normalize_dimension, normalize_attribute,
+    upsert_dimensions, upsert_attributes, program_filter
+)
+from db_pool import get_engine
+from partitioned_schema import (
+    PARTITIONED_DIMENSIONS, PARTITIONED_ATTRIBUTES, program_key,
+    create_partitioned_tables, ensure_program_partition
+)
+
+PG_DATABASE = os.getenv("PG_DATABASE", "hawkeye_db")
+
+DEFAULT_WORKERS = 4
+
+# Columns compared by the dry-run diff
+DIMENSION_DIFF_COLUMNS = ['display_name', 'description', 'order_num', 'program_type']
+ATTRIBUTE_DIFF_COLUMNS = ['display_name', 'data_type', 'required', 'max_length', 'order_num']
+
+def log(message):
+    """Progress output goes to stderr so stdout stays machine-readable."""
+    print(message, file=sys.stderr)
+
+def get_table_names(program_prefix, partitioned=False):
+    """
+    Return (dimension_table, attribute_table, program) for a program prefix.
+    program is only set for the partitioned storage mode.
+    """
+    if partitioned:
+        return PARTITIONED_DIMENSIONS, PARTITIONED_ATTRIBUTES, program_key(program_prefix)
+    prefix = (program_prefix or "").lower()
+    return f"{prefix}dimensions", f"{prefix}attributes", None
+
+def classify_file(data):
+    """Return 'dimensions', 'attributes' or None for a parsed JSON document."""
+    if isinstance(data, dict) and isinstance(data.get('dimensions'), list):
+        return 'dimensions'
+    if isinstance(data, dict) and data and all(isinstance(value, list) for value in data.values()):
+        return 'attributes'
+    return None
+
+def discover_files(directory, pattern="*.json"):
+    """Find and classify every JSON file in a directory."""
+    dimension_files = []
+    attribute_files = []
+    skipped = []
+
+    for file_path in sorted(glob.glob(os.path.join(directory, pattern))):
+        data = load_json_file(file_path)
+        kind = classify_file(data) if data is not None else None
+        if kind == 'dimensions':
+            dimension_files.append((file_path, data))
+        elif kind == 'attributes':
+            attribute_files.append((file_path, data))
+        else:
+            skipped.append(file_path)
+
+    return dimension_files, attribute_files, skipped
+
+def diff_dimensions(conn, dimensions, program_type, dimension_table, program=None):
+    """Compare a dimensions payload against the table without writing anything."""
+    records = {}
+    for position, dimension_data in enumerate(dimensions, 1):
+        record = normalize_dimension(dimension_data, position)
+        if record['dimension_id']:
+            record['program_type'] = program_type
+            records[record['dimension_id']] = record
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql.SQL("""
+            SELECT d.dimension_id, d.display_name, d.description, d.order_num, d.program_type
+            FROM {table} d
+            WHERE d.dimension_id = ANY(%s){program_filter}
+        """).format(
+            table=sql.Identifier(dimension_table),
+            program_filter=program_filter('d', program)
+        ), (list(records),))
+        existing = {row[0]: dict(zip(['dimension_id'] + DIMENSION_DIFF_COLUMNS, row)) for row in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+    return build_diff(records, existing, DIMENSION_DIFF_COLUMNS)
+
+def diff_attributes(conn, attributes_data, dimension_table, attribute_table, program=None):
+    """Compare an attributes payload against the tables without writing anything."""
+    records = {}
+    for dimension_id, attributes_list in attributes_data.items():
+        for position, attr_data in enumerate(attributes_list, 1):
+            record = normalize_attribute(attr_data, position)
+            if record['attribute_id']:
+                records[(dimension_id, record['attribute_id'])] = record
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql.SQL("""
+            SELECT d.dimension_id FROM {dimensions} d WHERE d.dimension_id = ANY(%s){program_filter}
+        """).format(
+            dimensions=sql.Identifier(dimension_table),
+            program_filter=program_filter('d', program)
+        ), (list(attributes_data),))
+        known_dimensions = {row[0] for row in cursor.fetchall()}
+
+        cursor.execute(sql.SQL("""
+            SELECT d.dimension_id, a.attribute_id, a.display_name, a.data_type,
+                   a.required, a.max_length, a.order_num
+            FROM {attributes} a
+            JOIN {dimensions} d ON d.id = a.dimension_id{join_filter}
+            WHERE d.dimension_id = ANY(%s){program_filter}
+        """).format(
+            attributes=sql.Identifier(attribute_table),
+            dimensions=sql.Identifier(dimension_table),
+            join_filter=sql.SQL("") if program is None else sql.SQL(" AND d.program = a.program"),
+            program_filter=program_filter('d', program)
+        ), (list(attributes_data),))
+        existing = {
+            (row[0], row[1]): dict(zip(ATTRIBUTE_DIFF_COLUMNS, row[2:]))
+            for row in cursor.fetchall()
+        }
+    finally:
+        cursor.close()
+
+    missing = sorted(set(attributes_data) - known_dimensions)
+    records = {key: record for key, record in records.items() if key[0] in known_dimensions}
+
+    diff = build_diff(records, existing, ATTRIBUTE_DIFF_COLUMNS)
+    diff['missing_dimensions'] = missing
+    return diff
+
+def build_diff(records, existing, columns):
+    """Split incoming records into added / changed / unchanged against existing rows."""
+    diff = {'added': [], 'changed': [], 'unchanged': 0}
+
+    for key, record in records.items():
+        label = "/".join(key) if isinstance(key, tuple) else key
+        current = existing.get(key)
+        if current is None:
+            diff['added'].append(label)
+            continue
+
+        changes = {
+            column: {'from': current[column], 'to': record[column]}
+            for column in columns if current[column] != record[column]
+        }
+        if changes:
+            diff['changed'].append({'key': label, 'changes': changes})
+        else:
+            diff['unchanged'] += 1
+
+    return diff
+
+def load_dimension_file(engine, file_path, data, program_type, dimension_table, dry_run, program=None):
+    """Apply (or diff) one dimensions file in its own transaction."""
+    started = time.perf_counter()
+    result = {'file': os.path.basename(file_path), 'kind': 'dimensions', 'status': 'ok'}
+
+    conn = engine.raw_connection()
+    try:
+        if dry_run:
+            result['diff'] = diff_dimensions(conn, data['dimensions'], program_type, dimension_table, program)
+            conn.rollback()
+        else:
+            dimensions_map, inserted, updated = upsert_dimensions(
+                conn, data['dimensions'], program_type, dimension_table, program
+            )
+            conn.commit()
+            result.update({'inserted': inserted, 'updated': updated, 'dimensions': len(dimensions_map)})
+    except Exception as e:
+        conn.rollback()
+        result.update({'status': 'error', 'error': str(e)})
+    finally:
+        conn.close()
+
+    result['seconds'] = round(time.perf_counter() - started, 3)
+    return result
+
+def load_attribute_file(engine, file_path, data, dimension_table, attribute_table, dry_run, program=None):
+    """Apply (or diff) one attributes file in its own transaction."""
+    started = time.perf_counter()
+    result = {'file': os.path.basename(file_path), 'kind': 'attributes', 'status': 'ok'}
+
+    conn = engine.raw_connection()
+    try:
+        if dry_run:
+            result['diff'] = diff_attributes(conn, data, dimension_table, attribute_table, program)
+            conn.rollback()
+        else:
+            outcome = upsert_attributes(conn, data, dimension_table, attribute_table, program)
+            conn.commit()
+            result.update(outcome)
+    except Exception as e:
+        conn.rollback()
+        result.update({'status': 'error', 'error': str(e)})
+    finally:
+        conn.close()
+
+    result['seconds'] = round(time.perf_counter() - started, 3)
+    return result
+
+def load_directory(engine, directory, program_prefix="", program_type="M&A",
+                   workers=DEFAULT_WORKERS, dry_run=False, pattern="*.json", partitioned=False):
+    """
+    Load every dimension/attribute JSON file in a directory.
+    Returns a summary dict suitable for json.dumps.
+    """
+    started = time.perf_counter()
+    dimension_table, attribute_table, program = get_table_names(program_prefix, partitioned)
+
+    if partitioned and not dry_run:
+        conn = engine.raw_connection()
+        try:
+            create_partitioned_tables(conn)
+            ensure_program_partition(conn, program)
+            conn.commit()
+        finally:
+            conn.close()
+    dimension_files, attribute_files, skipped = discover_files(directory, pattern)
+
+    log(f"Found {len(dimension_files)} dimension files and {len(attribute_files)} attribute files "
+        f"in {directory} ({len(skipped)} skipped)")
+
+    results = []
+
+    # Dimensions go first: attribute files resolve their FKs against them
+    for file_path, data in dimension_files:
+        result = load_dimension_file(engine, file_path, data, program_type, dimension_table, dry_run, program)
+        log(f"  [{result['status']}] {result['file']}")
+        results.append(result)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [
+            executor.submit(load_attribute_file, engine, file_path, data,
+                            dimension_table, attribute_table, dry_run, program)
+            for file_path, data in attribute_files
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            log(f"  [{result['status']}] {result['file']}")
+            results.append(result)
+
+    failed = [result for result in results if result['status'] != 'ok']
+    return {
+        'directory': os.path.abspath(directory),
+        'dimension_table': dimension_table,
+        'attribute_table': attribute_table,
+        'program': program,
+        'program_type': program_type,
+        'dry_run': dry_run,
+        'workers': workers,
+        'files': sorted(results, key=lambda result: (result['kind'] != 'dimensions', result['file'])),
+        'skipped_files': [os.path.basename(path) for path in skipped],
+        'failed': len(failed),
+        'seconds': round(time.perf_counter() - started, 3)
+    }
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Load all dimension/attribute JSON files in a directory")
+    parser.add_argument("directory", help="Directory containing dimensions/attributes JSON files")
+    parser.add_argument("--database", default=PG_DATABASE, help=f"Database name (default: {PG_DATABASE})")
+    parser.add_argument("--program", default="", help="Program table prefix, e.g. Acquisition -> acquisitiondimensions")
+    parser.add_argument("--program-type", default="M&A", help="program_type stored on imported dimensions (default: M&A)")
+    parser.add_argument("--pattern", default="*.json", help="Glob used to find files (default: *.json)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help=f"Concurrent files (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--partitioned", action="store_true", help="Load into the partitioned program_dimensions/program_attributes tables")
+    parser.add_argument("--dry-run", action="store_true", help="Report a diff against the database without writing")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON on stdout")
+    parser.add_argument("--summary-file", help="Also write the JSON summary to this path")
+    args = parser.parse_args()
+
+    # One pooled connection per worker
+    engine = get_engine(args.database, pool_size=max(1, args.workers), max_overflow=0)
+
+    try:
+        summary = load_directory(
+            engine, args.directory, args.program, args.program_type,
+            args.workers, args.dry_run, args.pattern, args.partitioned
+        )
+    finally:
+        engine.dispose()
+
+    if args.summary_file:
+        with open(args.summary_file, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        for result in summary['files']:
+            if result['status'] != 'ok':
+                print(f"{result['file']}: ERROR {result['error']}")
+            elif 'diff' in result:
+                diff = result['diff']
+                print(f"{result['file']}: {len(diff['added'])} to add, {len(diff['changed'])} to change, "
+                      f"{diff['unchanged']} unchanged")
+            else:
+                print(f"{result['file']}: {result['inserted']} added, {result['updated']} updated")
+        print(f"\n{len(summary['files'])} files processed in {summary['seconds']}s, {summary['failed']} failed.")
+
+    sys.exit(1 if summary['failed'] else 0)
+
+if __name__ == "__main__":
+    main()
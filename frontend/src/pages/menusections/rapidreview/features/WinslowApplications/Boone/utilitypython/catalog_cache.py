@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+In-memory read-through cache for the dimension/attribute catalog.
+
+The catalog only changes when an import or attribute-generation run writes
+to the tables, so readers are served from memory and the database is only
+queried again when:
+1. The entry is older than CATALOG_CACHE_TTL seconds (default 300), or
+2. A writer fires NOTIFY on the catalog_changed channel (see
+   notify_catalog_changed, called from the import paths in the same
+   transaction as the write, so it is only delivered on commit)
+
+Every cached catalog carries a version and an ETag so HTTP handlers can
+answer If-None-Match with 304 instead of re-sending the catalog:
+
+    cache = CatalogCache("hawkeye_db")
+    cache.start_listener()
+    status, body, headers = catalog_response(cache, "acquisition", request.headers.get("If-None-Match"))
+
+Usage:
+    python catalog_cache.py --program acquisition            # print catalog version/ETag
+    python catalog_cache.py --program acquisition --watch    # follow invalidations
+    python catalog_cache.py --notify acquisition             # invalidate listeners by hand
+"""
+
+import os
+import json
+import time
+import select
+import hashlib
+import argparse
+import threading
+from psycopg2 import sql
+from psycopg2.extras import DictCursor
+
+from db_pool import get_connection, admin_connection
+from partitioned_schema import PARTITIONED_DIMENSIONS, PARTITIONED_ATTRIBUTES, BASE_PROGRAM, program_key
+
+PG_DATABASE = "hawkeye_db"
+
+CATALOG_CHANNEL = "catalog_changed"
+
+# Payload that invalidates every cached program
+ALL_PROGRAMS = "*"
+
+CATALOG_CACHE_TTL = int(os.getenv("CATALOG_CACHE_TTL", "300"))
+
+def table_program(table_name):
+    """Map a {prefix}dimensions / {prefix}attributes table name onto its program key."""
+    for suffix in ("dimensions", "attributes"):
+        if table_name.endswith(suffix):
+            return program_key(table_name[:-len(suffix)])
+    return ALL_PROGRAMS
+
+def notify_catalog_changed(cursor, program=ALL_PROGRAMS):
+    """
+    Queue a catalog_changed notification for a program on the cursor's transaction.
+    Postgres only delivers it if the transaction commits.
+    """
+    cursor.execute("SELECT pg_notify(%s, %s)", [CATALOG_CHANNEL, program])
+
+class CatalogCache:
+    """Versioned, per-program catalog snapshots with TTL and NOTIFY invalidation."""
+
+    def __init__(self, database=PG_DATABASE, ttl=CATALOG_CACHE_TTL, partitioned=False):
+        self.database = database
+        self.ttl = ttl
+        self.partitioned = partitioned
+        self._entries = {}
+        # Bumped on every invalidation; a load that started before the bump is discarded
+        self._generations = {}
+        self._versions = {}
+        self._lock = threading.Lock()
+        self._listener = None
+        self._stop = threading.Event()
+
+    def get(self, program):
+        """Return the cached catalog entry for a program, loading it if missing or expired."""
+        program = program_key(program)
+        with self._lock:
+            entry = self._entries.get(program)
+            if entry and time.monotonic() - entry['loaded_at'] < self.ttl:
+                return entry
+            generation = self._generations.get(program, 0)
+
+        catalog = self.load(program)
+        body = json.dumps(catalog, sort_keys=True, separators=(",", ":"))
+        etag = '"' + hashlib.sha1(body.encode("utf-8")).hexdigest() + '"'
+
+        with self._lock:
+            previous = self._entries.get(program)
+            if previous and previous['etag'] == etag:
+                version = previous['version']
+            else:
+                version = self._versions.get(program, 0) + 1
+                self._versions[program] = version
+
+            entry = {
+                'program': program,
+                'version': version,
+                'etag': etag,
+                'catalog': catalog,
+                'body': body,
+                'loaded_at': time.monotonic()
+            }
+            if self._generations.get(program, 0) == generation:
+                self._entries[program] = entry
+            return entry
+
+    def invalidate(self, program=ALL_PROGRAMS):
+        """Drop one program's entry, or every entry for ALL_PROGRAMS."""
+        with self._lock:
+            if program == ALL_PROGRAMS:
+                programs = set(self._entries) | set(self._generations)
+            else:
+                programs = [program_key(program)]
+            for name in programs:
+                self._entries.pop(name, None)
+                self._generations[name] = self._generations.get(name, 0) + 1
+
+    def get_table_names(self, program):
+        """Return (dimension_table, attribute_table, program filter value) for a program key."""
+        if self.partitioned:
+            return PARTITIONED_DIMENSIONS, PARTITIONED_ATTRIBUTES, program
+        prefix = "" if program == BASE_PROGRAM else program
+        return f"{prefix}dimensions", f"{prefix}attributes", None
+
+    def load(self, program):
+        """Query one program's dimensions and attributes in the dashboard JSON shape."""
+        dimension_table, attribute_table, program_value = self.get_table_names(program)
+        dimension_filter = sql.SQL("")
+        attribute_filter = sql.SQL("")
+        if program_value is not None:
+            dimension_filter = sql.SQL(" WHERE d.program = {}").format(sql.Literal(program_value))
+            attribute_filter = sql.SQL(" AND d.program = {} AND a.program = {}").format(
+                sql.Literal(program_value), sql.Literal(program_value))
+
+        conn = get_connection(self.database)
+        try:
+            cursor = conn.cursor(cursor_factory=DictCursor)
+            cursor.execute(sql.SQL("""
+                SELECT d.dimension_id, d.display_name, d.description, d.program_type, d.order_num
+                FROM {dimensions} d{dimension_filter}
+                ORDER BY d.order_num, d.dimension_id
+            """).format(dimensions=sql.Identifier(dimension_table), dimension_filter=dimension_filter))
+            dimensions = [{
+                'id': row['dimension_id'],
+                'displayName': row['display_name'],
+                'description': row['description'],
+                'programType': row['program_type'],
+                'order': row['order_num']
+            } for row in cursor.fetchall()]
+
+            cursor.execute(sql.SQL("""
+                SELECT d.dimension_id, a.attribute_id, a.display_name, a.data_type,
+                       a.required, a.max_length, a.order_num
+                FROM {attributes} a
+                JOIN {dimensions} d ON d.id = a.dimension_id{attribute_filter}
+                ORDER BY d.order_num, d.dimension_id, a.order_num, a.attribute_id
+            """).format(
+                attributes=sql.Identifier(attribute_table),
+                dimensions=sql.Identifier(dimension_table),
+                attribute_filter=attribute_filter
+            ))
+            attributes = {}
+            for row in cursor.fetchall():
+                attributes.setdefault(row['dimension_id'], []).append({
+                    'id': row['attribute_id'],
+                    'displayName': row['display_name'],
+                    'dataType': row['data_type'],
+                    'required': row['required'],
+                    'maxLength': row['max_length'],
+                    'order': row['order_num']
+                })
+            cursor.close()
+            conn.rollback()
+        finally:
+            conn.close()
+
+        return {'dimensions': dimensions, 'attributes': attributes}
+
+    def start_listener(self, on_change=None):
+        """Start a daemon thread that LISTENs on catalog_changed and invalidates entries."""
+        if self._listener and self._listener.is_alive():
+            return self._listener
+        self._stop.clear()
+        self._listener = threading.Thread(
+            target=self._listen, args=(on_change,), name="catalog-cache-listener", daemon=True
+        )
+        self._listener.start()
+        return self._listener
+
+    def stop_listener(self):
+        """Ask the listener thread to exit and wait for it."""
+        self._stop.set()
+        if self._listener:
+            self._listener.join(timeout=5)
+
+    def _listen(self, on_change):
+        """Listener loop; reconnects on failure and drops everything it may have missed."""
+        while not self._stop.is_set():
+            conn = None
+            try:
+                # LISTEN needs a dedicated autocommit connection, not a pooled one
+                conn = admin_connection(self.database)
+                conn.cursor().execute(sql.SQL("LISTEN {}").format(sql.Identifier(CATALOG_CHANNEL)))
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notification = conn.notifies.pop(0)
+                        self.invalidate(notification.payload or ALL_PROGRAMS)
+                        if on_change:
+                            on_change(notification.payload or ALL_PROGRAMS)
+            except Exception as e:
+                print(f"Catalog listener error: {e}")
+                self.invalidate(ALL_PROGRAMS)
+                self._stop.wait(5)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+def catalog_response(cache, program, if_none_match=None):
+    """
+    Build an HTTP response for a catalog request as (status, body, headers).
+    Returns 304 with an empty body when the client's ETag is still current.
+    """
+    entry = cache.get(program)
+    headers = {
+        'ETag': entry['etag'],
+        'Cache-Control': 'no-cache',
+        'X-Catalog-Version': str(entry['version'])
+    }
+    if if_none_match and entry['etag'] in [tag.strip() for tag in if_none_match.split(",")]:
+        return 304, "", headers
+    headers['Content-Type'] = 'application/json'
+    return 200, entry['body'], headers
+
+def main():
+    """Main function to inspect the catalog cache or fire an invalidation."""
+    parser = argparse.ArgumentParser(description="Dimension/attribute catalog cache")
+    parser.add_argument("--database", default=PG_DATABASE, help=f"Database name (default: {PG_DATABASE})")
+    parser.add_argument("--program", default="", help="Program table prefix (default: unprefixed tables)")
+    parser.add_argument("--partitioned", action="store_true", help="Read the partitioned program_* tables")
+    parser.add_argument("--watch", action="store_true", help="Keep running and reload on every invalidation")
+    parser.add_argument("--notify", metavar="PROGRAM", help=f"Send an invalidation ('{ALL_PROGRAMS}' for all) and exit")
+    args = parser.parse_args()
+
+    if args.notify is not None:
+        conn = get_connection(args.database)
+        try:
+            program = args.notify if args.notify == ALL_PROGRAMS else program_key(args.notify)
+            notify_catalog_changed(conn.cursor(), program)
+            conn.commit()
+            print(f"Sent {CATALOG_CHANNEL} for '{program}'.")
+        finally:
+            conn.close()
+        return
+
+    cache = CatalogCache(args.database, partitioned=args.partitioned)
+
+    def show():
+        entry = cache.get(args.program)
+        attribute_count = sum(len(items) for items in entry['catalog']['attributes'].values())
+        print(f"Program '{entry['program']}' v{entry['version']} {entry['etag']}: "
+              f"{len(entry['catalog']['dimensions'])} dimensions, {attribute_count} attributes")
+
+    show()
+    if not args.watch:
+        return
+
+    cache.start_listener(on_change=lambda program: show())
+    print(f"Listening on {CATALOG_CHANNEL}. Press Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        cache.stop_listener()
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,25 @@
 import os
+import io
+import csv
 import json
-from dotenv import load_dotenv
-from sqlalchemy import create_engine, Column, Integer, String, Text, Boolean, DateTime, ForeignKey, CheckConstraint, Index, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, CheckConstraint, Index, UniqueConstraint
 from sqlalchemy.orm import declarative_base, sessionmaker, relationship
 from sqlalchemy.sql import func
-import psycopg2
-from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from psycopg2 import sql
 
-# Load environment variables
-load_dotenv()
-
-# Database connection parameters
-PG_USER = os.getenv("PG_USER", "postgres")
-PG_PASSWORD = os.getenv("PG_PASSWORD", "")
-PG_HOST = os.getenv("PG_HOST", "localhost")
-PG_PORT = os.getenv("PG_PORT", "5432")
+from db_pool import get_engine, admin_connection
+from catalog_cache import notify_catalog_changed, table_program
 
 # SQLAlchemy setup - using updated approach
 Base = declarative_base()
 
+# Data types allowed by the check_data_type constraint
+VALID_DATA_TYPES = ['text', 'number', 'date', 'boolean', 'string']
+
 def list_and_select_database():
     """List existing databases and let user select or create a new one."""
     # Connect to default postgres database
-    conn = psycopg2.connect(
-        user=PG_USER,
-        password=PG_PASSWORD,
-        host=PG_HOST,
-        port=PG_PORT,
-        dbname="postgres"
-    )
-    conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+    conn = admin_connection("postgres")
     
     cursor = conn.cursor()
     
@@ -148,8 +138,8 @@ class Attribute(Base):
 # Create tables
 def setup_database(db_name):
     """Create tables in the database."""
-    # Create SQLAlchemy engine
-    engine = create_engine(f"postgresql://{PG_USER}:{PG_PASSWORD}@{PG_HOST}:{PG_PORT}/{db_name}")
+    # Borrow the shared pooled engine
+    engine = get_engine(db_name)
     
     try:
         # Create all tables
@@ -363,6 +353,317 @@ def import_attributes(engine, dimensions_map):
     except Exception as e:
         print(f"Error importing attributes: {e}")
 
+# Bulk import mode
+#
+# The functions below replace the per-row query/flush loop above with a
+# set-based path: each JSON file is streamed into a temporary staging table
+# with COPY and applied with a single INSERT ... ON CONFLICT DO UPDATE.
+# The upsert functions take a raw DBAPI connection and never commit, so the
+# caller decides the transaction boundary.
+
+def load_json_file(file_path):
+    """Load a JSON file, returning None if it is missing or invalid."""
+    if not os.path.exists(file_path):
+        print(f"Error: File '{file_path}' does not exist.")
+        return None
+    
+    try:
+        with open(file_path, 'r') as f:
+            return json.load(f)
+    except json.JSONDecodeError:
+        print(f"Error: The file '{file_path}' is not valid JSON.")
+        return None
+
+def normalize_dimension(dimension_data, position):
+    """Map a dimension record from either JSON format onto table columns."""
+    return {
+        'dimension_id': dimension_data.get('id') or dimension_data.get('dimension_id'),
+        'display_name': dimension_data.get('displayName') or dimension_data.get('display_name'),
+        'description': dimension_data.get('description'),
+        'order_num': dimension_data.get('order', dimension_data.get('order_num', position)),
+    }
+
+def normalize_attribute(attr_data, position):
+    """Map an attribute record from either JSON format onto table columns."""
+    data_type = (attr_data.get('dataType') or attr_data.get('data_type') or 'text').lower()
+    # Normalize data type to match our constraints
+    if data_type not in VALID_DATA_TYPES:
+        data_type = 'text'
+    
+    return {
+        'attribute_id': attr_data.get('id') or attr_data.get('attribute_id'),
+        'display_name': attr_data.get('displayName') or attr_data.get('display_name'),
+        'data_type': data_type,
+        'required': bool(attr_data.get('required', False)),
+        'max_length': attr_data.get('maxLength', attr_data.get('max_length')),
+        'order_num': attr_data.get('order', attr_data.get('order_num', position)),
+    }
+
+def copy_rows_to_staging(cursor, staging_table, columns, rows):
+    """Stream rows into a staging table with a single COPY."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(['t' if value is True else 'f' if value is False else value for value in row])
+    buffer.seek(0)
+    
+    cursor.copy_expert(
+        sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv)").format(
+            sql.Identifier(staging_table),
+            sql.SQL(', ').join(map(sql.Identifier, columns))
+        ),
+        buffer
+    )
+
+def program_scope(program):
+    """
+    SQL fragments that scope an upsert to one program.
+    Per-program tables need none; the partitioned program_dimensions /
+    program_attributes tables (see partitioned_schema.py) are keyed by program.
+    """
+    if program is None:
+        return sql.SQL(""), sql.SQL(""), sql.SQL("")
+    literal = sql.Literal(program)
+    return sql.SQL("program, "), sql.SQL("{}, ").format(literal), sql.SQL("program, ")
+
+def program_filter(alias, program):
+    """SQL that restricts a partitioned table to one program (empty otherwise)."""
+    if program is None:
+        return sql.SQL("")
+    return sql.SQL(" AND {}.program = {}").format(sql.Identifier(alias), sql.Literal(program))
+
+def upsert_dimensions(conn, dimensions, program_type, dimension_table='dimensions', program=None):
+    """
+    Upsert a list of dimension records in one statement.
+    Pass program when dimension_table is the partitioned program_dimensions table.
+    Returns (dimensions_map, inserted_count, updated_count).
+    """
+    rows = []
+    for seq, dimension_data in enumerate(dimensions):
+        record = normalize_dimension(dimension_data, seq + 1)
+        if not record['dimension_id'] or not record['display_name']:
+            print(f"Warning: Skipping dimension without id/displayName: {dimension_data}")
+            continue
+        rows.append((seq, record['dimension_id'], record['display_name'],
+                     record['description'], record['order_num']))
+    
+    if not rows:
+        return {}, 0, 0
+    
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            CREATE TEMP TABLE staging_dimensions (
+                seq INTEGER NOT NULL,
+                dimension_id VARCHAR(50) NOT NULL,
+                display_name VARCHAR(100) NOT NULL,
+                description TEXT,
+                order_num INTEGER NOT NULL
+            ) ON COMMIT DROP
+        """)
+        copy_rows_to_staging(
+            cursor, 'staging_dimensions',
+            ['seq', 'dimension_id', 'display_name', 'description', 'order_num'], rows
+        )
+        
+        program_column, program_value, conflict_prefix = program_scope(program)
+        dimension_filter = program_filter('d', program)
+        
+        # Existing keys are read up front instead of via RETURNING xmax,
+        # which partitioned tables don't expose.
+        cursor.execute(sql.SQL("""
+            SELECT d.dimension_id
+            FROM {table} d
+            JOIN staging_dimensions s ON s.dimension_id = d.dimension_id{dimension_filter}
+        """).format(table=sql.Identifier(dimension_table), dimension_filter=dimension_filter))
+        existing = {row[0] for row in cursor.fetchall()}
+        
+        # DISTINCT ON keeps the last occurrence of a duplicated dimension_id,
+        # matching what the row-by-row import would have left behind.
+        cursor.execute(sql.SQL("""
+            INSERT INTO {table} AS d
+                ({program_column}dimension_id, display_name, description, is_core, program_type, order_num)
+            SELECT DISTINCT ON (s.dimension_id)
+                {program_value}s.dimension_id, s.display_name, s.description, TRUE, %s, s.order_num
+            FROM staging_dimensions s
+            ORDER BY s.dimension_id, s.seq DESC
+            ON CONFLICT ({conflict_prefix}dimension_id) DO UPDATE SET
+                display_name = EXCLUDED.display_name,
+                description = EXCLUDED.description,
+                is_core = EXCLUDED.is_core,
+                program_type = EXCLUDED.program_type,
+                order_num = EXCLUDED.order_num
+            RETURNING d.id, d.dimension_id
+        """).format(
+            table=sql.Identifier(dimension_table),
+            program_column=program_column,
+            program_value=program_value,
+            conflict_prefix=conflict_prefix
+        ), (program_type,))
+        
+        dimensions_map = dict((dimension_id, db_id) for db_id, dimension_id in cursor.fetchall())
+        updated = len(existing)
+        
+        cursor.execute("DROP TABLE staging_dimensions")
+        notify_catalog_changed(cursor, program or table_program(dimension_table))
+        return dimensions_map, len(dimensions_map) - updated, updated
+    finally:
+        cursor.close()
+
+def upsert_attributes(conn, attributes_data, dimension_table='dimensions', attribute_table='attributes',
+                      program=None):
+    """
+    Upsert every attribute in a {dimension_id: [attributes]} payload in one statement.
+    Dimension ids are resolved inside the statement by joining the dimension table.
+    Pass program when the tables are the partitioned program_* tables.
+    Returns a dict with inserted/updated counts and the dimension ids that were not found.
+    """
+    rows = []
+    seq = 0
+    for dimension_id, attributes_list in attributes_data.items():
+        for position, attr_data in enumerate(attributes_list, 1):
+            record = normalize_attribute(attr_data, position)
+            if not record['attribute_id'] or not record['display_name']:
+                print(f"Warning: Skipping attribute without id/displayName in {dimension_id}: {attr_data}")
+                continue
+            rows.append((seq, dimension_id, record['attribute_id'], record['display_name'],
+                         record['data_type'], record['required'], record['max_length'],
+                         record['order_num']))
+            seq += 1
+    
+    result = {'inserted': 0, 'updated': 0, 'missing_dimensions': []}
+    if not rows:
+        return result
+    
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            CREATE TEMP TABLE staging_attributes (
+                seq INTEGER NOT NULL,
+                dimension_key VARCHAR(50) NOT NULL,
+                attribute_id VARCHAR(50) NOT NULL,
+                display_name VARCHAR(200) NOT NULL,
+                data_type VARCHAR(20) NOT NULL,
+                required BOOLEAN NOT NULL,
+                max_length INTEGER,
+                order_num INTEGER NOT NULL
+            ) ON COMMIT DROP
+        """)
+        copy_rows_to_staging(
+            cursor, 'staging_attributes',
+            ['seq', 'dimension_key', 'attribute_id', 'display_name', 'data_type',
+             'required', 'max_length', 'order_num'], rows
+        )
+        
+        program_column, program_value, conflict_prefix = program_scope(program)
+        dimension_filter = program_filter('d', program)
+        
+        cursor.execute(sql.SQL("""
+            SELECT DISTINCT s.dimension_key
+            FROM staging_attributes s
+            LEFT JOIN {dimensions} d ON d.dimension_id = s.dimension_key{dimension_filter}
+            WHERE d.id IS NULL
+            ORDER BY s.dimension_key
+        """).format(dimensions=sql.Identifier(dimension_table), dimension_filter=dimension_filter))
+        result['missing_dimensions'] = [row[0] for row in cursor.fetchall()]
+        
+        cursor.execute(sql.SQL("""
+            SELECT COUNT(DISTINCT (a.dimension_id, a.attribute_id))
+            FROM staging_attributes s
+            JOIN {dimensions} d ON d.dimension_id = s.dimension_key{dimension_filter}
+            JOIN {attributes} a ON a.dimension_id = d.id AND a.attribute_id = s.attribute_id{attribute_filter}
+        """).format(
+            attributes=sql.Identifier(attribute_table),
+            dimensions=sql.Identifier(dimension_table),
+            dimension_filter=dimension_filter,
+            attribute_filter=program_filter('a', program)
+        ))
+        result['updated'] = cursor.fetchone()[0]
+        
+        cursor.execute(sql.SQL("""
+            INSERT INTO {attributes} AS a
+                ({program_column}dimension_id, attribute_id, display_name, data_type, required,
+                 max_length, order_num, is_core)
+            SELECT DISTINCT ON (d.id, s.attribute_id)
+                {program_value}d.id, s.attribute_id, s.display_name, s.data_type, s.required,
+                s.max_length, s.order_num, TRUE
+            FROM staging_attributes s
+            JOIN {dimensions} d ON d.dimension_id = s.dimension_key{dimension_filter}
+            ORDER BY d.id, s.attribute_id, s.seq DESC
+            ON CONFLICT ({conflict_prefix}dimension_id, attribute_id) DO UPDATE SET
+                display_name = EXCLUDED.display_name,
+                data_type = EXCLUDED.data_type,
+                required = EXCLUDED.required,
+                max_length = EXCLUDED.max_length,
+                order_num = EXCLUDED.order_num,
+                is_core = EXCLUDED.is_core
+        """).format(
+            attributes=sql.Identifier(attribute_table),
+            dimensions=sql.Identifier(dimension_table),
+            program_column=program_column,
+            program_value=program_value,
+            conflict_prefix=conflict_prefix,
+            dimension_filter=dimension_filter
+        ))
+        
+        result['inserted'] = cursor.rowcount - result['updated']
+        
+        cursor.execute("DROP TABLE staging_attributes")
+        notify_catalog_changed(cursor, program or table_program(attribute_table))
+        return result
+    finally:
+        cursor.close()
+
+def bulk_import_dimensions(engine, file_path, program_type,
+                           dimension_table=Dimension.__tablename__):
+    """Import a dimensions JSON file in a single transaction."""
+    dimensions_data = load_json_file(file_path)
+    if dimensions_data is None:
+        return {}
+    
+    dimensions = dimensions_data.get('dimensions', []) if isinstance(dimensions_data, dict) else dimensions_data
+    print(f"Found {len(dimensions)} dimensions in the file.")
+    
+    conn = engine.raw_connection()
+    try:
+        dimensions_map, inserted, updated = upsert_dimensions(
+            conn, dimensions, program_type, dimension_table
+        )
+        conn.commit()
+        print(f"Bulk import complete: {inserted} dimensions added, {updated} dimensions updated.")
+        return dimensions_map
+    except Exception as e:
+        conn.rollback()
+        print(f"Error bulk importing dimensions: {e}")
+        return {}
+    finally:
+        conn.close()
+
+def bulk_import_attributes(engine, file_path,
+                           dimension_table=Dimension.__tablename__,
+                           attribute_table=Attribute.__tablename__):
+    """Import an attributes JSON file in a single transaction."""
+    attributes_data = load_json_file(file_path)
+    if attributes_data is None:
+        return None
+    
+    print(f"Found {len(attributes_data)} dimensions with attributes.")
+    
+    conn = engine.raw_connection()
+    try:
+        result = upsert_attributes(conn, attributes_data, dimension_table, attribute_table)
+        conn.commit()
+        for dimension_id in result['missing_dimensions']:
+            print(f"Warning: Dimension {dimension_id} not found in database. Skipping its attributes.")
+        print(f"Bulk import complete: {result['inserted']} attributes added, {result['updated']} attributes updated.")
+        return result
+    except Exception as e:
+        conn.rollback()
+        print(f"Error bulk importing attributes: {e}")
+        return None
+    finally:
+        conn.close()
+
 def main():
     """Main function to execute the script."""
     print("Welcome to the Due Diligence Database Setup Tool")
@@ -379,18 +680,30 @@ def main():
     if not engine:
         return
     
+    # Bulk mode stages each file and applies it with one upsert statement
+    bulk_mode = input("\nUse bulk import mode (single-statement upsert)? (y/n): ").lower().strip() == 'y'
+    
     # Ask user if they want to import dimensions
     import_dims = input("\nDo you want to import dimensions from a JSON file? (y/n): ").lower().strip()
     
     dimensions_map = {}
     if import_dims == 'y':
-        dimensions_map = import_dimensions(engine)
+        if bulk_mode:
+            file_path = input("Enter the path to your dimensions JSON file: ").strip()
+            program_type = input("Enter the program type for these dimensions (e.g., M&A, Real Estate): ").strip() or "M&A"
+            dimensions_map = bulk_import_dimensions(engine, file_path, program_type)
+        else:
+            dimensions_map = import_dimensions(engine)
     
     # Ask user if they want to import attributes
     import_attrs = input("\nDo you want to import attributes from a JSON file? (y/n): ").lower().strip()
     
     if import_attrs == 'y':
-        import_attributes(engine, dimensions_map)
+        if bulk_mode:
+            file_path = input("Enter the path to your attributes JSON file: ").strip()
+            bulk_import_attributes(engine, file_path)
+        else:
+            import_attributes(engine, dimensions_map)
     
     print("\nSetup complete!")
     print(f"You now have a PostgreSQL database '{db_name}' ready for your due diligence application.")
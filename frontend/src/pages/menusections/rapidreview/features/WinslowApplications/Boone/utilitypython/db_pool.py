@@ -0,0 +1,168 @@
+"""
+Shared connection pool and engine factory for the Boone utility scripts.
+
+Every script borrows connections from here instead of calling
+create_engine / psycopg2.connect itself, so a multi-step run reuses warm
+connections rather than paying a TCP + auth handshake per helper call.
+
+    engine = get_engine("hawkeye_db")            # SQLAlchemy engine (cached per database)
+    conn = get_connection("hawkeye_db")          # pooled psycopg2 connection; close() returns it
+    with pooled_connection("hawkeye_db") as conn:
+        ...                                      # committed on success, rolled back on error
+
+Pool behaviour is configured through environment variables:
+    PG_POOL_SIZE            connections kept open per database (default 5)
+    PG_MAX_OVERFLOW         extra connections allowed under load (default 5)
+    PG_POOL_RECYCLE         seconds before a connection is replaced (default 1800)
+    PG_POOL_PRE_PING        check connections before handing them out (default on)
+    PG_STATEMENT_TIMEOUT_MS server-side statement_timeout, 0 disables (default 0)
+    PG_USE_PREPARED         use server-side prepared statements in execute_prepared (default on)
+"""
+
+import os
+import re
+import threading
+from contextlib import contextmanager
+from dotenv import load_dotenv
+from sqlalchemy import create_engine
+from sqlalchemy.engine import URL
+import psycopg2
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+# Load environment variables
+load_dotenv()
+
+# Database connection parameters
+PG_USER = os.getenv("PG_USER", "postgres")
+PG_PASSWORD = os.getenv("PG_PASSWORD", "")
+PG_HOST = os.getenv("PG_HOST", "localhost")
+PG_PORT = os.getenv("PG_PORT", "5432")
+
+# Pool settings
+PG_POOL_SIZE = int(os.getenv("PG_POOL_SIZE", "5"))
+PG_MAX_OVERFLOW = int(os.getenv("PG_MAX_OVERFLOW", "5"))
+PG_POOL_RECYCLE = int(os.getenv("PG_POOL_RECYCLE", "1800"))
+PG_POOL_PRE_PING = os.getenv("PG_POOL_PRE_PING", "1").lower() not in ("0", "false", "no")
+PG_STATEMENT_TIMEOUT_MS = int(os.getenv("PG_STATEMENT_TIMEOUT_MS", "0"))
+PG_USE_PREPARED = os.getenv("PG_USE_PREPARED", "1").lower() not in ("0", "false", "no")
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+def _connection_params(database, user=None, password=None, host=None, port=None):
+    """Fill in connection parameters from the environment."""
+    return {
+        "dbname": database,
+        "user": user or PG_USER,
+        "password": PG_PASSWORD if password is None else password,
+        "host": host or PG_HOST,
+        "port": str(port or PG_PORT),
+    }
+
+def get_engine(database, user=None, password=None, host=None, port=None,
+               pool_size=None, max_overflow=None, statement_timeout_ms=None):
+    """
+    Return the pooled engine for a database, creating it on first use.
+    Engines are cached per (database, user, host, port); pool settings only
+    apply to the call that creates the engine.
+    """
+    params = _connection_params(database, user, password, host, port)
+    key = (params["dbname"], params["user"], params["host"], params["port"])
+
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is not None:
+            return engine
+
+        timeout = PG_STATEMENT_TIMEOUT_MS if statement_timeout_ms is None else statement_timeout_ms
+        connect_args = {}
+        if timeout:
+            connect_args["options"] = f"-c statement_timeout={int(timeout)}"
+
+        url = URL.create(
+            "postgresql+psycopg2",
+            username=params["user"],
+            password=params["password"],
+            host=params["host"],
+            port=int(params["port"]),
+            database=params["dbname"],
+        )
+        engine = create_engine(
+            url,
+            pool_size=PG_POOL_SIZE if pool_size is None else pool_size,
+            max_overflow=PG_MAX_OVERFLOW if max_overflow is None else max_overflow,
+            pool_recycle=PG_POOL_RECYCLE,
+            pool_pre_ping=PG_POOL_PRE_PING,
+            connect_args=connect_args,
+        )
+        _engines[key] = engine
+        return engine
+
+def get_connection(database, user=None, password=None, host=None, port=None):
+    """
+    Borrow a psycopg2 connection from the database's pool.
+    Calling close() on it returns it to the pool instead of disconnecting.
+    """
+    return get_engine(database, user, password, host, port).raw_connection()
+
+@contextmanager
+def pooled_connection(database, user=None, password=None, host=None, port=None):
+    """Borrow a pooled connection for one transaction."""
+    conn = get_connection(database, user, password, host, port)
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def admin_connection(database="postgres"):
+    """
+    Open a dedicated autocommit connection for maintenance statements such as
+    CREATE DATABASE. These are not pooled, since autocommit would leak into
+    pooled connections.
+    """
+    conn = psycopg2.connect(**_connection_params(database))
+    conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+    return conn
+
+def execute_prepared(conn, cursor, name, statement, params=()):
+    """
+    Execute a statement through a server-side prepared statement.
+
+    The statement is PREPAREd the first time it is used on a pooled
+    connection and reused for the lifetime of that connection, so hot
+    statements in loops skip parsing and planning. The statement must use
+    $1, $2, ... placeholders, each once and in order. Falls back to a normal
+    execute when PG_USE_PREPARED is off or the connection is not pooled.
+    """
+    # Pooled connections carry a per-connection info dict; plain psycopg2
+    # connections expose a ConnectionInfo object under the same name instead.
+    info = getattr(conn, "info", None)
+    if not PG_USE_PREPARED or not isinstance(info, dict):
+        cursor.execute(_to_pyformat(statement), params)
+        return
+
+    prepared = info.setdefault("prepared_statements", set())
+    if name not in prepared:
+        cursor.execute(f"PREPARE {name} AS {statement}")
+        prepared.add(name)
+
+    if params:
+        placeholders = ", ".join(["%s"] * len(params))
+        cursor.execute(f"EXECUTE {name} ({placeholders})", params)
+    else:
+        cursor.execute(f"EXECUTE {name}")
+
+def _to_pyformat(statement):
+    """Translate $n placeholders (used once each, in order) into psycopg2 %s placeholders."""
+    return re.sub(r"\$\d+", "%s", statement.replace("%", "%%"))
+
+def dispose_all():
+    """Close every pooled connection (e.g. before forking worker processes)."""
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
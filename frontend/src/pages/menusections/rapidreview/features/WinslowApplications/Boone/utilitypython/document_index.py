@@ -0,0 +1,140 @@
+"""
+Split a long document into sections and pick the ones relevant to a query.
+
+Used to send Claude only the parts of a due diligence checklist that relate
+to one dimension, instead of the first 50,000 characters of the whole file.
+The index is plain BM25 over word tokens, built once per document:
+
+    index = DocumentIndex(content)
+    excerpt = index.select("Environmental environmental_matters", max_chars=20000)
+"""
+
+import re
+import math
+from collections import Counter
+
+# Target section size; sections are built from whole paragraphs where possible
+CHUNK_SIZE = 1500
+
+# BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "in", "is", "it",
+    "its", "of", "on", "or", "that", "the", "to", "was", "were", "will", "with", "any", "all",
+    "other", "such", "each", "which", "this", "these", "those", "not", "no", "if", "but"
+}
+
+SECTION_SEPARATOR = "\n\n[...]\n\n"
+
+def tokenize(text):
+    """Lowercase word tokens without stopwords, with plural 's' stripped."""
+    tokens = []
+    for word in re.findall(r"[a-z0-9]+", text.lower().replace("_", " ")):
+        if word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+def is_heading(paragraph):
+    """Short single-line paragraphs without closing punctuation start a new section."""
+    return "\n" not in paragraph and len(paragraph) < 100 and not paragraph.rstrip().endswith((".", ",", ";", ":"))
+
+def split_long_paragraph(paragraph, chunk_size):
+    """Split a paragraph bigger than a section on line boundaries (hard-cutting very long lines)."""
+    pieces = []
+    piece = ""
+    for line in paragraph.split("\n"):
+        for start in range(0, max(len(line), 1), chunk_size):
+            segment = line[start:start + chunk_size]
+            if piece and len(piece) + len(segment) + 1 > chunk_size:
+                pieces.append(piece)
+                piece = ""
+            piece = f"{piece}\n{segment}" if piece else segment
+    if piece.strip():
+        pieces.append(piece)
+    return pieces
+
+def split_into_chunks(text, chunk_size=CHUNK_SIZE):
+    """Split text into sections of about chunk_size characters along paragraph boundaries."""
+    paragraphs = [p.strip() for p in re.split(r"\n\s*\n", text) if p.strip()]
+    chunks = []
+    current = []
+    current_length = 0
+
+    def flush():
+        if current:
+            chunks.append("\n\n".join(current))
+            current.clear()
+
+    for paragraph in paragraphs:
+        pieces = [paragraph] if len(paragraph) <= chunk_size else split_long_paragraph(paragraph, chunk_size)
+        for piece in pieces:
+            # A heading opens a new section unless the current one is still mostly empty
+            starts_section = is_heading(piece) and current_length > chunk_size // 4
+            if current and (current_length + len(piece) > chunk_size or starts_section):
+                flush()
+                current_length = 0
+            current.append(piece)
+            current_length += len(piece) + 2
+    flush()
+    return chunks
+
+class DocumentIndex:
+    """BM25 index over the sections of one document."""
+
+    def __init__(self, text, chunk_size=CHUNK_SIZE):
+        self.text = text
+        self.chunks = split_into_chunks(text, chunk_size)
+        self.term_counts = [Counter(tokenize(chunk)) for chunk in self.chunks]
+        self.lengths = [sum(counts.values()) for counts in self.term_counts]
+        self.average_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0
+
+        document_frequency = Counter()
+        for counts in self.term_counts:
+            document_frequency.update(counts.keys())
+        total = len(self.chunks)
+        self.idf = {
+            term: math.log(1 + (total - frequency + 0.5) / (frequency + 0.5))
+            for term, frequency in document_frequency.items()
+        }
+
+    def search(self, query, k=None):
+        """Return [(score, chunk_index)] for sections matching the query, best first."""
+        terms = set(tokenize(query))
+        scores = []
+        for index, counts in enumerate(self.term_counts):
+            score = 0.0
+            length_norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[index] / (self.average_length or 1))
+            for term in terms:
+                frequency = counts.get(term)
+                if frequency:
+                    score += self.idf[term] * frequency * (BM25_K1 + 1) / (frequency + length_norm)
+            if score > 0:
+                scores.append((score, index))
+        scores.sort(key=lambda item: (-item[0], item[1]))
+        return scores[:k] if k else scores
+
+    def select(self, query, max_chars, k=None):
+        """
+        Return the (at most k) most relevant sections that fit in max_chars, in
+        document order. Falls back to the start of the document when nothing matches.
+        """
+        if len(self.text) <= max_chars:
+            return self.text
+
+        selected = []
+        used = 0
+        for _, index in self.search(query, k):
+            size = len(self.chunks[index]) + len(SECTION_SEPARATOR)
+            if used + size > max_chars:
+                continue
+            selected.append(index)
+            used += size
+
+        if not selected:
+            return self.text[:max_chars]
+        return SECTION_SEPARATOR.join(self.chunks[index] for index in sorted(selected))
@@ -1,27 +1,18 @@
 import os
 import json
-from sqlalchemy import create_engine, Column, Integer, String, Text, Boolean, DateTime, ForeignKey, CheckConstraint, Index, UniqueConstraint
-from sqlalchemy.orm import declarative_base, sessionmaker, relationship
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, CheckConstraint, Index, UniqueConstraint, text, tuple_
+from sqlalchemy.orm import declarative_base, sessionmaker, relationship, contains_eager
 from sqlalchemy.sql import func
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+from db_pool import get_engine
+from catalog_cache import ALL_PROGRAMS, CATALOG_CHANNEL
 
-# Database connection parameters from environment variables with defaults
-PG_USER = os.getenv("PG_USER", "postgres")
-PG_PASSWORD = os.getenv("PG_PASSWORD", "")
-PG_HOST = os.getenv("PG_HOST", "localhost")
-PG_PORT = os.getenv("PG_PORT", "5432")
 PG_DATABASE = "hawkeye_db"
 
-# Create connection string
-connection_string = f"postgresql://{PG_USER}:{PG_PASSWORD}@{PG_HOST}:{PG_PORT}/{PG_DATABASE}"
 print(f"Connecting to database: {PG_DATABASE}")
-print(f"Connection string: {connection_string}")
 
-# Create SQLAlchemy engine to connect to your existing database
-engine = create_engine(connection_string)
+# Borrow the shared pooled engine for your existing database
+engine = get_engine(PG_DATABASE)
 
 # Test the connection before proceeding
 try:
@@ -88,6 +79,11 @@ class Attribute(Base):
 Session = sessionmaker(bind=engine)
 session = Session()
 
+def notify_catalog_changed():
+    """Tell catalog caches to reload; these models span more than one table prefix."""
+    session.execute(text("SELECT pg_notify(:channel, :program)"),
+                    {"channel": CATALOG_CHANNEL, "program": ALL_PROGRAMS})
+
 def get_file_path(prompt, default=None):
     """Helper function to get and validate a file path."""
     file_path = input(prompt).strip()
@@ -213,7 +209,8 @@ def import_dimensions_from_file():
                 dimensions_added += 1
                 print(f"  Added dimension: {display_name}")
         
-        # Commit changes
+        # Commit changes; the notification goes out with the commit
+        notify_catalog_changed()
         session.commit()
         print(f"\nImport complete: {dimensions_added} dimensions added, {dimensions_updated} dimensions updated.")
         
@@ -335,7 +332,8 @@ def import_attributes_from_file(dimensions_map=None):
             
             print(f"  Added {dimension_attributes_added} and updated {dimension_attributes_updated} attributes for {dimension_id}")
         
-        # Commit changes
+        # Commit changes; the notification goes out with the commit
+        notify_catalog_changed()
         session.commit()
         print(f"\nImport complete: {attributes_added} attributes added, {attributes_updated} attributes updated across {dimensions_with_attributes} dimensions.")
         
@@ -361,9 +359,63 @@ def list_dimensions():
     for dimension in dimensions:
         print(f"{dimension.id:<5} {dimension.dimension_id:<25} {dimension.display_name:<45} {dimension.program_type:<10}")
 
+# Rows fetched per round trip when streaming the full attribute list
+ATTRIBUTE_PAGE_SIZE = 500
+
+def catalog_counts():
+    """Return [(dimension, attribute_count)] ordered by display name in a single GROUP BY query."""
+    return (
+        session.query(Dimension, func.count(Attribute.id))
+        .outerjoin(Attribute, Attribute.dimension_id == Dimension.id)
+        .group_by(Dimension.id)
+        .order_by(Dimension.display_name)
+        .all()
+    )
+
+def iter_attribute_pages(page_size=ATTRIBUTE_PAGE_SIZE):
+    """
+    Yield every attribute, ordered by dimension then order_num, one page at a time.
+    Each page is one joined query (the dimension comes back in the same row) and
+    pages are keyset-paginated, so memory stays flat for programs with thousands
+    of attributes. page_size=None returns everything as a single page.
+    """
+    last_key = None
+    while True:
+        query = (
+            session.query(Attribute)
+            .join(Attribute.dimension)
+            .options(contains_eager(Attribute.dimension))
+        )
+        if last_key is not None:
+            query = query.filter(
+                tuple_(Dimension.display_name, Attribute.order_num, Attribute.id) > tuple_(*last_key)
+            )
+        page = query.order_by(Dimension.display_name, Attribute.order_num, Attribute.id).limit(page_size).all()
+        if not page:
+            return
+        yield page
+        if page_size is None or len(page) < page_size:
+            return
+        last = page[-1]
+        last_key = (last.dimension.display_name, last.order_num, last.id)
+
+def catalog_report():
+    """
+    Build the full catalog report in two queries: per-dimension counts and the
+    joined attribute list. Returns [{'dimension', 'count', 'attributes'}].
+    """
+    report = {}
+    for dimension, count in catalog_counts():
+        report[dimension.id] = {'dimension': dimension, 'count': count, 'attributes': []}
+    for page in iter_attribute_pages(page_size=None):
+        for attr in page:
+            report[attr.dimension_id]['attributes'].append(attr)
+    return list(report.values())
+
 def list_attributes():
     """List all attributes for a selected dimension"""
-    dimensions = session.query(Dimension).order_by(Dimension.display_name).all()
+    counts = catalog_counts()
+    dimensions = [dimension for dimension, _ in counts]
     
     if not dimensions:
         print("No dimensions found in the database.")
@@ -378,8 +430,7 @@ def list_attributes():
     try:
         if choice == 'all':
             # Show count of attributes for each dimension
-            for dimension in dimensions:
-                attr_count = session.query(Attribute).filter_by(dimension_id=dimension.id).count()
+            for dimension, attr_count in counts:
                 print(f"{dimension.display_name}: {attr_count} attributes")
             
             # Ask if user wants to see all attributes
@@ -387,15 +438,18 @@ def list_attributes():
             if show_all != 'y':
                 return
             
-            attributes = session.query(Attribute).join(Dimension).order_by(Dimension.display_name, Attribute.order_num).all()
-            
             print("\nAll attributes in the database:")
             print("-" * 100)
             print(f"{'Dimension':<30} {'Attribute ID':<20} {'Display Name':<40} {'Type':<10}")
             print("-" * 100)
             
-            for attr in attributes:
-                print(f"{attr.dimension.display_name:<30} {attr.attribute_id:<20} {attr.display_name:<40} {attr.data_type:<10}")
+            for page in iter_attribute_pages():
+                for attr in page:
+                    print(f"{attr.dimension.display_name:<30} {attr.attribute_id:<20} {attr.display_name:<40} {attr.data_type:<10}")
+                if len(page) == ATTRIBUTE_PAGE_SIZE:
+                    more = input(f"-- Showing {ATTRIBUTE_PAGE_SIZE} more? (y/n): ").lower()
+                    if more != 'y':
+                        break
             
         elif choice.isdigit() and 1 <= int(choice) <= len(dimensions):
             dimension = dimensions[int(choice) - 1]
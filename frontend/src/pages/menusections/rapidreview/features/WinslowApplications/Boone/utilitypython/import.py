@@ -1,10 +1,11 @@
 import os
 import json
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey
 
+from db_pool import get_engine
+
 # Database connection parameters - hard-coded for simplicity
 PG_USER = "postgres"  # Change to your username
 PG_PASSWORD = "Raiven7.!!"      # Change to your password
@@ -12,13 +13,10 @@ PG_HOST = "localhost"
 PG_PORT = "5432"
 PG_DATABASE = "hawkeye_db"  # Make sure this matches your actual database name
 
-# Create connection string
-connection_string = f"postgresql://{PG_USER}:{PG_PASSWORD}@{PG_HOST}:{PG_PORT}/{PG_DATABASE}"
 print(f"Connecting to database: {PG_DATABASE}")
-print(f"Connection string: {connection_string}")
 
-# Create SQLAlchemy engine to connect to your existing database
-engine = create_engine(connection_string)
+# Borrow the shared pooled engine for your existing database
+engine = get_engine(PG_DATABASE, user=PG_USER, password=PG_PASSWORD, host=PG_HOST, port=PG_PORT)
 
 # Test the connection before proceeding
 try:
@@ -0,0 +1,184 @@
+"""
+Incremental, brace-balanced JSON scanning for LLM responses.
+
+Claude answers attribute requests with {"dimension_id": [{attribute}, ...]},
+often wrapped in a markdown fence or followed by prose. AttributeStreamScanner
+is fed the response text as it streams in and hands back each attribute
+object as soon as its closing brace arrives, already validated, so callers
+can use attributes before the response finishes:
+
+    scanner = AttributeStreamScanner()
+    for text in stream.text_stream:
+        for dimension_id, attribute in scanner.feed(text):
+            ...
+    result = scanner.result()          # {dimension_id: [attributes]}
+    scanner.errors                     # attributes that failed validation
+"""
+
+import re
+import json
+
+VALID_DATA_TYPES = ['text', 'number', 'date', 'boolean', 'string']
+
+ATTRIBUTE_ID_PATTERN = re.compile(r"^[a-z][a-z0-9_]*$")
+
+def validate_attribute(attr):
+    """
+    Check one attribute object against the attribute schema.
+    Returns (normalized_attribute, errors); the attribute is None when invalid.
+    """
+    if not isinstance(attr, dict):
+        return None, ["attribute is not an object"]
+
+    errors = []
+    attribute_id = attr.get("attribute_id")
+    if not isinstance(attribute_id, str) or not ATTRIBUTE_ID_PATTERN.match(attribute_id):
+        errors.append(f"attribute_id must be snake_case, got {attribute_id!r}")
+    display_name = attr.get("display_name")
+    if not isinstance(display_name, str) or not display_name.strip():
+        errors.append("display_name is required")
+    data_type = str(attr.get("data_type", "text")).lower()
+    if data_type not in VALID_DATA_TYPES:
+        errors.append(f"data_type must be one of {VALID_DATA_TYPES}, got {attr.get('data_type')!r}")
+    required = attr.get("required", False)
+    if not isinstance(required, bool):
+        errors.append(f"required must be true or false, got {required!r}")
+    max_length = attr.get("max_length")
+    if max_length is not None and (not isinstance(max_length, int) or isinstance(max_length, bool) or max_length <= 0):
+        errors.append(f"max_length must be a positive integer, got {max_length!r}")
+    order_num = attr.get("order_num")
+    if not isinstance(order_num, int) or isinstance(order_num, bool):
+        errors.append(f"order_num must be an integer, got {order_num!r}")
+
+    if errors:
+        return None, errors
+    return {
+        "attribute_id": attribute_id,
+        "display_name": display_name.strip(),
+        "data_type": data_type,
+        "required": required,
+        "max_length": max_length,
+        "order_num": order_num
+    }, []
+
+class BraceScanner:
+    """
+    Track JSON nesting over streamed text, ignoring braces inside strings.
+    Text before the first '{' and after the outermost object closes is skipped.
+    """
+
+    def __init__(self):
+        self.stack = []
+        self.in_string = False
+        self.escaped = False
+        self.done = False
+        self.started = False
+
+    def step(self, char):
+        """
+        Advance over one character. Returns 'open' or 'close' when a
+        container starts or ends outside a string, otherwise None.
+        """
+        if self.done:
+            return None
+        if self.in_string:
+            if self.escaped:
+                self.escaped = False
+            elif char == "\\":
+                self.escaped = True
+            elif char == '"':
+                self.in_string = False
+                return "string_end"
+            return None
+        if not self.started:
+            if char != "{":
+                return None
+            self.started = True
+        if char == '"':
+            self.in_string = True
+            return "string_start"
+        if char in "{[":
+            self.stack.append(char)
+            return "open"
+        if char in "}]":
+            if self.stack:
+                self.stack.pop()
+            if not self.stack:
+                self.done = True
+            return "close"
+        return None
+
+def extract_first_object(text):
+    """Return the first brace-balanced {...} in text, or None."""
+    scanner = BraceScanner()
+    start = None
+    for position, char in enumerate(text):
+        event = scanner.step(char)
+        if event == "open" and start is None:
+            start = position
+        if scanner.done:
+            return text[start:position + 1]
+    return None
+
+class AttributeStreamScanner:
+    """Emit validated attribute objects from a streamed {dimension_id: [attributes]} response."""
+
+    def __init__(self):
+        self.scanner = BraceScanner()
+        self.attributes = {}
+        self.errors = []
+        self.current_key = None
+        self._string = []
+        self._object = None
+
+    def feed(self, text):
+        """Consume a chunk of response text; returns [(dimension_id, attribute)] completed in it."""
+        completed = []
+        scanner = self.scanner
+        for char in text:
+            if scanner.done:
+                break
+            depth = len(scanner.stack)
+            event = scanner.step(char)
+
+            if self._object is not None:
+                self._object.append(char)
+            elif scanner.in_string and event is None and depth == 1:
+                self._string.append(char)
+
+            if event == "string_start" and depth == 1 and self._object is None:
+                self._string = []
+            elif event == "string_end" and depth == 1 and self._object is None:
+                # At depth 1 the only strings are the dimension_id keys
+                self.current_key = "".join(self._string)
+            elif event == "open" and depth == 2 and char == "{":
+                self._object = [char]
+            elif event == "close" and depth == 3 and self._object is not None:
+                attribute = self._finish_object("".join(self._object))
+                self._object = None
+                if attribute is not None:
+                    completed.append((self.current_key, attribute))
+        return completed
+
+    def _finish_object(self, raw):
+        """Parse and validate one complete attribute object."""
+        try:
+            attr = json.loads(raw)
+        except json.JSONDecodeError as e:
+            self.errors.append({"dimension_id": self.current_key, "raw": raw, "errors": [str(e)]})
+            return None
+        attribute, errors = validate_attribute(attr)
+        if errors:
+            self.errors.append({"dimension_id": self.current_key, "raw": attr, "errors": errors})
+            return None
+        self.attributes.setdefault(self.current_key, []).append(attribute)
+        return attribute
+
+    @property
+    def complete(self):
+        """True once the outermost object has closed."""
+        return self.scanner.done
+
+    def result(self):
+        """The validated attributes received so far, {dimension_id: [attributes]}."""
+        return {key: list(values) for key, values in self.attributes.items()}
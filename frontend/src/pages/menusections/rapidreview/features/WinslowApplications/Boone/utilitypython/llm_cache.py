@@ -0,0 +1,120 @@
+"""
+Content-addressed on-disk cache for parsed LLM responses.
+
+Entries are keyed by a hash of everything that determines the response
+(model, sampling settings, prompt template version, inputs), so a rerun with
+the same document and dimension is answered from disk instead of the API.
+The cache is bounded in size; the least recently used entries are evicted
+first (reads refresh an entry's mtime).
+
+    cache = ResponseCache(".attribute_cache", max_bytes=50 * 1024 * 1024)
+    key = cache_key(model="...", temperature=0.2, prompt_version=1, document=digest(text))
+    result = cache.get(key)
+    if result is None:
+        result = call_the_api()
+        cache.put(key, result)
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+import threading
+
+def digest(text):
+    """SHA-256 of a string, used to key large inputs such as documents."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def cache_key(**parts):
+    """Stable key for a set of named inputs."""
+    return digest(json.dumps(parts, sort_keys=True, default=str))
+
+class ResponseCache:
+    """Size-bounded LRU cache of JSON values stored one file per key."""
+
+    def __init__(self, directory, max_bytes=50 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key):
+        """Return the cached value for key, or None."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            return None
+        try:
+            # Mark as recently used for eviction
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+    def put(self, key, value):
+        """
+        Store a JSON-serialisable value, then evict old entries if over the size limit.
+        Caching is best-effort: if the entry cannot be written (unwritable or full
+        cache directory) a warning is printed and False is returned.
+        """
+        path = self._path(key)
+        temp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temp file and rename so readers never see a partial entry
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Warning: could not write cache entry: {e}")
+            if temp_path and os.path.exists(temp_path):
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+            return False
+        except Exception:
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self.evict()
+        return True
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        with self._lock:
+            entries = []
+            total = 0
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    if not name.endswith(".json"):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+                    total += stat.st_size
+
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    if name.endswith(".json"):
+                        os.remove(os.path.join(root, name))
@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+Versioned schema migrations for the {prefix}dimensions / {prefix}attributes tables.
+
+Replaces the one-off updatecolumns / updatequint / updatethree / updatetabletwo
+scripts. Each migration is applied once and recorded in schema_migrations:
+1. All DDL for a table is merged into a single ALTER TABLE statement and the
+   whole migration's DDL runs in one transaction under a short lock_timeout
+2. New columns get their value through ADD COLUMN ... DEFAULT, which is a
+   metadata-only change, instead of a full-table UPDATE
+3. CHECK constraints are added NOT VALID and validated after the backfill, so
+   the validation scan doesn't block writers
+4. Backfills of existing columns run in keyset-paginated chunks by id, each
+   in its own short transaction, so no long ACCESS EXCLUSIVE lock is held
+
+Every step is idempotent, so a run interrupted during a backfill can simply be
+started again.
+
+Usage:
+    python migrate.py                    # apply all pending migrations
+    python migrate.py --list             # show applied/pending migrations
+    python migrate.py --target 0002      # apply up to and including 0002
+    python migrate.py --dry-run          # show what would run
+"""
+
+import os
+import argparse
+from psycopg2 import sql
+
+from db_pool import get_connection
+
+PG_DATABASE = "hawkeye_db"
+
+HISTORY_TABLE = "schema_migrations"
+
+# Rows updated per backfill transaction
+MIGRATION_BATCH_SIZE = int(os.getenv("MIGRATION_BATCH_SIZE", "1000"))
+# Give up on DDL instead of queueing behind long-running reads
+MIGRATION_LOCK_TIMEOUT = os.getenv("MIGRATION_LOCK_TIMEOUT", "5s")
+# Serialises concurrent runners (arbitrary constant)
+MIGRATION_ADVISORY_LOCK = 7_402_113
+
+PROGRAM_TABLE_SUFFIXES = ("dimensions", "attributes")
+
+AVAILABILITY_VALUES = ["All", "Pending", "Customer Only", "Parked"]
+HAWKEYEVIEW_VALUES = ["on", "off"]
+
+ORDER_NUM_FUNCTION = """
+CREATE OR REPLACE FUNCTION set_default_order() RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.order_num IS NULL THEN
+        NEW.order_num := NEW.id;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+PROGRAM_TYPE_FUNCTION = """
+CREATE OR REPLACE FUNCTION set_default_program_type() RETURNS TRIGGER AS $$
+DECLARE
+    table_prefix text;
+BEGIN
+    -- Extract prefix from table name
+    IF TG_TABLE_NAME LIKE '%dimensions' THEN
+        table_prefix := substring(TG_TABLE_NAME from 1 for position('dimensions' in TG_TABLE_NAME) - 1);
+    ELSE
+        table_prefix := 'unknown';
+    END IF;
+
+    IF NEW.program_type IS NULL THEN
+        -- Map table prefix to program_type
+        IF table_prefix = 'acquisition' THEN
+            NEW.program_type := 'M&A';
+        ELSIF table_prefix = 'saas' THEN
+            NEW.program_type := 'SAAS';
+        ELSE
+            NEW.program_type := upper(table_prefix);
+        END IF;
+    END IF;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+def program_type_for_table(table_name):
+    """Map a dimensions table name onto its program_type (same rule as the trigger)."""
+    prefix = table_name[:-len("dimensions")]
+    if prefix == "acquisition":
+        return "M&A"
+    if prefix == "saas":
+        return "SAAS"
+    return prefix.upper()
+
+# Step ops:
+#   add_columns  ADD COLUMN IF NOT EXISTS for each column (constant defaults are metadata-only)
+#   enum_column  restrict a column to a value set; new columns take `existing` for current
+#                rows via the ADD COLUMN default, existing columns are backfilled in chunks
+#   trigger      (re)create a BEFORE INSERT trigger
+#   backfill     chunked UPDATE of rows matching `where`
+MIGRATIONS = [
+    {
+        "version": "0001",
+        "description": "Add origin, status and customer_id columns (was updatecolumns.py)",
+        "statements": [],
+        "steps": [
+            {"op": "add_columns", "suffixes": PROGRAM_TABLE_SUFFIXES, "columns": [
+                {"name": "origin", "type": "VARCHAR(50)", "default": "core"},
+                {"name": "status", "type": "VARCHAR(50)", "default": "approved"},
+                {"name": "customer_id", "type": "VARCHAR(100)", "default": None},
+            ]},
+        ]
+    },
+    {
+        "version": "0002",
+        "description": "Default order_num/program_type triggers and backfill (was updatequint.py)",
+        "statements": [ORDER_NUM_FUNCTION, PROGRAM_TYPE_FUNCTION],
+        "steps": [
+            {"op": "trigger", "suffixes": PROGRAM_TABLE_SUFFIXES,
+             "name": "set_order_num_trigger", "function": "set_default_order"},
+            {"op": "trigger", "suffixes": ("dimensions",), "requires_column": "program_type",
+             "name": "set_program_type_trigger", "function": "set_default_program_type"},
+            {"op": "backfill", "suffixes": PROGRAM_TABLE_SUFFIXES,
+             "column": "order_num", "value_column": "id", "where": "order_num IS NULL"},
+            {"op": "backfill", "suffixes": ("dimensions",), "requires_column": "program_type",
+             "column": "program_type", "value": program_type_for_table, "where": "program_type IS NULL"},
+        ]
+    },
+    {
+        "version": "0003",
+        "description": "availability/hawkeyeview value sets and defaults (was updatethree.py / updatetabletwo.py)",
+        "statements": [],
+        "steps": [
+            {"op": "enum_column", "suffixes": PROGRAM_TABLE_SUFFIXES, "column": "availability",
+             "type": "VARCHAR(50)", "existing": "All", "default": "Pending", "allowed": AVAILABILITY_VALUES},
+            {"op": "enum_column", "suffixes": PROGRAM_TABLE_SUFFIXES, "column": "hawkeyeview",
+             "type": "VARCHAR(10)", "existing": "on", "default": "off", "allowed": HAWKEYEVIEW_VALUES},
+        ]
+    },
+]
+
+def get_tables_by_suffix(conn, suffix):
+    """Get the ordinary tables with the specified suffix (partitions and partitioned parents are skipped)."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT c.relname
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = 'public'
+            AND c.relkind = 'r'
+            AND NOT c.relispartition
+            AND c.relname LIKE %s
+            ORDER BY c.relname
+        """, [f'%{suffix}'])
+        return [row[0] for row in cur.fetchall()]
+
+def get_columns(conn, table_name):
+    """Return the column names of a table."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT column_name
+            FROM information_schema.columns
+            WHERE table_schema = 'public' AND table_name = %s
+        """, [table_name])
+        return {row[0] for row in cur.fetchall()}
+
+def get_check_constraints(conn, table_name, column_name):
+    """Return the names of CHECK constraints that reference a column."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT con.conname
+            FROM pg_constraint con
+            JOIN pg_attribute att ON att.attrelid = con.conrelid AND att.attnum = ANY(con.conkey)
+            WHERE con.conrelid = %s::regclass
+            AND con.contype = 'c'
+            AND att.attname = %s
+        """, [table_name, column_name])
+        return [row[0] for row in cur.fetchall()]
+
+def ensure_history_table(conn):
+    """Create the migration history table if it doesn't exist."""
+    with conn.cursor() as cur:
+        cur.execute(sql.SQL("""
+            CREATE TABLE IF NOT EXISTS {} (
+                version VARCHAR(20) PRIMARY KEY,
+                description TEXT NOT NULL,
+                applied_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+            )
+        """).format(sql.Identifier(HISTORY_TABLE)))
+
+def get_applied_versions(conn):
+    """Return {version: applied_at} for every recorded migration."""
+    with conn.cursor() as cur:
+        cur.execute(sql.SQL("SELECT version, applied_at FROM {}").format(sql.Identifier(HISTORY_TABLE)))
+        return dict(cur.fetchall())
+
+def step_tables(conn, step, table_cache):
+    """Tables a step applies to, honouring requires_column."""
+    tables = []
+    for suffix in step["suffixes"]:
+        if suffix not in table_cache:
+            table_cache[suffix] = get_tables_by_suffix(conn, suffix)
+        tables.extend(table_cache[suffix])
+    if step.get("requires_column"):
+        tables = [table for table in tables if step["requires_column"] in get_columns(conn, table)]
+    return tables
+
+def plan_step(conn, step, table, plan):
+    """Add one step's ALTER clauses, statements, backfills and validations for a table to the plan."""
+    table_plan = plan.setdefault(table, {"clauses": [], "statements": [], "backfills": [], "validate": []})
+    columns = get_columns(conn, table)
+    op = step["op"]
+
+    if op == "add_columns":
+        for column in step["columns"]:
+            clause = sql.SQL("ADD COLUMN IF NOT EXISTS {} {}").format(
+                sql.Identifier(column["name"]), sql.SQL(column["type"]))
+            if column["default"] is not None:
+                clause = sql.SQL("{} DEFAULT {}").format(clause, sql.Literal(column["default"]))
+            table_plan["clauses"].append(clause)
+
+    elif op == "enum_column":
+        column = step["column"]
+        constraint = f"{table}_{column}_values"
+        if column in columns:
+            for existing in get_check_constraints(conn, table, column):
+                table_plan["clauses"].append(sql.SQL("DROP CONSTRAINT {}").format(sql.Identifier(existing)))
+            table_plan["backfills"].append({
+                "column": column,
+                "value": sql.Literal(step["existing"]),
+                "where": sql.SQL("{} IS DISTINCT FROM {}").format(sql.Identifier(column), sql.Literal(step["existing"]))
+            })
+        else:
+            # Existing rows read the ADD COLUMN default without a table rewrite
+            table_plan["clauses"].append(sql.SQL("ADD COLUMN {} {} DEFAULT {}").format(
+                sql.Identifier(column), sql.SQL(step["type"]), sql.Literal(step["existing"])))
+        table_plan["clauses"].append(sql.SQL("ALTER COLUMN {} SET DEFAULT {}").format(
+            sql.Identifier(column), sql.Literal(step["default"])))
+        table_plan["clauses"].append(sql.SQL("ADD CONSTRAINT {} CHECK ({} IN ({})) NOT VALID").format(
+            sql.Identifier(constraint), sql.Identifier(column),
+            sql.SQL(", ").join(map(sql.Literal, step["allowed"]))))
+        table_plan["validate"].append(constraint)
+
+    elif op == "trigger":
+        table_plan["statements"].append(sql.SQL("DROP TRIGGER IF EXISTS {} ON {}").format(
+            sql.Identifier(step["name"]), sql.Identifier(table)))
+        table_plan["statements"].append(sql.SQL(
+            "CREATE TRIGGER {} BEFORE INSERT ON {} FOR EACH ROW EXECUTE PROCEDURE {}()"
+        ).format(sql.Identifier(step["name"]), sql.Identifier(table), sql.Identifier(step["function"])))
+
+    elif op == "backfill":
+        if "value_column" in step:
+            value = sql.Identifier(step["value_column"])
+        elif callable(step["value"]):
+            value = sql.Literal(step["value"](table))
+        else:
+            value = sql.Literal(step["value"])
+        table_plan["backfills"].append({"column": step["column"], "value": value, "where": sql.SQL(step["where"])})
+
+    else:
+        raise ValueError(f"Unknown migration op: {op}")
+
+def plan_migration(conn, migration):
+    """Resolve a migration's steps against the current schema, per table."""
+    plan = {}
+    table_cache = {}
+    for step in migration["steps"]:
+        for table in step_tables(conn, step, table_cache):
+            plan_step(conn, step, table, plan)
+    return plan
+
+def backfill_column(conn, table, column, value, where, batch_size=MIGRATION_BATCH_SIZE):
+    """
+    UPDATE matching rows in keyset-paginated id ranges, committing after each
+    range so row locks are held only briefly. Returns the number of rows updated.
+    """
+    updated = 0
+    last_id = 0
+    while True:
+        with conn.cursor() as cur:
+            cur.execute(sql.SQL("""
+                SELECT max(id) FROM (
+                    SELECT id FROM {table} WHERE id > %s ORDER BY id LIMIT %s
+                ) chunk
+            """).format(table=sql.Identifier(table)), [last_id, batch_size])
+            upper_id = cur.fetchone()[0]
+            if upper_id is None:
+                break
+
+            cur.execute(sql.SQL("""
+                UPDATE {table} SET {column} = {value}
+                WHERE id > %s AND id <= %s AND ({where})
+            """).format(
+                table=sql.Identifier(table),
+                column=sql.Identifier(column),
+                value=value,
+                where=where
+            ), [last_id, upper_id])
+            updated += cur.rowcount
+        conn.commit()
+        last_id = upper_id
+    return updated
+
+def apply_migration(conn, migration):
+    """Apply one migration: DDL in one transaction, chunked backfills, then validation and history."""
+    plan = plan_migration(conn, migration)
+
+    with conn.cursor() as cur:
+        cur.execute("SELECT set_config('lock_timeout', %s, true)", [MIGRATION_LOCK_TIMEOUT])
+        for statement in migration["statements"]:
+            cur.execute(statement)
+        for table, table_plan in plan.items():
+            if table_plan["clauses"]:
+                cur.execute(sql.SQL("ALTER TABLE {} {}").format(
+                    sql.Identifier(table), sql.SQL(", ").join(table_plan["clauses"])))
+                print(f"  {table}: {len(table_plan['clauses'])} changes in one ALTER TABLE")
+            for statement in table_plan["statements"]:
+                cur.execute(statement)
+    conn.commit()
+
+    for table, table_plan in plan.items():
+        for backfill in table_plan["backfills"]:
+            rows = backfill_column(conn, table, backfill["column"], backfill["value"], backfill["where"])
+            print(f"  {table}: backfilled {rows} rows of {backfill['column']}")
+
+    with conn.cursor() as cur:
+        for table, table_plan in plan.items():
+            for constraint in table_plan["validate"]:
+                cur.execute(sql.SQL("ALTER TABLE {} VALIDATE CONSTRAINT {}").format(
+                    sql.Identifier(table), sql.Identifier(constraint)))
+        cur.execute(sql.SQL("INSERT INTO {} (version, description) VALUES (%s, %s)").format(
+            sql.Identifier(HISTORY_TABLE)), [migration["version"], migration["description"]])
+    conn.commit()
+
+def run_migrations(conn, target=None, dry_run=False):
+    """
+    Apply every pending migration up to target (inclusive), in version order.
+    Returns the list of versions applied (or that would be applied on a dry run).
+    """
+    ensure_history_table(conn)
+    conn.commit()
+
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_advisory_lock(%s)", [MIGRATION_ADVISORY_LOCK])
+    try:
+        applied = get_applied_versions(conn)
+        conn.commit()
+        pending = [
+            migration for migration in sorted(MIGRATIONS, key=lambda m: m["version"])
+            if migration["version"] not in applied and (target is None or migration["version"] <= target)
+        ]
+
+        if not pending:
+            print("Database is up to date.")
+            return []
+
+        for migration in pending:
+            print(f"\n{migration['version']}: {migration['description']}")
+            if dry_run:
+                for table, table_plan in plan_migration(conn, migration).items():
+                    print(f"  {table}: {len(table_plan['clauses'])} ALTER clauses, "
+                          f"{len(table_plan['statements'])} statements, {len(table_plan['backfills'])} backfills")
+                conn.rollback()
+                continue
+            try:
+                apply_migration(conn, migration)
+                print(f"Applied {migration['version']}.")
+            except Exception as e:
+                conn.rollback()
+                print(f"Error applying {migration['version']}: {e}")
+                print("Re-run once the cause is fixed; completed steps are skipped or repeated safely.")
+                raise
+        return [migration["version"] for migration in pending]
+    finally:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_unlock(%s)", [MIGRATION_ADVISORY_LOCK])
+        conn.commit()
+
+def list_migrations(conn):
+    """Print every known migration and whether it has been applied."""
+    ensure_history_table(conn)
+    applied = get_applied_versions(conn)
+    conn.commit()
+    for migration in sorted(MIGRATIONS, key=lambda m: m["version"]):
+        applied_at = applied.get(migration["version"])
+        status = f"applied {applied_at:%Y-%m-%d %H:%M}" if applied_at else "pending"
+        print(f"{migration['version']}  {status:<22} {migration['description']}")
+
+def main():
+    """Main function to apply or list schema migrations."""
+    parser = argparse.ArgumentParser(description="Apply versioned schema migrations")
+    parser.add_argument("--database", default=PG_DATABASE, help=f"Database name (default: {PG_DATABASE})")
+    parser.add_argument("--target", help="Apply migrations up to and including this version")
+    parser.add_argument("--list", action="store_true", help="List migrations and their status")
+    parser.add_argument("--dry-run", action="store_true", help="Show the planned changes without applying them")
+    args = parser.parse_args()
+
+    print("=" * 50)
+    print("SCHEMA MIGRATIONS")
+    print("=" * 50)
+
+    conn = get_connection(args.database)
+    try:
+        if args.list:
+            list_migrations(conn)
+        else:
+            run_migrations(conn, args.target, args.dry_run)
+    except Exception as e:
+        print(f"Error: {e}")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Partitioned, program-keyed storage for dimensions and attributes.
+
+Instead of one {prefix}dimensions / {prefix}attributes pair per program
+(see tablesetup.create_model_classes), every program lives in a single
+program_dimensions / program_attributes pair that is LIST-partitioned by
+program. Cross-program reads become one indexed scan, and schema changes
+are applied once to the parent instead of once per table.
+
+The partition key is the program key (the old table prefix, e.g.
+'acquisition', 'saas'; the unprefixed dimensions/attributes tables map to
+'base'). program_type stays an ordinary column because it is free text
+chosen at import time and is not unique per program.
+
+Usage:
+    python partitioned_schema.py --setup                      # create parents only
+    python partitioned_schema.py --migrate                    # copy every prefixed table pair
+    python partitioned_schema.py --migrate acquisition saas   # copy selected programs
+"""
+
+import re
+import argparse
+from psycopg2 import sql
+
+from db_pool import get_connection
+
+PG_DATABASE = "hawkeye_db"
+
+PARTITIONED_DIMENSIONS = "program_dimensions"
+PARTITIONED_ATTRIBUTES = "program_attributes"
+
+# Program key used for the unprefixed dimensions/attributes tables
+BASE_PROGRAM = "base"
+
+DIMENSION_COLUMNS = [
+    "id", "dimension_id", "display_name", "description", "is_core", "program_type",
+    "order_num", "created_at", "origin", "status", "customer_id", "availability", "hawkeyeview"
+]
+ATTRIBUTE_COLUMNS = [
+    "id", "dimension_id", "attribute_id", "display_name", "data_type", "required", "max_length",
+    "order_num", "is_core", "created_at", "origin", "status", "customer_id", "availability", "hawkeyeview"
+]
+
+def program_key(prefix):
+    """Map a table prefix onto the program key used as the partition value."""
+    key = (prefix or "").lower() or BASE_PROGRAM
+    if not re.fullmatch(r"[a-z0-9_]+", key):
+        raise ValueError(f"Invalid program key: {key!r}")
+    return key
+
+def create_partitioned_tables(conn):
+    """Create the partitioned parent tables if they don't exist."""
+    with conn.cursor() as cur:
+        cur.execute(sql.SQL("""
+            CREATE TABLE IF NOT EXISTS {dimensions} (
+                id INTEGER GENERATED BY DEFAULT AS IDENTITY,
+                program VARCHAR(50) NOT NULL,
+                dimension_id VARCHAR(50) NOT NULL,
+                display_name VARCHAR(100) NOT NULL,
+                description TEXT,
+                is_core BOOLEAN NOT NULL DEFAULT FALSE,
+                program_type VARCHAR(50) NOT NULL,
+                order_num INTEGER NOT NULL,
+                created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+                origin VARCHAR(50) DEFAULT 'core',
+                status VARCHAR(50) DEFAULT 'approved',
+                customer_id VARCHAR(100),
+                availability VARCHAR(50) DEFAULT 'Pending'
+                    CHECK (availability IN ('All', 'Pending', 'Customer Only', 'Parked')),
+                hawkeyeview VARCHAR(10) DEFAULT 'off'
+                    CHECK (hawkeyeview IN ('on', 'off')),
+                PRIMARY KEY (program, id),
+                UNIQUE (program, dimension_id)
+            ) PARTITION BY LIST (program)
+        """).format(dimensions=sql.Identifier(PARTITIONED_DIMENSIONS)))
+
+        cur.execute(sql.SQL("""
+            CREATE TABLE IF NOT EXISTS {attributes} (
+                id INTEGER GENERATED BY DEFAULT AS IDENTITY,
+                program VARCHAR(50) NOT NULL,
+                dimension_id INTEGER NOT NULL,
+                attribute_id VARCHAR(50) NOT NULL,
+                display_name VARCHAR(200) NOT NULL,
+                data_type VARCHAR(20) NOT NULL
+                    CHECK (data_type IN ('text', 'number', 'date', 'boolean', 'string')),
+                required BOOLEAN NOT NULL DEFAULT FALSE,
+                max_length INTEGER,
+                order_num INTEGER NOT NULL,
+                is_core BOOLEAN NOT NULL DEFAULT FALSE,
+                created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+                origin VARCHAR(50) DEFAULT 'core',
+                status VARCHAR(50) DEFAULT 'approved',
+                customer_id VARCHAR(100),
+                availability VARCHAR(50) DEFAULT 'Pending'
+                    CHECK (availability IN ('All', 'Pending', 'Customer Only', 'Parked')),
+                hawkeyeview VARCHAR(10) DEFAULT 'off'
+                    CHECK (hawkeyeview IN ('on', 'off')),
+                PRIMARY KEY (program, id),
+                UNIQUE (program, dimension_id, attribute_id),
+                FOREIGN KEY (program, dimension_id)
+                    REFERENCES {dimensions} (program, id) ON DELETE CASCADE
+            ) PARTITION BY LIST (program)
+        """).format(
+            attributes=sql.Identifier(PARTITIONED_ATTRIBUTES),
+            dimensions=sql.Identifier(PARTITIONED_DIMENSIONS)
+        ))
+
+def ensure_program_partition(conn, program):
+    """Create the dimension and attribute partitions for a program if missing."""
+    program = program_key(program)
+    with conn.cursor() as cur:
+        for parent in (PARTITIONED_DIMENSIONS, PARTITIONED_ATTRIBUTES):
+            cur.execute(sql.SQL("""
+                CREATE TABLE IF NOT EXISTS {partition}
+                PARTITION OF {parent} FOR VALUES IN ({program})
+            """).format(
+                partition=sql.Identifier(f"{parent}_{program}"),
+                parent=sql.Identifier(parent),
+                program=sql.Literal(program)
+            ))
+    return program
+
+def get_table_columns(conn, table_name):
+    """Return the column names of a table in the public schema."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT column_name
+            FROM information_schema.columns
+            WHERE table_schema = 'public' AND table_name = %s
+        """, [table_name])
+        return {row[0] for row in cur.fetchall()}
+
+def discover_programs(conn):
+    """Find every prefix that has both a {prefix}dimensions and a {prefix}attributes table."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT table_name
+            FROM information_schema.tables
+            WHERE table_schema = 'public'
+            AND table_type = 'BASE TABLE'
+            AND (table_name LIKE '%dimensions' OR table_name LIKE '%attributes')
+        """)
+        tables = {row[0] for row in cur.fetchall()}
+
+    prefixes = []
+    for table in sorted(tables):
+        if not table.endswith("dimensions"):
+            continue
+        prefix = table[:-len("dimensions")]
+        if f"{prefix}attributes" in tables and not prefix.startswith("program_"):
+            prefixes.append(prefix)
+    return prefixes
+
+def copy_table(cur, source, target, columns, program):
+    """INSERT ... SELECT the shared columns of a legacy table into the partitioned parent."""
+    column_list = sql.SQL(", ").join(map(sql.Identifier, columns))
+    cur.execute(sql.SQL("""
+        INSERT INTO {target} (program, {columns})
+        SELECT {program}, {columns} FROM {source}
+    """).format(
+        target=sql.Identifier(target),
+        source=sql.Identifier(source),
+        columns=column_list,
+        program=sql.Literal(program)
+    ))
+    return cur.rowcount
+
+def migrate_program(conn, prefix):
+    """
+    Copy one {prefix}dimensions / {prefix}attributes pair into its partition.
+    Original ids are kept, so attribute FKs need no remapping. Re-running
+    replaces the program's partition contents. The caller commits.
+    """
+    program = ensure_program_partition(conn, prefix)
+    dimension_source = f"{prefix}dimensions"
+    attribute_source = f"{prefix}attributes"
+
+    dimension_columns = [c for c in DIMENSION_COLUMNS if c in get_table_columns(conn, dimension_source)]
+    attribute_columns = [c for c in ATTRIBUTE_COLUMNS if c in get_table_columns(conn, attribute_source)]
+
+    with conn.cursor() as cur:
+        # Attributes cascade from dimensions, so one delete clears the program
+        cur.execute(sql.SQL("DELETE FROM {} WHERE program = %s").format(
+            sql.Identifier(PARTITIONED_DIMENSIONS)), [program])
+
+        dimensions_copied = copy_table(cur, dimension_source, PARTITIONED_DIMENSIONS, dimension_columns, program)
+        attributes_copied = copy_table(cur, attribute_source, PARTITIONED_ATTRIBUTES, attribute_columns, program)
+
+    return program, dimensions_copied, attributes_copied
+
+def sync_identity_sequences(conn):
+    """Move the identity sequences past every migrated id so new rows don't collide."""
+    with conn.cursor() as cur:
+        for table in (PARTITIONED_DIMENSIONS, PARTITIONED_ATTRIBUTES):
+            cur.execute(sql.SQL("""
+                SELECT setval(pg_get_serial_sequence(%s, 'id'), GREATEST(COALESCE(MAX(id), 0), 1))
+                FROM {table}
+            """).format(table=sql.Identifier(table)), [table])
+
+def main():
+    """Main function to set up the partitioned tables and migrate programs into them."""
+    parser = argparse.ArgumentParser(description="Partitioned program-keyed dimension/attribute storage")
+    parser.add_argument("programs", nargs="*", help="Table prefixes to migrate (default: all discovered)")
+    parser.add_argument("--database", default=PG_DATABASE, help=f"Database name (default: {PG_DATABASE})")
+    parser.add_argument("--setup", action="store_true", help="Only create the partitioned parent tables")
+    parser.add_argument("--migrate", action="store_true", help="Copy prefixed tables into the partitions")
+    args = parser.parse_args()
+
+    print("=" * 50)
+    print("PARTITIONED PROGRAM SCHEMA")
+    print("=" * 50)
+
+    conn = get_connection(args.database)
+    try:
+        create_partitioned_tables(conn)
+        conn.commit()
+        print(f"Partitioned tables {PARTITIONED_DIMENSIONS} / {PARTITIONED_ATTRIBUTES} are ready.")
+
+        if args.setup or not args.migrate:
+            return
+
+        prefixes = args.programs or discover_programs(conn)
+        if not prefixes:
+            print("No prefixed dimension/attribute tables found.")
+            return
+
+        # One transaction per program so a failure leaves the others migrated
+        for prefix in prefixes:
+            try:
+                program, dimensions_copied, attributes_copied = migrate_program(conn, prefix)
+                sync_identity_sequences(conn)
+                conn.commit()
+                print(f"Migrated '{prefix or '(unprefixed)'}' -> program '{program}': "
+                      f"{dimensions_copied} dimensions, {attributes_copied} attributes")
+            except Exception as e:
+                conn.rollback()
+                print(f"Error migrating '{prefix}': {e}")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
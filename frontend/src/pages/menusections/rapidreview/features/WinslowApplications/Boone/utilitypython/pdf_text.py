@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Page-parallel PDF text extraction with cached plaintext sidecars.
+
+The first time a PDF is read its pages are extracted in a process pool and
+streamed back in page order. While streaming, each page is zlib-compressed
+into a sidecar file keyed by the PDF's SHA-256, with a JSON index of page
+offsets next to it. Later reads of the same file (from any script) memory-map
+the sidecar and decompress pages on demand instead of re-parsing the PDF.
+
+    for page_text in iter_document_pages("checklist.pdf"):
+        ...
+    text = read_document_text("checklist.pdf")
+
+Usage:
+    python pdf_text.py checklist.pdf [more.pdf ...]     # extract and cache
+    python pdf_text.py checklist.pdf --refresh          # re-extract
+"""
+
+import os
+import sys
+import json
+import mmap
+import time
+import zlib
+import hashlib
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+PDF_TEXT_CACHE_DIR = os.getenv(
+    "PDF_TEXT_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".pdf_text_cache")
+)
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Pages handed to a worker at once; each task re-opens the PDF, so not too small
+PAGES_PER_TASK = 8
+
+# Bump if the sidecar layout or extraction changes
+SIDECAR_VERSION = 1
+
+def file_digest(path):
+    """SHA-256 of a file, read in 1 MB blocks."""
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+def count_pages(path):
+    """Number of pages in a PDF."""
+    import PyPDF2
+    return len(PyPDF2.PdfReader(path).pages)
+
+def extract_page_range(path, start, stop):
+    """Extract the text of pages [start, stop); runs in a worker process."""
+    import PyPDF2
+    reader = PyPDF2.PdfReader(path)
+    return [reader.pages[number].extract_text() or "" for number in range(start, stop)]
+
+def extract_pages(path, workers=PDF_WORKERS):
+    """Yield the text of every page in order, extracting page ranges in parallel."""
+    page_count = count_pages(path)
+    ranges = [(start, min(start + PAGES_PER_TASK, page_count)) for start in range(0, page_count, PAGES_PER_TASK)]
+
+    if workers <= 1 or len(ranges) <= 1:
+        for start, stop in ranges:
+            yield from extract_page_range(path, start, stop)
+        return
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = [executor.submit(extract_page_range, path, start, stop) for start, stop in ranges]
+        # Results are consumed in submission order, so pages stream out in order
+        # while later ranges are still being extracted
+        for future in futures:
+            yield from future.result()
+    finally:
+        # Don't keep extracting if the consumer stopped early
+        executor.shutdown(wait=True, cancel_futures=True)
+
+def sidecar_paths(digest, cache_dir=PDF_TEXT_CACHE_DIR):
+    """Return (data_path, index_path) for a file digest."""
+    base = os.path.join(cache_dir, digest[:2], digest)
+    return f"{base}.pages", f"{base}.json"
+
+class PageSidecar:
+    """Memory-mapped view of a sidecar; pages are decompressed on access."""
+
+    def __init__(self, data_path, index):
+        self.index = index
+        self.offsets = index["offsets"]
+        self._file = open(data_path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def page(self, number):
+        """Text of one page (0-based)."""
+        start, end = self.offsets[number]
+        return zlib.decompress(self._map[start:end]).decode("utf-8")
+
+    def __iter__(self):
+        for number in range(len(self)):
+            yield self.page(number)
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+def open_sidecar(digest, cache_dir=PDF_TEXT_CACHE_DIR):
+    """Open the sidecar for a digest, or return None if it is missing or stale."""
+    data_path, index_path = sidecar_paths(digest, cache_dir)
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if index.get("version") != SIDECAR_VERSION or not os.path.exists(data_path):
+        return None
+    return PageSidecar(data_path, index)
+
+def write_sidecar(digest, pages, source, cache_dir=PDF_TEXT_CACHE_DIR):
+    """
+    Pass pages through while compressing them into a new sidecar.
+    The sidecar only becomes visible once every page has been written.
+    """
+    data_path, index_path = sidecar_paths(digest, cache_dir)
+    os.makedirs(os.path.dirname(data_path), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(data_path), suffix=".tmp")
+    offsets = []
+    characters = 0
+    completed = False
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for text in pages:
+                block = zlib.compress(text.encode("utf-8"), 6)
+                start = f.tell()
+                f.write(block)
+                offsets.append([start, start + len(block)])
+                characters += len(text)
+                yield text
+        os.replace(temp_path, data_path)
+        index = {
+            "version": SIDECAR_VERSION,
+            "source": os.path.basename(source),
+            "pages": len(offsets),
+            "characters": characters,
+            "offsets": offsets
+        }
+        fd, temp_index = tempfile.mkstemp(dir=os.path.dirname(index_path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(temp_index, index_path)
+        completed = True
+    finally:
+        # A consumer that stops early leaves no partial sidecar behind
+        if not completed and os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def iter_document_pages(path, refresh=False, workers=PDF_WORKERS, cache_dir=PDF_TEXT_CACHE_DIR):
+    """Yield a PDF's page texts from its sidecar, extracting (and caching) them on a miss."""
+    digest = file_digest(path)
+    sidecar = None if refresh else open_sidecar(digest, cache_dir)
+    if sidecar is not None:
+        try:
+            yield from sidecar
+        finally:
+            sidecar.close()
+        return
+    yield from write_sidecar(digest, extract_pages(path, workers), path, cache_dir)
+
+def read_document_text(path, refresh=False):
+    """Full text of a PDF, pages separated by blank lines."""
+    return "".join(page + "\n\n" for page in iter_document_pages(path, refresh))
+
+def main():
+    """Main function to extract and cache PDF text."""
+    parser = argparse.ArgumentParser(description="Extract PDF text into cached sidecars")
+    parser.add_argument("files", nargs="+", help="PDF files to extract")
+    parser.add_argument("--refresh", action="store_true", help="Re-extract even if a sidecar exists")
+    parser.add_argument("--workers", type=int, default=PDF_WORKERS, help=f"Worker processes (default: {PDF_WORKERS})")
+    args = parser.parse_args()
+
+    for path in args.files:
+        if not os.path.exists(path):
+            print(f"Error: File '{path}' does not exist.")
+            continue
+        started = time.perf_counter()
+        try:
+            pages = 0
+            characters = 0
+            for text in iter_document_pages(path, args.refresh, args.workers):
+                pages += 1
+                characters += len(text)
+        except ImportError:
+            print("PyPDF2 not installed. Please install with 'pip install PyPDF2' for PDF support.")
+            sys.exit(1)
+        except Exception as e:
+            print(f"Error extracting {path}: {e}")
+            continue
+        print(f"{os.path.basename(path)}: {pages} pages, {characters} characters "
+              f"in {time.perf_counter() - started:.2f}s")
+
+if __name__ == "__main__":
+    main()
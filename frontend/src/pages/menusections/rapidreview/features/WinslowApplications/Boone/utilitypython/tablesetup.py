@@ -1,20 +1,10 @@
 import os
 import json
-from dotenv import load_dotenv
-from sqlalchemy import create_engine, Column, Integer, String, Text, Boolean, DateTime, ForeignKey, CheckConstraint, Index, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, CheckConstraint, Index, UniqueConstraint
 from sqlalchemy.orm import declarative_base, sessionmaker, relationship
 from sqlalchemy.sql import func
-import psycopg2
-from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
 
-# Load environment variables
-load_dotenv()
-
-# Database connection parameters
-PG_USER = os.getenv("PG_USER", "postgres")
-PG_PASSWORD = os.getenv("PG_PASSWORD", "")
-PG_HOST = os.getenv("PG_HOST", "localhost")
-PG_PORT = os.getenv("PG_PORT", "5432")
+from db_pool import get_engine, admin_connection
 
 # SQLAlchemy setup
 Base = declarative_base()
@@ -22,14 +12,7 @@ Base = declarative_base()
 def list_and_select_database():
     """List existing databases and let user select one."""
     # Connect to default postgres database
-    conn = psycopg2.connect(
-        user=PG_USER,
-        password=PG_PASSWORD,
-        host=PG_HOST,
-        port=PG_PORT,
-        dbname="postgres"
-    )
-    conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+    conn = admin_connection("postgres")
     
     cursor = conn.cursor()
     
@@ -488,8 +471,8 @@ def main():
         print("Database selection failed. Exiting.")
         return
     
-    # Create database engine
-    engine = create_engine(f"postgresql://{PG_USER}:{PG_PASSWORD}@{PG_HOST}:{PG_PORT}/{db_name}")
+    # Borrow the shared pooled engine
+    engine = get_engine(db_name)
     
     # Database connection test
     try:
@@ -1,32 +1,14 @@
-import os
-import psycopg2
-from dotenv import load_dotenv
 from psycopg2.extras import DictCursor
 
-# Load environment variables
-load_dotenv()
+from db_pool import get_connection, execute_prepared
 
-# Database connection parameters from environment variables with defaults
-PG_USER = os.getenv("PG_USER", "postgres")
-PG_PASSWORD = os.getenv("PG_PASSWORD", "")
-PG_HOST = os.getenv("PG_HOST", "localhost")
-PG_PORT = os.getenv("PG_PORT", "5432")
 PG_DATABASE = "hawkeye_db"
 
-# Create connection string
-connection_string = f"postgresql://{PG_USER}:{PG_PASSWORD}@{PG_HOST}:{PG_PORT}/{PG_DATABASE}"
 print(f"Connecting to database: {PG_DATABASE}")
 
 def get_db_connection():
-    """Create and return a database connection."""
-    conn = psycopg2.connect(
-        user=PG_USER,
-        password=PG_PASSWORD,
-        host=PG_HOST,
-        port=PG_PORT,
-        dbname=PG_DATABASE
-    )
-    return conn
+    """Borrow a pooled database connection; close() hands it back to the pool."""
+    return get_connection(PG_DATABASE)
 
 def check_related_parties_dimension():
     """Check if the Related Parties dimension already exists in the database."""
@@ -301,9 +283,10 @@ def check_attribute_exists(dimension_id, attribute_id):
     conn = get_db_connection()
     cursor = conn.cursor()
     
-    cursor.execute("""
+    # Called once per candidate attribute, so reuse a server-side plan
+    execute_prepared(conn, cursor, "check_attribute_exists", """
     SELECT id FROM attributes 
-    WHERE dimension_id = %s AND attribute_id = %s
+    WHERE dimension_id = $1 AND attribute_id = $2
     """, (dimension_id, attribute_id))
     
     exists = cursor.fetchone()
@@ -1,34 +1,58 @@
 import os
 import json
+import time
+import random
+import asyncio
+import argparse
 import anthropic
-import psycopg2
-from psycopg2.extras import DictCursor
+from psycopg2.extras import DictCursor, execute_values
 from dotenv import load_dotenv
-import re
 
 # Load environment variables
 load_dotenv()
 
-# Database connection parameters
-PG_USER = os.getenv("PG_USER", "postgres")
-PG_PASSWORD = os.getenv("PG_PASSWORD", "")
-PG_HOST = os.getenv("PG_HOST", "localhost")
-PG_PORT = os.getenv("PG_PORT", "5432")
+from db_pool import get_connection
+from llm_cache import ResponseCache, cache_key, digest
+from document_index import DocumentIndex
+from pdf_text import read_document_text
+from json_stream import AttributeStreamScanner
+from catalog_cache import notify_catalog_changed
+
+# Database name
 PG_DATABASE = "hawkeye_db"
 
 # Anthropic API key
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
 
+CLAUDE_MODEL = "claude-3-7-sonnet-20250219"
+
+# Batch generation settings
+ATTRIBUTE_CONCURRENCY = int(os.getenv("ATTRIBUTE_CONCURRENCY", "5"))
+ATTRIBUTE_REQUESTS_PER_MINUTE = int(os.getenv("ATTRIBUTE_REQUESTS_PER_MINUTE", "50"))
+ATTRIBUTE_MAX_RETRIES = int(os.getenv("ATTRIBUTE_MAX_RETRIES", "5"))
+# 429 = rate limited, 529 = overloaded
+RETRYABLE_STATUS_CODES = {429, 529}
+
+# Bump when build_attribute_prompt changes so cached answers to the old prompt are ignored
+PROMPT_VERSION = 2
+CLAUDE_TEMPERATURE = 0.2
+CLAUDE_MAX_TOKENS = 4000
+
+# Stream responses and use each attribute as soon as its JSON object closes
+ATTRIBUTE_STREAMING = os.getenv("ATTRIBUTE_STREAMING", "1").lower() not in ("0", "false", "no")
+
+# Parsed responses are cached on disk so reruns don't re-send the document
+ATTRIBUTE_CACHE_DIR = os.getenv("ATTRIBUTE_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".attribute_cache"))
+ATTRIBUTE_CACHE_MAX_MB = int(os.getenv("ATTRIBUTE_CACHE_MAX_MB", "50"))
+response_cache = ResponseCache(ATTRIBUTE_CACHE_DIR, ATTRIBUTE_CACHE_MAX_MB * 1024 * 1024)
+
+# Document excerpt sent per dimension: the best-matching sections up to this size
+ATTRIBUTE_CONTEXT_CHARS = int(os.getenv("ATTRIBUTE_CONTEXT_CHARS", "20000"))
+ATTRIBUTE_TOP_K = int(os.getenv("ATTRIBUTE_TOP_K", "20"))
+
 def get_db_connection():
-    """Create and return a database connection."""
-    conn = psycopg2.connect(
-        user=PG_USER,
-        password=PG_PASSWORD,
-        host=PG_HOST,
-        port=PG_PORT,
-        dbname=PG_DATABASE
-    )
-    return conn
+    """Borrow a pooled database connection; close() hands it back to the pool."""
+    return get_connection(PG_DATABASE)
 
 def find_dimensions_without_attributes():
     """Find dimensions that don't have any attributes in the attributes table."""
@@ -68,20 +92,14 @@ def find_dimensions_without_attributes():
 def read_file_content(file_path):
     """
     Read the content of a document.
-    Handles both text and basic PDF files.
+    Handles both text and basic PDF files (see pdf_text.py for PDF caching).
     """
     try:
         # Simple extension check to determine file type
         if file_path.lower().endswith('.pdf'):
             try:
-                # Try to use PyPDF2 if available
-                import PyPDF2
-                with open(file_path, 'rb') as file:
-                    reader = PyPDF2.PdfReader(file)
-                    content = ""
-                    for page_num in range(len(reader.pages)):
-                        content += reader.pages[page_num].extract_text() + "\n\n"
-                    return content
+                # Pages are extracted in parallel once, then read from the cached sidecar
+                return read_document_text(file_path)
             except ImportError:
                 print("PyPDF2 not installed. Please install with 'pip install PyPDF2' for PDF support.")
                 return None
@@ -101,29 +119,6 @@ def read_file_content(file_path):
         print(f"Error reading file: {e}")
         return None
 
-def extract_json_from_text(text):
-    """Extract JSON from text, handling markdown code blocks."""
-    # Check if the text is wrapped in markdown code blocks
-    if text.startswith("```") and "```" in text[3:]:
-        # Find the end of the opening code block marker
-        start_pos = text.find("\n", 3) + 1
-        # Find the start of the closing code block marker
-        end_pos = text.rfind("```")
-        
-        # Extract what's inside the code blocks
-        extracted = text[start_pos:end_pos].strip()
-        return extracted
-    
-    # If it's not wrapped in code blocks, try to find JSON directly
-    # This is a simple approach: find outermost matching braces
-    json_pattern = re.compile(r'\{.*\}', re.DOTALL)
-    match = json_pattern.search(text)
-    if match:
-        return match.group(0)
-    
-    # If all else fails, return the original text
-    return text
-
 def list_all_dimensions():
     """List all dimensions in the database with their attribute counts."""
     conn = get_db_connection()
@@ -144,31 +139,25 @@ def list_all_dimensions():
     
     return dimensions
 
-def query_claude_for_attributes(dimension, document_content):
-    """
-    Query Claude API to suggest attributes for a single dimension
-    based on the content of the document.
-    """
-    if not ANTHROPIC_API_KEY:
-        print("Error: ANTHROPIC_API_KEY not set in environment variables")
-        return None
-    
-    try:
-        client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
-        
-        # Create a shorter version of the content if it's too long
-        # Claude has token limits, so we need to be careful
-        max_content_length = 50000  # Roughly 12,500 tokens
-        if len(document_content) > max_content_length:
-            document_content = document_content[:max_content_length] + "...\n[Document truncated due to length]"
-        
-        # Prepare the prompt for Claude
-        prompt = f"""
+def select_dimension_content(document_index, dimension):
+    """Pick the document sections most relevant to a dimension."""
+    query = f"{dimension['display_name']} {dimension['dimension_id']}"
+    return document_index.select(query, ATTRIBUTE_CONTEXT_CHARS, ATTRIBUTE_TOP_K)
+
+def build_attribute_prompt(dimension, document_content):
+    """Build the attribute-suggestion prompt for one dimension."""
+    # Create a shorter version of the content if it's too long
+    # Claude has token limits, so we need to be careful
+    max_content_length = 50000  # Roughly 12,500 tokens
+    if len(document_content) > max_content_length:
+        document_content = document_content[:max_content_length] + "...\n[Document truncated due to length]"
+    
+    prompt = f"""
 I have a PostgreSQL database for M&A due diligence with dimensions and attributes.
 
 The dimension "{dimension['display_name']}" (ID: {dimension['dimension_id']}) currently has no attributes.
 
-I have a document containing standard M&A due diligence checklists. Here's the content:
+I have a document containing standard M&A due diligence checklists. Here are the sections most relevant to this dimension:
 
 {document_content}
 
@@ -205,84 +194,296 @@ Format your response as a JSON object where the key is the dimension_id and the
 
 Return ONLY the JSON object, no other text.
 """
+    return prompt
+
+def attribute_cache_key(dimension, document_content):
+    """Cache key covering everything that determines Claude's answer for a dimension."""
+    return cache_key(
+        model=CLAUDE_MODEL,
+        temperature=CLAUDE_TEMPERATURE,
+        max_tokens=CLAUDE_MAX_TOKENS,
+        prompt_version=PROMPT_VERSION,
+        dimension_id=dimension['dimension_id'],
+        display_name=dimension['display_name'],
+        document=digest(document_content)
+    )
+
+def finish_attribute_scan(scanner, content=None, stop_reason=None):
+    """
+    Report what an AttributeStreamScanner collected.
+    Returns (result, complete): result is None when no valid attribute was found,
+    complete is False when the response ended before its JSON closed.
+    """
+    for invalid in scanner.errors:
+        print(f"Skipping invalid attribute in {invalid['dimension_id']}: {'; '.join(invalid['errors'])}")
+    
+    result = scanner.result() or None
+    if not scanner.complete:
+        reason = f" ({stop_reason})" if stop_reason else ""
+        count = sum(len(attributes) for attributes in (result or {}).values())
+        print(f"Warning: response ended before the JSON was complete{reason}; keeping {count} attributes received.")
+    if result is None:
+        print("Error parsing JSON: no valid attribute objects found in the response.")
+        if content is not None:
+            print("Raw response:", content)
+    return result, scanner.complete
+
+def parse_attribute_response(content):
+    """Parse Claude's reply into the {dimension_id: [attributes]} dict, or None."""
+    # The scanner skips markdown fences and trailing prose around the JSON
+    scanner = AttributeStreamScanner()
+    scanner.feed(content)
+    result, _ = finish_attribute_scan(scanner, content)
+    return result
+
+def stream_attribute_response(client, prompt):
+    """Stream Claude's reply, printing each attribute as it arrives. Returns (result, complete)."""
+    scanner = AttributeStreamScanner()
+    with client.messages.stream(
+        model=CLAUDE_MODEL,
+        max_tokens=CLAUDE_MAX_TOKENS,
+        temperature=CLAUDE_TEMPERATURE,
+        messages=[
+            {"role": "user", "content": prompt}
+        ]
+    ) as stream:
+        for text in stream.text_stream:
+            for dimension_id, attribute in scanner.feed(text):
+                print(f"  + {dimension_id}.{attribute['attribute_id']} ({attribute['data_type']})")
+        stop_reason = stream.get_final_message().stop_reason
+    return finish_attribute_scan(scanner, stop_reason=stop_reason)
+
+async def stream_attribute_response_async(client, prompt):
+    """Async version of stream_attribute_response for batch mode. Returns (result, complete)."""
+    scanner = AttributeStreamScanner()
+    async with client.messages.stream(
+        model=CLAUDE_MODEL,
+        max_tokens=CLAUDE_MAX_TOKENS,
+        temperature=CLAUDE_TEMPERATURE,
+        messages=[
+            {"role": "user", "content": prompt}
+        ]
+    ) as stream:
+        async for text in stream.text_stream:
+            scanner.feed(text)
+        stop_reason = (await stream.get_final_message()).stop_reason
+    return finish_attribute_scan(scanner, stop_reason=stop_reason)
+
+def query_claude_for_attributes(dimension, document_content, refresh=False):
+    """
+    Query Claude API to suggest attributes for a single dimension
+    based on the content of the document. Cached results are reused
+    unless refresh is set.
+    """
+    key = attribute_cache_key(dimension, document_content)
+    if not refresh:
+        cached = response_cache.get(key)
+        if cached is not None:
+            print("Using cached attribute suggestions (run with --refresh to query Claude again).")
+            return cached
+    
+    if not ANTHROPIC_API_KEY:
+        print("Error: ANTHROPIC_API_KEY not set in environment variables")
+        return None
+    
+    try:
+        client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
+        prompt = build_attribute_prompt(dimension, document_content)
         
         # Call the Anthropic API
         print("Querying Claude for attribute suggestions...")
-        response = client.messages.create(
-            model="claude-3-7-sonnet-20250219",
-            max_tokens=4000,
-            temperature=0.2,  # Lower temperature for more precise/predictable responses
-            messages=[
-                {"role": "user", "content": prompt}
-            ]
-        )
-        
-        # Extract the content from the response
-        content = response.content[0].text
-        
-        # Clean up the JSON content by extracting it from markdown or other wrapping
-        print("Processing Claude's response...")
-        json_content = extract_json_from_text(content)
+        if ATTRIBUTE_STREAMING:
+            result, complete = stream_attribute_response(client, prompt)
+        else:
+            response = client.messages.create(
+                model=CLAUDE_MODEL,
+                max_tokens=CLAUDE_MAX_TOKENS,
+                temperature=CLAUDE_TEMPERATURE,  # Lower temperature for more precise/predictable responses
+                messages=[
+                    {"role": "user", "content": prompt}
+                ]
+            )
+            
+            # Extract the content from the response
+            print("Processing Claude's response...")
+            result = parse_attribute_response(response.content[0].text)
+            complete = True
         
-        # Try to parse the JSON
-        try:
-            result = json.loads(json_content)
+        if result is not None:
             print("Successfully parsed JSON response from Claude.")
-            return result
-        except json.JSONDecodeError as e:
-            print(f"Error parsing JSON: {e}")
-            print("Raw response:", content)
-            print("\nExtracted JSON content:", json_content)
-            return None
+            # Partial (truncated) answers are returned but not cached
+            if complete:
+                response_cache.put(key, result)
+        return result
             
     except Exception as e:
         print(f"Error querying Claude API: {e}")
         return None
 
+class TokenBucket:
+    """Async token bucket: allows `rate` requests per `per` seconds with bursts up to `capacity`."""
+    
+    def __init__(self, rate, per=60.0, capacity=None):
+        self.rate = rate / per
+        self.capacity = capacity or max(1, rate // 10)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+    
+    async def acquire(self):
+        """Wait until a token is available and take it."""
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+def retry_delay(error, attempt):
+    """Seconds to wait before retrying: the server's retry-after if given, else exponential backoff with jitter."""
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    return min(60, 2 ** attempt) + random.uniform(0, 1)
+
+async def query_claude_for_attributes_async(client, dimension, document_content, semaphore, bucket,
+                                            max_retries=ATTRIBUTE_MAX_RETRIES, refresh=False):
+    """
+    Async version of query_claude_for_attributes for batch mode.
+    Returns (result, error_message); retries rate-limit/overload responses with backoff.
+    """
+    key = attribute_cache_key(dimension, document_content)
+    if not refresh:
+        cached = response_cache.get(key)
+        if cached is not None:
+            return cached, None
+    
+    prompt = build_attribute_prompt(dimension, document_content)
+    
+    for attempt in range(max_retries + 1):
+        await bucket.acquire()
+        try:
+            async with semaphore:
+                if ATTRIBUTE_STREAMING:
+                    result, complete = await stream_attribute_response_async(client, prompt)
+                else:
+                    response = await client.messages.create(
+                        model=CLAUDE_MODEL,
+                        max_tokens=CLAUDE_MAX_TOKENS,
+                        temperature=CLAUDE_TEMPERATURE,
+                        messages=[
+                            {"role": "user", "content": prompt}
+                        ]
+                    )
+                    result = parse_attribute_response(response.content[0].text)
+                    complete = True
+        except (anthropic.APIStatusError, anthropic.APIConnectionError) as e:
+            status = getattr(e, "status_code", None)
+            retryable = status in RETRYABLE_STATUS_CODES or isinstance(e, anthropic.APIConnectionError)
+            if not retryable or attempt == max_retries:
+                return None, f"{type(e).__name__}: {e}"
+            delay = retry_delay(e, attempt)
+            print(f"  {dimension['dimension_id']}: {status or 'connection error'}, retrying in {delay:.1f}s "
+                  f"(attempt {attempt + 1}/{max_retries})")
+            await asyncio.sleep(delay)
+            continue
+        
+        if result is None:
+            return None, "Response contained no valid attributes"
+        if complete:
+            response_cache.put(key, result)
+        return result, None
+    
+    return None, "Retries exhausted"
+
+async def generate_attributes_batch(dimensions, document_content, concurrency=ATTRIBUTE_CONCURRENCY,
+                                    requests_per_minute=ATTRIBUTE_REQUESTS_PER_MINUTE, client=None, refresh=False):
+    """
+    Generate attributes for every dimension concurrently. The document is indexed
+    once and each dimension gets only its most relevant sections.
+    Returns ({dimension_id: [attributes]}, {dimension_id: error_message}).
+    """
+    document_index = DocumentIndex(document_content)
+    if client is None:
+        # Retries are handled here so they respect the shared rate limit
+        client = anthropic.AsyncAnthropic(api_key=ANTHROPIC_API_KEY, max_retries=0)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    bucket = TokenBucket(requests_per_minute)
+    started = time.monotonic()
+    
+    async def run(dimension):
+        dimension_started = time.monotonic()
+        try:
+            result, error = await query_claude_for_attributes_async(
+                client, dimension, select_dimension_content(document_index, dimension),
+                semaphore, bucket, refresh=refresh
+            )
+        except Exception as e:
+            # Any other failure is reported for this dimension rather than ending the batch
+            result, error = None, f"{type(e).__name__}: {e}"
+        return dimension, result, error, time.monotonic() - dimension_started
+    
+    generated = {}
+    failed = {}
+    tasks = [asyncio.create_task(run(dimension)) for dimension in dimensions]
+    for done, task in enumerate(asyncio.as_completed(tasks), 1):
+        dimension, result, error, seconds = await task
+        if result:
+            attributes = result.get(dimension['dimension_id'])
+            if attributes is None and len(result) == 1:
+                # Tolerate a reply keyed by something other than the dimension_id
+                attributes = next(iter(result.values()))
+            generated[dimension['dimension_id']] = attributes or []
+            print(f"[{done}/{len(tasks)}] {dimension['display_name']}: "
+                  f"{len(attributes or [])} attributes ({seconds:.1f}s)")
+        else:
+            failed[dimension['dimension_id']] = error
+            print(f"[{done}/{len(tasks)}] {dimension['display_name']}: FAILED - {error}")
+    
+    print(f"Generated attributes for {len(generated)} of {len(tasks)} dimensions "
+          f"in {time.monotonic() - started:.1f}s")
+    return generated, failed
+
 def add_attributes_to_database(attributes_json):
-    """Add the suggested attributes to the database."""
+    """
+    Add the suggested attributes to the database in one multi-row INSERT.
+    Attributes that already exist are skipped via ON CONFLICT DO NOTHING.
+    Returns {'inserted': {dimension_id: [...]}, 'skipped': {dimension_id: [...]}, 'missing_dimensions': [...]}.
+    """
     if not attributes_json:
         print("No valid attributes to add.")
-        return
+        return None
     
     conn = get_db_connection()
     cursor = conn.cursor()
     
     try:
-        total_attributes_added = 0
+        # One lookup for every dimension in the payload
+        cursor.execute(
+            "SELECT dimension_id, id FROM saasdimensions WHERE dimension_id = ANY(%s)",
+            (list(attributes_json.keys()),)
+        )
+        dimension_ids = dict(cursor.fetchall())
+        dimension_keys = {db_id: dimension_id for dimension_id, db_id in dimension_ids.items()}
         
-        # Process each dimension's attributes
+        missing_dimensions = [dimension_id for dimension_id in attributes_json if dimension_id not in dimension_ids]
+        for dimension_id in missing_dimensions:
+            print(f"Error: Dimension {dimension_id} not found in database.")
+        
+        rows = []
         for dimension_id, attributes in attributes_json.items():
-            # Get the database ID for this dimension
-            cursor.execute("SELECT id FROM saasdimensions WHERE dimension_id = %s", (dimension_id,))
-            result = cursor.fetchone()
-            
-            if not result:
-                print(f"Error: Dimension {dimension_id} not found in database.")
+            if dimension_id not in dimension_ids:
                 continue
-                
-            db_dimension_id = result[0]
-            attributes_added = 0
-            
-            # Add each attribute
             for attr in attributes:
-                # Check if attribute already exists
-                cursor.execute(
-                    "SELECT id FROM saasattributes WHERE dimension_id = %s AND attribute_id = %s",
-                    (db_dimension_id, attr['attribute_id'])
-                )
-                
-                if cursor.fetchone():
-                    print(f"Attribute {attr['attribute_id']} already exists for {dimension_id}, skipping...")
-                    continue
-                
-                # Insert the new attribute
-                cursor.execute("""
-                INSERT INTO saasattributes 
-                (dimension_id, attribute_id, display_name, data_type, required, max_length, order_num, is_core)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    db_dimension_id,
+                rows.append((
+                    dimension_ids[dimension_id],
                     attr['attribute_id'],
                     attr['display_name'],
                     attr['data_type'],
@@ -291,25 +492,99 @@ def add_attributes_to_database(attributes_json):
                     attr['order_num'],
                     True  # is_core
                 ))
-                
-                attributes_added += 1
-            
-            total_attributes_added += attributes_added
-            print(f"Added {attributes_added} attributes to {dimension_id}")
         
+        inserted_rows = []
+        if rows:
+            # page_size covers every row, so this is a single round trip
+            inserted_rows = execute_values(cursor, """
+                INSERT INTO saasattributes
+                (dimension_id, attribute_id, display_name, data_type, required, max_length, order_num, is_core)
+                VALUES %s
+                ON CONFLICT (dimension_id, attribute_id) DO NOTHING
+                RETURNING dimension_id, attribute_id
+            """, rows, page_size=len(rows), fetch=True)
+        
+        inserted_keys = set(inserted_rows)
+        inserted = {}
+        skipped = {}
+        for row in rows:
+            dimension_id = dimension_keys[row[0]]
+            target = inserted if (row[0], row[1]) in inserted_keys else skipped
+            target.setdefault(dimension_id, []).append(row[1])
+        
+        for dimension_id in attributes_json:
+            if dimension_id in dimension_ids:
+                added = len(inserted.get(dimension_id, []))
+                existing = skipped.get(dimension_id, [])
+                print(f"Added {added} attributes to {dimension_id}")
+                if existing:
+                    print(f"  Skipped {len(existing)} that already exist: {', '.join(existing)}")
+        
+        total_attributes_added = len(inserted_rows)
+        if total_attributes_added:
+            notify_catalog_changed(cursor, "saas")
         conn.commit()
         print(f"Successfully added {total_attributes_added} attributes to the database.")
+        return {'inserted': inserted, 'skipped': skipped, 'missing_dimensions': missing_dimensions}
         
     except Exception as e:
         conn.rollback()
         print(f"Error adding attributes to database: {e}")
+        return None
     
     finally:
         cursor.close()
         conn.close()
 
+def run_batch_generation(dimensions, refresh=False):
+    """Generate, save and store attributes for several dimensions in one concurrent run."""
+    if not ANTHROPIC_API_KEY:
+        print("Error: ANTHROPIC_API_KEY not set in environment variables")
+        return
+    
+    file_path = input("\nEnter the path to your due diligence document (PDF/TXT): ")
+    if not os.path.exists(file_path):
+        print(f"Error: File '{file_path}' does not exist.")
+        return
+    
+    print(f"Reading file: {file_path}")
+    content = read_file_content(file_path)
+    if not content:
+        print("Failed to read file content. Please check the file format and try again.")
+        return
+    
+    print(f"Successfully read {len(content)} characters from the file.")
+    print(f"\nAsking Claude for attributes for {len(dimensions)} dimensions "
+          f"({ATTRIBUTE_CONCURRENCY} at a time, {ATTRIBUTE_REQUESTS_PER_MINUTE} requests/minute)...")
+    generated, failed = asyncio.run(generate_attributes_batch(dimensions, content, refresh=refresh))
+    
+    if failed:
+        print("\nDimensions that failed (re-run to retry them):")
+        for dimension_id, error in failed.items():
+            print(f"  {dimension_id}: {error}")
+    
+    if not generated:
+        print("Failed to generate attributes.")
+        return
+    
+    save_choice = input("\nWould you like to save the suggestions to JSON files? (y/n): ")
+    if save_choice.lower() == 'y':
+        for dimension_id, attributes in generated.items():
+            output_file = f"{dimension_id}_attributes.json"
+            with open(output_file, 'w') as f:
+                f.write(json.dumps({dimension_id: attributes}, indent=2))
+            print(f"Saved to {output_file}")
+    
+    add_choice = input(f"\nWould you like to add attributes for {len(generated)} dimensions to the database? (y/n): ")
+    if add_choice.lower() == 'y':
+        add_attributes_to_database(generated)
+
 def main():
     """Main function to run the script."""
+    parser = argparse.ArgumentParser(description="Generate attributes for dimensions that have none")
+    parser.add_argument("--refresh", action="store_true", help="Ignore cached Claude responses and query again")
+    args = parser.parse_args()
+    
     print("Welcome to the Attribute Generator")
     print("="*50)
     
@@ -332,6 +607,13 @@ def main():
     for i, dim in enumerate(dimensions_without_attributes, 1):
         print(f"{i}. {dim['display_name']} (ID: {dim['dimension_id']})")
     
+    # Batch mode: generate every orphaned dimension concurrently
+    batch_choice = input(f"\nGenerate attributes for all {len(dimensions_without_attributes)} dimensions "
+                         f"concurrently? (y/n): ")
+    if batch_choice.lower() == 'y':
+        run_batch_generation(dimensions_without_attributes, refresh=args.refresh)
+        return
+    
     # Step 3: Let user select one dimension
     while True:
         try:
@@ -364,7 +646,10 @@ def main():
     
     # Step 6: Query Claude for attribute suggestions
     print(f"\nAsking Claude to suggest attributes for {selected_dimension['display_name']}...")
-    attributes_json = query_claude_for_attributes(selected_dimension, content)
+    excerpt = select_dimension_content(DocumentIndex(content), selected_dimension)
+    if len(excerpt) < len(content):
+        print(f"Sending the {len(excerpt)} most relevant characters of {len(content)}.")
+    attributes_json = query_claude_for_attributes(selected_dimension, excerpt, refresh=args.refresh)
     
     if not attributes_json:
         print("Failed to generate attributes.")
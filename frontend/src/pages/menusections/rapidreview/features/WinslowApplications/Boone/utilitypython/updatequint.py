@@ -1,11 +1,13 @@
 #!/usr/bin/env python3
-import psycopg2
 import psycopg2.extras
 import re
 
+from db_pool import get_connection
+from migrate import run_migrations
+
 # Database connection parameters - replace with your values
 DB_PARAMS = {
-    "dbname": "hawkeye_db",
+    "database": "hawkeye_db",
     "user": "postgres",
     "password": "Raiven7.!!",
     "host": "localhost",
@@ -15,24 +17,12 @@ DB_PARAMS = {
 def connect_to_db():
     """Connect to the PostgreSQL database"""
     try:
-        conn = psycopg2.connect(**DB_PARAMS)
-        conn.autocommit = False  # We'll handle transactions manually
-        return conn
+        # Pooled connections are never autocommit; we handle transactions manually
+        return get_connection(**DB_PARAMS)
     except Exception as e:
         print(f"Database connection error: {e}")
         raise
 
-def get_tables_by_suffix(conn, suffix):
-    """Get all tables with the specified suffix"""
-    with conn.cursor() as cur:
-        cur.execute("""
-            SELECT table_name 
-            FROM information_schema.tables 
-            WHERE table_name LIKE %s 
-            AND table_schema = 'public'
-        """, [f'%{suffix}'])
-        return [row[0] for row in cur.fetchall()]
-
 def check_column_exists(conn, table_name, column_name):
     """Check if a column exists in a table"""
     with conn.cursor() as cur:
@@ -44,80 +34,6 @@ def check_column_exists(conn, table_name, column_name):
         """, [table_name, column_name])
         return cur.fetchone() is not None
 
-def create_order_num_trigger_function(conn):
-    """Create the function for setting default order_num"""
-    print("Creating function to set default order_num...")
-    with conn.cursor() as cur:
-        cur.execute("""
-        CREATE OR REPLACE FUNCTION set_default_order() RETURNS TRIGGER AS $$
-        BEGIN
-            IF NEW.order_num IS NULL THEN
-                NEW.order_num := NEW.id;
-            END IF;
-            RETURN NEW;
-        END;
-        $$ LANGUAGE plpgsql;
-        """)
-    print("Function created successfully.")
-
-def create_program_type_trigger_function(conn):
-    """Create the function for setting default program_type (only for dimension tables)"""
-    print("Creating function to set default program_type...")
-    with conn.cursor() as cur:
-        cur.execute("""
-        CREATE OR REPLACE FUNCTION set_default_program_type() RETURNS TRIGGER AS $$
-        DECLARE
-            table_prefix text;
-        BEGIN
-            -- Extract prefix from table name
-            IF TG_TABLE_NAME LIKE '%dimensions' THEN
-                table_prefix := substring(TG_TABLE_NAME from 1 for position('dimensions' in TG_TABLE_NAME) - 1);
-            ELSE
-                table_prefix := 'unknown';
-            END IF;
-            
-            -- Only set program_type if it exists and is NULL
-            -- Check if column exists in the NEW record (it will for dimensions tables)
-            IF NEW.program_type IS NULL THEN
-                -- Map table prefix to program_type
-                IF table_prefix = 'acquisition' THEN
-                    NEW.program_type := 'M&A';
-                ELSIF table_prefix = 'saas' THEN
-                    NEW.program_type := 'SAAS';
-                ELSE
-                    -- Just use the prefix as-is for other types
-                    NEW.program_type := upper(table_prefix);
-                END IF;
-            END IF;
-            
-            RETURN NEW;
-        END;
-        $$ LANGUAGE plpgsql;
-        """)
-    print("Function created successfully.")
-
-def create_trigger(conn, table_name, trigger_name, function_name):
-    """Create a trigger on a table if the relevant column exists"""
-    # For program_type trigger, only create it if the table has that column
-    if function_name == "set_default_program_type" and not check_column_exists(conn, table_name, "program_type"):
-        print(f"Skipping {trigger_name} on {table_name} as program_type column doesn't exist.")
-        return
-    
-    print(f"Creating {trigger_name} trigger on {table_name}...")
-    with conn.cursor() as cur:
-        # Drop the trigger if it already exists
-        cur.execute(f"""
-        DROP TRIGGER IF EXISTS {trigger_name} ON {table_name};
-        """)
-        
-        # Create the new trigger
-        cur.execute(f"""
-        CREATE TRIGGER {trigger_name}
-        BEFORE INSERT ON {table_name}
-        FOR EACH ROW EXECUTE PROCEDURE {function_name}();
-        """)
-    print(f"Trigger created successfully on {table_name}.")
-
 def show_table_schema(conn, table_name):
     """Show the schema for a table"""
     with conn.cursor() as cur:
@@ -284,109 +200,19 @@ def test_triggers_attributes(conn, table_name):
         conn.rollback()
         print(f"Error testing triggers: {e}")
 
-def update_existing_records(conn, table_name):
-    """Update existing records according to our new logic"""
-    print(f"\n=== Updating existing records in {table_name} ===")
-    try:
-        with conn.cursor() as cur:
-            # Update records with NULL order_num to use their ID
-            cur.execute(f"""
-            UPDATE {table_name}
-            SET order_num = id
-            WHERE order_num IS NULL
-            """)
-            print(f"Updated {cur.rowcount} rows with NULL order_num to use ID")
-            
-            # Only update program_type for dimensions tables
-            if 'dimensions' in table_name and check_column_exists(conn, table_name, "program_type"):
-                # Extract table prefix for program_type
-                table_prefix = re.sub(r'dimensions$', '', table_name)
-                
-                # Map prefix to program_type (same logic as trigger)
-                if table_prefix == 'acquisition':
-                    program_type = 'M&A'
-                elif table_prefix == 'saas':
-                    program_type = 'SAAS'
-                else:
-                    program_type = table_prefix.upper()
-                
-                # Update records with NULL program_type
-                cur.execute(f"""
-                UPDATE {table_name}
-                SET program_type = %s
-                WHERE program_type IS NULL
-                """, [program_type])
-                print(f"Updated {cur.rowcount} rows with NULL program_type to '{program_type}'")
-    except Exception as e:
-        conn.rollback()
-        print(f"Error updating existing records: {e}")
-        return False
-    
-    return True
-
 def main():
-    """Main function to set up triggers and show table schema"""
+    """Main function to set up triggers (migration 0002) and show table schema"""
     try:
         conn = connect_to_db()
         
-        # Step 1: Create the trigger functions
-        create_order_num_trigger_function(conn)
-        create_program_type_trigger_function(conn)
-        conn.commit()
-        print("Trigger functions created successfully.\n")
-        
-        # Step 2: Get all dimension and attribute tables
-        dimension_tables = get_tables_by_suffix(conn, "dimensions")
-        attribute_tables = get_tables_by_suffix(conn, "attributes")
-        
-        print(f"Found {len(dimension_tables)} dimension tables: {dimension_tables}")
-        print(f"Found {len(attribute_tables)} attribute tables: {attribute_tables}")
-        print()
-        
-        # Step 3: Create triggers on dimension tables
-        for table in dimension_tables:
-            create_trigger(conn, table, "set_order_num_trigger", "set_default_order")
-            create_trigger(conn, table, "set_program_type_trigger", "set_default_program_type")
-            conn.commit()
-        
-        # Step 4: Create triggers on attribute tables (only order_num trigger)
-        for table in attribute_tables:
-            create_trigger(conn, table, "set_order_num_trigger", "set_default_order")
-            # Skip program_type trigger for attributes tables since they don't have this column
-            conn.commit()
-        
-        print("\nAll triggers created successfully!")
-        
-        # Step 5: Update existing records
-        print("\n=== Updating Existing Records ===")
-        update_existing = input("Do you want to update existing records? (y/n): ").lower().strip()
-        
-        if update_existing == 'y':
-            print("Updating existing records...")
-            
-            # Update dimension tables
-            for table in dimension_tables:
-                if update_existing_records(conn, table):
-                    conn.commit()
-                    print(f"Successfully updated records in {table}")
-                else:
-                    print(f"Failed to update records in {table}")
-            
-            # Update attribute tables
-            for table in attribute_tables:
-                if update_existing_records(conn, table):
-                    conn.commit()
-                    print(f"Successfully updated records in {table}")
-                else:
-                    print(f"Failed to update records in {table}")
-        else:
-            print("Skipping update of existing records.")
+        # Trigger functions, triggers and the order_num/program_type backfill live in migrate.py
+        run_migrations(conn, target="0002")
         
-        # Step 6: Show schema for acquisition tables
+        # Show schema for acquisition tables
         show_table_schema(conn, "acquisitiondimensions")
         show_table_schema(conn, "acquisitionattributes")
         
-        # Step 7: Test the triggers
+        # Test the triggers
         test_triggers_dimensions(conn, "acquisitiondimensions")
         test_triggers_attributes(conn, "acquisitionattributes")
         
@@ -177,8 +177,8 @@ def create_sample_schema():
         ]
     }
 
-def generate_schema(base_url, document_type, extraction_goals):
-    """Generate schema using the API or fall back to sample schema"""
+def generate_schema(base_url, document_type, extraction_goals, fallback=True):
+    """Generate schema using the API or fall back to sample schema (None with fallback=False)"""
     print_step(3, "Generating Schema")
     print("Attempting to generate schema using Claude API...")
     
@@ -298,6 +298,8 @@ def generate_schema(base_url, document_type, extraction_goals):
             print(f"Error generating schema from API: {response.status_code}")
             print(f"Response: {response.text}")
             
+            if not fallback:
+                return None
             # Fall back to sample schema
             print("Falling back to sample schema...")
             schema = create_sample_schema()
@@ -311,6 +313,8 @@ def generate_schema(base_url, document_type, extraction_goals):
     except Exception as e:
         print(f"Error during schema generation: {str(e)}")
         
+        if not fallback:
+            return None
         # Fall back to sample schema
         print("Falling back to sample schema due to error...")
         return create_sample_schema()
@@ -12,15 +12,36 @@ This script helps you:
 import os
 import sys
 import json
+import uuid
+import hashlib
 import requests
 from datetime import datetime
 import time
 import argparse
 import glob
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+
+from schema_stream import NDJSON_CONTENT_TYPE, read_schema_events
+from schema_diff import diff_schemas, schema_version
 
 # Default settings
 DEFAULT_BASE_URL = "http://localhost:5000"
 
+# Upload settings: files are streamed in chunks, several at a time over one session
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "4"))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+UPLOAD_TIMEOUT = (10, 600)  # (connect, read) seconds
+
+# Deduplicated uploads: files the API already holds are matched by SHA-256 and
+# only missing files are sent, in resumable chunks of this size
+RESUMABLE_CHUNK_SIZE = 8 * 1024 * 1024
+UPLOAD_RETRIES = 3
+
+# Ask /api/generate-schema to stream fields as NDJSON while the schema is written
+SCHEMA_STREAMING = os.getenv("SCHEMA_STREAMING", "1").lower() not in ("0", "false", "no")
+
 def clear_screen():
     """Clear the terminal screen"""
     os.system('cls' if os.name == 'nt' else 'clear')
@@ -144,10 +165,231 @@ def get_files_to_upload():
     else:
         return get_files_to_upload()
 
-def analyze_documents(base_url, file_paths, document_type, extraction_goals):
+class MultipartStream:
+    """
+    multipart/form-data body that reads files in chunks while it is sent.
+    The total length is known up front, so requests sends a Content-Length
+    instead of reading everything into memory.
+    """
+    
+    def __init__(self, fields, files, progress=None, chunk_size=UPLOAD_CHUNK_SIZE):
+        self.boundary = uuid.uuid4().hex
+        self.fields = fields
+        self.files = files  # [(field_name, path)]
+        self.progress = progress
+        self.chunk_size = chunk_size
+        self.sizes = [os.path.getsize(path) for _, path in files]
+    
+    @property
+    def content_type(self):
+        return f"multipart/form-data; boundary={self.boundary}"
+    
+    def _field_part(self, name, value):
+        return (f"--{self.boundary}\r\n"
+                f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+                f"{value}\r\n").encode("utf-8")
+    
+    def _file_header(self, name, path):
+        filename = os.path.basename(path).replace('"', '%22')
+        return (f"--{self.boundary}\r\n"
+                f'Content-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                f"Content-Type: application/octet-stream\r\n\r\n").encode("utf-8")
+    
+    def _closing(self):
+        return f"--{self.boundary}--\r\n".encode("utf-8")
+    
+    def __len__(self):
+        length = sum(len(self._field_part(name, value)) for name, value in self.fields.items())
+        for (name, path), size in zip(self.files, self.sizes):
+            length += len(self._file_header(name, path)) + size + 2
+        return length + len(self._closing())
+    
+    def __iter__(self):
+        for name, value in self.fields.items():
+            yield self._field_part(name, value)
+        for (name, path), size in zip(self.files, self.sizes):
+            yield self._file_header(name, path)
+            sent = 0
+            # Opened read-only, so no temp copy is needed to avoid locking the original
+            with open(path, 'rb') as f:
+                while sent < size:
+                    chunk = f.read(min(self.chunk_size, size - sent))
+                    if not chunk:
+                        raise IOError(f"{path} shrank while it was being uploaded")
+                    sent += len(chunk)
+                    if self.progress:
+                        self.progress.update(path, sent, size)
+                    yield chunk
+            yield b"\r\n"
+        yield self._closing()
+
+class UploadProgress:
+    """Thread-safe per-file upload progress, printed every 10%."""
+    
+    def __init__(self, file_paths):
+        self.lock = threading.Lock()
+        self.width = max((len(os.path.basename(path)) for path in file_paths), default=0)
+        self.reported = {}
+    
+    def update(self, path, sent, total):
+        step = 10 if not total else sent * 10 // total
+        with self.lock:
+            if step <= self.reported.get(path, -1):
+                return
+            self.reported[path] = step
+            print(f"  {os.path.basename(path):<{self.width}}  {step * 10:3d}%  "
+                  f"({sent / (1024 * 1024):.1f} of {total / (1024 * 1024):.1f} MB)")
+
+def create_upload_session(workers):
+    """requests session whose connection pool fits the number of upload workers"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def upload_file(session, url, path, context_json, progress):
+    """Stream one file to the analysis API. Returns (path, analysis, status_code, error)."""
+    try:
+        body = MultipartStream({'context': context_json}, [('file_0', path)], progress)
+        response = session.post(url, data=body, headers={'Content-Type': body.content_type},
+                                timeout=UPLOAD_TIMEOUT)
+    except Exception as e:
+        return path, None, None, str(e)
+    
+    if response.status_code != 200:
+        return path, None, response.status_code, response.text
+    try:
+        return path, response.json(), 200, None
+    except ValueError:
+        # A 200 that is not JSON (e.g. a proxy error page) fails only this file
+        return path, None, 200, f"Invalid JSON in response: {response.text[:200]}"
+
+def file_sha256(path):
+    """SHA-256 of a file, read in 1 MB blocks"""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+def hash_file(path):
+    """(digest, size) of a file, or None if it cannot be read"""
+    try:
+        return file_sha256(path), os.path.getsize(path)
+    except OSError as e:
+        print(f"Cannot open file {path}: {str(e)}")
+        return None
+
+def lookup_analyses(session, base_url, context, files):
+    """
+    Ask the API which files it already holds.
+    Returns {"analyses": {digest: analysis}, "offsets": {digest: bytes_stored}},
+    or None if the API does not support deduplicated uploads.
+    """
+    try:
+        response = session.post(f"{base_url}/api/analyze-documents/lookup",
+                                json={"context": context, "files": files}, timeout=UPLOAD_TIMEOUT)
+    except Exception as e:
+        print(f"Upload lookup failed: {str(e)}")
+        return None
+    if response.status_code != 200:
+        return None
+    try:
+        lookup = response.json()
+    except ValueError:
+        print("Upload lookup returned an invalid response, uploading every file")
+        return None
+    if not isinstance(lookup, dict):
+        return None
+    return lookup
+
+def upload_resumable(session, base_url, path, digest, offset, progress):
+    """
+    Send a file from offset onwards in chunks. A 409 from the API carries the
+    offset it actually holds, and the upload continues from there.
+    Returns (status_code, error); error is None once the whole file is stored.
+    """
+    url = f"{base_url}/api/uploads/{digest}"
+    size = os.path.getsize(path)
+    attempts = 0
+    with open(path, 'rb') as f:
+        while offset < size:
+            f.seek(offset)
+            chunk = f.read(RESUMABLE_CHUNK_SIZE)
+            headers = {
+                'Content-Type': 'application/octet-stream',
+                'Content-Range': f"bytes {offset}-{offset + len(chunk) - 1}/{size}"
+            }
+            try:
+                response = session.put(url, data=chunk, headers=headers, timeout=UPLOAD_TIMEOUT)
+            except requests.RequestException as e:
+                attempts += 1
+                if attempts > UPLOAD_RETRIES:
+                    return None, str(e)
+                time.sleep(2 ** attempts)
+                continue
+            
+            if response.status_code not in (200, 409):
+                return response.status_code, response.text
+            attempts = 0
+            try:
+                offset = int(response.json()['offset'])
+            except (ValueError, KeyError, TypeError):
+                return response.status_code, f"Invalid upload response: {response.text[:200]}"
+            progress.update(path, offset, size)
+    return 200, None
+
+def sync_file(session, base_url, path, digest, offset, context, progress):
+    """Upload whatever part of a file the API is missing, then fetch its analysis. Returns (path, analysis, status_code, error)."""
+    if offset:
+        print(f"Resuming {os.path.basename(path)} at {offset / (1024 * 1024):.1f} MB")
+    try:
+        status_code, error = upload_resumable(session, base_url, path, digest, offset, progress)
+    except OSError as e:
+        # Locked or removed since it was hashed
+        return path, None, None, str(e)
+    if error:
+        return path, None, status_code, error
+    
+    try:
+        response = session.post(f"{base_url}/api/analyze-documents/{digest}",
+                                json={"context": context, "filename": os.path.basename(path)},
+                                timeout=UPLOAD_TIMEOUT)
+    except Exception as e:
+        return path, None, None, str(e)
+    if response.status_code != 200:
+        return path, None, response.status_code, response.text
+    try:
+        return path, response.json(), 200, None
+    except ValueError:
+        return path, None, 200, f"Invalid JSON in response: {response.text[:200]}"
+
+def fallback_file_analysis(path):
+    """Minimal analysis entry for a file the API could not analyze"""
+    return {
+        "file_type": "structured_data" if path.endswith(('.xlsx', '.xls', '.csv')) else "document",
+        "filename": os.path.basename(path)
+    }
+
+def file_analyses_of(analysis, path):
+    """
+    The per-file entries of one file's analysis. The API answers with an
+    /api/analyze-documents style {"file_analyses": [...]}; a bare per-file
+    analysis is accepted as the single entry.
+    """
+    if isinstance(analysis, dict) and isinstance(analysis.get("file_analyses"), list):
+        return analysis["file_analyses"]
+    if isinstance(analysis, dict):
+        entry = dict(analysis)
+        entry.setdefault("filename", os.path.basename(path))
+        return [entry]
+    raise ValueError(f"Unexpected analysis for {os.path.basename(path)}: {str(analysis)[:200]}")
+
+def analyze_documents(base_url, file_paths, document_type, extraction_goals, workers=UPLOAD_WORKERS):
     """Upload and analyze documents using the API"""
     print_step(4, "Analyzing Documents")
-    print("Uploading and analyzing files...")
+    print(f"Uploading and analyzing {len(file_paths)} files ({workers} at a time)...")
     
     # Prepare API endpoint URL
     url = f"{base_url}/api/analyze-documents"
@@ -158,99 +400,142 @@ def analyze_documents(base_url, file_paths, document_type, extraction_goals):
         "extractionGoals": extraction_goals,
         "userNotes": "Generated via Enhanced Due Diligence Schema Generator script"
     }
+    context_json = json.dumps(context)
     
-    # Create multipart form data
-    files = {}
-    for i, path in enumerate(file_paths):
-        print(f"Preparing file {i+1}/{len(file_paths)}: {path}")
-        # Make a copy of the file to avoid locking issues
-        temp_path = f"temp_copy_{os.path.basename(path)}"
+    readable = []
+    for path in file_paths:
         try:
-            with open(path, 'rb') as src, open(temp_path, 'wb') as dst:
-                dst.write(src.read())
-            files[f'file_{i}'] = (os.path.basename(path), open(temp_path, 'rb'))
-        except Exception as e:
-            print(f"Error preparing file {path}: {str(e)}")
-            # Try without making a copy
-            try:
-                files[f'file_{i}'] = (os.path.basename(path), open(path, 'rb'))
-            except Exception as e:
-                print(f"Cannot open file {path}: {str(e)}")
-                continue
-    
-    # Add context to form data
-    form_data = {'context': json.dumps(context)}
+            size = os.path.getsize(path) if os.access(path, os.R_OK) else None
+        except OSError:
+            size = None
+        if size is None:
+            print(f"Cannot open file {path}")
+        elif size == 0:
+            print(f"Skipping empty file {path}")
+        else:
+            readable.append(path)
     
-    # Send request to API
+    progress = UploadProgress(readable)
+    results = {}
+    session = create_upload_session(workers)
     try:
-        print("Sending files to API for analysis...")
-        response = requests.post(url, files=files, data=form_data)
+        print("Checking which files the API already has...")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            hashed = dict(zip(readable, executor.map(hash_file, readable)))
+        for path, info in hashed.items():
+            if info is None:
+                # Locked or removed after the check above; it gets a fallback analysis
+                results[path] = (None, None)
+        hashed = {path: info for path, info in hashed.items() if info is not None}
+        lookup = lookup_analyses(session, base_url, context, [
+            {"digest": digest, "filename": os.path.basename(path), "size": size}
+            for path, (digest, size) in hashed.items()
+        ])
         
-        # Close file handles
-        for file_obj in files.values():
-            file_obj[1].close()
-        
-        # Remove temp files
-        for path in glob.glob("temp_copy_*"):
-            try:
-                os.remove(path)
-            except:
-                pass
-        
-        if response.status_code == 200:
-            print("Analysis completed successfully!")
-            return response.json()
+        tasks = []
+        if lookup is None:
+            # Older API: each file is analyzed in its own streamed request
+            print("API does not support deduplicated uploads, uploading every file")
+            tasks = [(upload_file, (session, url, path, context_json, progress)) for path in hashed]
         else:
-            print(f"Error analyzing documents: {response.status_code}")
-            print(f"Response: {response.text}")
-            
-            # Create fallback analysis results
-            print("Creating fallback analysis results...")
-            
-            # Get briefing context
-            try:
-                briefing_response = requests.get(f"{base_url}/api/briefing/test-project-123").json()
-            except:
-                briefing_response = {
-                    "context": {
-                        "business_context": "This is a due diligence review for a private equity acquisition"
-                    },
-                    "scope": "The scope includes reviewing financial statements, operational metrics, and risk factors."
-                }
-            
-            # Create synthetic analysis results
-            return {
-                "document_type": document_type,
-                "extraction_goals": extraction_goals,
-                "file_analyses": [
-                    {
-                        "file_type": "structured_data" if path.endswith(('.xlsx', '.xls', '.csv')) else "document",
-                        "filename": os.path.basename(path)
-                    } for path in file_paths
-                ],
-                "briefing_context": briefing_response
-            }
-    except Exception as e:
-        print(f"Error during document analysis: {str(e)}")
-        
-        # Close file handles
-        for file_obj in files.values():
-            try:
-                file_obj[1].close()
-            except:
-                pass
+            for path, (digest, _) in hashed.items():
+                if digest in lookup.get('analyses', {}):
+                    results[path] = (lookup['analyses'][digest], 200)
+                    print(f"Already analyzed {os.path.basename(path)}")
+                else:
+                    offset = lookup.get('offsets', {}).get(digest, 0)
+                    tasks.append((sync_file, (session, base_url, path, digest, offset, context, progress)))
         
-        # Remove temp files
-        for path in glob.glob("temp_copy_*"):
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(function, *task_args) for function, task_args in tasks]
+            for future in as_completed(futures):
+                path, analysis, status_code, error = future.result()
+                results[path] = (analysis, status_code)
+                if status_code is None:
+                    print(f"Error uploading {path}: {error}")
+                elif analysis is None:
+                    print(f"Error analyzing {path}: {status_code}")
+                    print(f"Response: {error}")
+                else:
+                    print(f"Analyzed {os.path.basename(path)}")
+    finally:
+        session.close()
+    
+    succeeded = [path for path in readable if results[path][0] is not None]
+    failed = [path for path in readable if results[path][0] is None]
+    
+    if not succeeded and all(status_code is None for _, status_code in results.values()):
+        # Nothing reached the API at all
+        print("Error during document analysis: no file could be uploaded")
+        return None
+    
+    if succeeded:
+        print(f"Analysis completed for {len(succeeded)} of {len(file_paths)} files")
+        # Combine the per-file results into one analysis, in the order the files were selected
+        envelopes = [results[path][0] for path in succeeded
+                     if isinstance(results[path][0], dict) and "file_analyses" in results[path][0]]
+        merged = dict(envelopes[0]) if envelopes else {
+            "document_type": document_type,
+            "extraction_goals": extraction_goals
+        }
+        merged["file_analyses"] = []
+        for path in readable:
+            analysis = results[path][0]
+            if analysis is None:
+                merged["file_analyses"].append(fallback_file_analysis(path))
+                continue
             try:
-                os.remove(path)
-            except:
-                pass
-        
+                merged["file_analyses"].extend(file_analyses_of(analysis, path))
+            except ValueError as e:
+                print(f"Error: {str(e)}")
+                merged["file_analyses"].append(fallback_file_analysis(path))
+        return merged
+    
+    # Create fallback analysis results
+    print("Creating fallback analysis results...")
+    
+    # Get briefing context
+    try:
+        briefing_response = requests.get(f"{base_url}/api/briefing/test-project-123").json()
+    except:
+        briefing_response = {
+            "context": {
+                "business_context": "This is a due diligence review for a private equity acquisition"
+            },
+            "scope": "The scope includes reviewing financial statements, operational metrics, and risk factors."
+        }
+    
+    # Create synthetic analysis results
+    return {
+        "document_type": document_type,
+        "extraction_goals": extraction_goals,
+        "file_analyses": [fallback_file_analysis(path) for path in failed],
+        "briefing_context": briefing_response
+    }
+
+def print_schema_event(event):
+    """Show schema parts as they stream in"""
+    if event.get("type") == "property" and event.get("key") == "name":
+        print(f"Schema Name: {event['value']}")
+    elif event.get("type") == "field":
+        field = event["field"]
+        required = "Required" if field.get('required', False) else "Optional"
+        print(f"  {event['index'] + 1}. {field.get('name')} ({field.get('type')}, {required})")
+
+def read_streamed_schema(response):
+    """Build the schema from an NDJSON response, printing fields as they arrive; None if nothing usable came back"""
+    print("Receiving schema fields...")
+    schema, complete, errors = read_schema_events(response.iter_lines(decode_unicode=True), print_schema_event)
+    for error in errors:
+        print(f"Warning: skipped invalid field - {error}")
+    if not complete:
+        print(f"Warning: schema stream ended early; keeping {len(schema['fields'])} fields received")
+    if not schema["fields"]:
         return None
+    return schema
 
-def generate_schema(base_url, analysis_results, document_type, extraction_goals):
-    """Generate schema using the API"""
+def generate_schema(base_url, analysis_results, document_type, extraction_goals, fallback=True):
+    """Generate schema using the API; with fallback=False, returns None instead of the sample schema"""
     print_step(5, "Generating Schema")
     print("Generating schema based on document analysis...")
     
@@ -275,27 +560,44 @@ def generate_schema(base_url, analysis_results, document_type, extraction_goals)
     payload = {
         "analysisResults": analysis_results,
         "context": context,
-        "modelSettings": model_settings
+        "modelSettings": model_settings,
+        "stream": SCHEMA_STREAMING
     }
+    headers = {'Accept': f"{NDJSON_CONTENT_TYPE}, application/json"}
     
     # Send request to API
     try:
         print("Sending request to generate schema...")
-        response = requests.post(url, json=payload)
+        response = requests.post(url, json=payload, headers=headers, stream=SCHEMA_STREAMING)
         
-        if response.status_code == 200:
+        if response.status_code == 200 and response.headers.get('Content-Type', '').startswith(NDJSON_CONTENT_TYPE):
+            schema = read_streamed_schema(response)
+            if schema:
+                print("Schema generated successfully!")
+                return schema
+            print("Error generating schema: the stream contained no valid fields")
+            if not fallback:
+                return None
+            print("Falling back to sample schema...")
+            return create_sample_schema(document_type)
+        elif response.status_code == 200:
+            # Servers without streaming support answer with the whole schema
             print("Schema generated successfully!")
             return response.json()
         else:
             print(f"Error generating schema: {response.status_code}")
             print(f"Response: {response.text}")
             
+            if not fallback:
+                return None
             # Fall back to sample schema
             print("Falling back to sample schema...")
             return create_sample_schema(document_type)
     except Exception as e:
         print(f"Error during schema generation: {str(e)}")
         
+        if not fallback:
+            return None
         # Fall back to sample schema
         print("Falling back to sample schema due to error...")
         return create_sample_schema(document_type)
@@ -405,6 +707,110 @@ def display_schema_summary(schema):
     if len(fields) > 10:
         print(f"  ... and {len(fields) - 10} more fields")
 
+def default_schema_directory(project_name):
+    """static/data/<project>/schemas under the project root"""
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+    return os.path.join(
+        project_root,
+        'static', 
+        'data', 
+        project_name,
+        'schemas'
+    )
+
+def write_schema_file(schema, full_path):
+    """Write a schema as JSON"""
+    try:
+        with open(full_path, 'w', encoding='utf-8') as f:
+            json.dump(schema, f, indent=2)
+        print(f"Schema saved successfully to {full_path}")
+        return True
+    except Exception as e:
+        print(f"Error saving schema: {str(e)}")
+        return False
+
+def sync_state_path(project_id):
+    """Where the last schema saved to the API for a project is remembered"""
+    return os.path.join(default_schema_directory(project_id), '.last_synced.json')
+
+def load_sync_state(project_id):
+    """{"version", "schema"} of the last successful API save, or None"""
+    try:
+        with open(sync_state_path(project_id), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def store_sync_state(project_id, schema):
+    try:
+        path = sync_state_path(project_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"version": schema_version(schema), "schema": schema}, f)
+    except OSError as e:
+        print(f"Warning: could not record the saved schema version: {str(e)}")
+
+def patch_schema_on_api(url, schema, project_id):
+    """
+    Send only the changes since the last save.
+    Returns True/False, or None when a full save is needed instead.
+    """
+    state = load_sync_state(project_id)
+    if not state:
+        return None
+    if state.get("version") == schema_version(schema):
+        print("Schema unchanged since the last save to the API")
+        return True
+    
+    operations = diff_schemas(state["schema"], schema)
+    print(f"Saving {len(operations)} changes to project ID: {project_id}")
+    response = requests.patch(url, json={"baseVersion": state["version"], "operations": operations})
+    
+    if response.status_code == 200:
+        print("Schema changes saved successfully to API!")
+        store_sync_state(project_id, schema)
+        return True
+    if response.status_code == 409:
+        print("The schema on the API was changed since it was last saved from here; not overwriting it.")
+        print("Re-run with --force-save to replace it with this schema.")
+        return False
+    if response.status_code in (404, 405, 501):
+        # No patch support on the API, or nothing stored there yet
+        return None
+    print(f"Error saving schema changes to API: {response.status_code}")
+    print(f"Response: {response.text}")
+    return False
+
+def post_schema_to_api(base_url, schema, project_id, force=False):
+    """
+    Save a schema to the API under a project ID. Only the changes since the
+    last save are sent when possible; force=True sends the whole schema.
+    """
+    # Prepare API endpoint URL
+    url = f"{base_url}/api/save-schema/{project_id}"
+    
+    # Send request to API
+    try:
+        if not force:
+            saved = patch_schema_on_api(url, schema, project_id)
+            if saved is not None:
+                return saved
+        
+        print(f"Saving schema to project ID: {project_id}")
+        response = requests.post(url, json=schema)
+        
+        if response.status_code == 200:
+            print("Schema saved successfully to API!")
+            store_sync_state(project_id, schema)
+            return True
+        else:
+            print(f"Error saving schema to API: {response.status_code}")
+            print(f"Response: {response.text}")
+            return False
+    except Exception as e:
+        print(f"Error during API save: {str(e)}")
+        return False
+
 def save_schema_to_file(schema, project_info):
     """Save the schema to a file"""
     print_step(7, "Save Schema")
@@ -413,15 +819,7 @@ def save_schema_to_file(schema, project_info):
         print("No schema available to save")
         return False
     
-    # Create directory path - adjust to use absolute path
-    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
-    directory = os.path.join(
-        project_root,
-        'static', 
-        'data', 
-        project_info['project_name'],
-        'schemas'
-    )
+    directory = default_schema_directory(project_info['project_name'])
     
     # Allow user to modify the path
     print(f"Default directory: {directory}")
@@ -453,20 +851,12 @@ def save_schema_to_file(schema, project_info):
     # Ask for confirmation
     confirmation = input(f"Save schema to {full_path}? (y/n) [y]: ").strip().lower()
     if confirmation not in ('n', 'no'):
-        # Save file
-        try:
-            with open(full_path, 'w', encoding='utf-8') as f:
-                json.dump(schema, f, indent=2)
-            print(f"Schema saved successfully to {full_path}")
-            return True
-        except Exception as e:
-            print(f"Error saving schema: {str(e)}")
-            return False
+        return write_schema_file(schema, full_path)
     else:
         print("Schema not saved to file")
         return False
 
-def save_to_api(base_url, schema, project_info):
+def save_to_api(base_url, schema, project_info, force=False):
     """Save the schema using the API"""
     print_step(8, "Save Schema to API")
     
@@ -478,24 +868,7 @@ def save_to_api(base_url, schema, project_info):
     project_id = project_info['project_name']
     confirmation = input(f"Save schema to API with project ID '{project_id}'? (y/n) [y]: ").strip().lower()
     if confirmation not in ('n', 'no'):
-        # Prepare API endpoint URL
-        url = f"{base_url}/api/save-schema/{project_id}"
-        
-        # Send request to API
-        try:
-            print(f"Saving schema to project ID: {project_id}")
-            response = requests.post(url, json=schema)
-            
-            if response.status_code == 200:
-                print("Schema saved successfully to API!")
-                return True
-            else:
-                print(f"Error saving schema to API: {response.status_code}")
-                print(f"Response: {response.text}")
-                return False
-        except Exception as e:
-            print(f"Error during API save: {str(e)}")
-            return False
+        return post_schema_to_api(base_url, schema, project_id, force)
     else:
         print("Schema not saved to API")
         return False
@@ -504,6 +877,10 @@ def main():
     """Main function"""
     parser = argparse.ArgumentParser(description="Enhanced Due Diligence Schema Generator with File Upload")
     parser.add_argument("--url", default=DEFAULT_BASE_URL, help=f"Base URL of the API (default: {DEFAULT_BASE_URL})")
+    parser.add_argument("--upload-workers", type=int, default=UPLOAD_WORKERS,
+                        help=f"Files uploaded at the same time (default: {UPLOAD_WORKERS})")
+    parser.add_argument("--force-save", action="store_true",
+                        help="Send the whole schema to the API even if it was changed there since the last save")
     args = parser.parse_args()
     
     base_url = args.url
@@ -550,7 +927,8 @@ def main():
         base_url, 
         file_paths, 
         project_info['document_type'], 
-        extraction_goals
+        extraction_goals,
+        max(1, args.upload_workers)
     )
     
     if not analysis_results:
@@ -576,7 +954,7 @@ def main():
     save_schema_to_file(schema, project_info)
     
     # Step 8: Save schema to API
-    save_to_api(base_url, schema, project_info)
+    save_to_api(base_url, schema, project_info, args.force_save)
     
     print_header("Schema Generation Complete")
     print("Thank you for using the Enhanced Due Diligence Schema Generator!")
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Batch Due Diligence Schema Generator
+
+Runs the schema generator non-interactively for every project in a job file,
+several projects at a time. Projects with files go through the upload and
+analysis flow of appdeux.py; projects without files use the predefined
+context of app.py. Each schema is written to static/data/<project>/schemas
+and each project's output goes to a log file next to it.
+
+Job file (JSON; file globs and output_dir are relative to the job file, and
+output_dir may use project fields such as "schemas/{project_name}"):
+
+    {
+      "url": "http://localhost:5000",
+      "concurrency": 4,
+      "defaults": {"document_type": "due_diligence", "upload_workers": 2},
+      "projects": [
+        {
+          "project_name": "3MAcquisition",
+          "schema_name": "SequoiaSchema",
+          "extraction_goals": ["Extract financial metrics and KPIs"],
+          "files": ["*.pdf", "*.xlsx"],
+          "save_to_api": true
+        }
+      ]
+    }
+
+Usage:
+    python batch_schemas.py job.json
+    python batch_schemas.py job.json --concurrency 8 --only 3MAcquisition
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import contextlib
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import requests
+
+import app
+import appdeux
+
+DEFAULT_CONCURRENCY = 4
+
+DEFAULT_GOALS = [
+    "Extract financial metrics and KPIs",
+    "Identify key risks and liabilities",
+    "Catalog intellectual property assets",
+    "Extract contractual obligations and commitments",
+    "Identify regulatory compliance issues"
+]
+
+PROJECT_DEFAULTS = {
+    "schema_name": "SequoiaSchema",
+    "document_type": "due_diligence",
+    "extraction_goals": DEFAULT_GOALS,
+    "files": [],
+    "output_dir": None,
+    "save_to_api": False,
+    "force_save": False,
+    "allow_sample_schema": False,
+    "upload_workers": 2
+}
+
+def load_job(path):
+    """Read a job file and fill in defaults for each project"""
+    with open(path, 'r', encoding='utf-8') as f:
+        job = json.load(f)
+
+    defaults = dict(PROJECT_DEFAULTS, **job.get("defaults", {}))
+    projects = []
+    for entry in job.get("projects", []):
+        if not entry.get("project_name"):
+            raise ValueError(f"Project entry without project_name: {entry}")
+        projects.append(dict(defaults, **entry))
+
+    names = [project["project_name"] for project in projects]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate project names in job file: {', '.join(duplicates)}")
+
+    return {
+        "url": job.get("url", appdeux.DEFAULT_BASE_URL),
+        "concurrency": job.get("concurrency", DEFAULT_CONCURRENCY),
+        "projects": projects
+    }
+
+def resolve_files(patterns, base_dir):
+    """Expand file globs relative to the job file, without duplicates"""
+    files = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(os.path.join(base_dir, pattern), recursive=True)):
+            if os.path.isfile(path) and path not in files:
+                files.append(path)
+    return files
+
+def generate_project_schema(base_url, project, job_dir):
+    """Analyze a project's files and generate its schema. Returns (schema, file_count)."""
+    files = resolve_files(project["files"], job_dir)
+    if project["files"] and not files:
+        raise RuntimeError(f"No files match {project['files']}")
+
+    fallback = project["allow_sample_schema"]
+    if not files:
+        return app.generate_schema(base_url, project["document_type"], project["extraction_goals"], fallback), 0
+
+    analysis_results = appdeux.analyze_documents(
+        base_url,
+        files,
+        project["document_type"],
+        project["extraction_goals"],
+        max(1, project["upload_workers"])
+    )
+    if not analysis_results:
+        raise RuntimeError("Document analysis failed")
+    schema = appdeux.generate_schema(
+        base_url,
+        analysis_results,
+        project["document_type"],
+        project["extraction_goals"],
+        fallback
+    )
+    return schema, len(files)
+
+def run_project(base_url, project, job_dir):
+    """Generate, save and optionally upload one project's schema; runs in a worker process"""
+    started = time.time()
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    if project["output_dir"]:
+        directory = os.path.join(job_dir, project["output_dir"].format(**project))
+    else:
+        directory = appdeux.default_schema_directory(project["project_name"])
+    os.makedirs(directory, exist_ok=True)
+
+    base_name = f"{project['schema_name']}_{timestamp}"
+    schema_path = os.path.join(directory, f"{base_name}.json")
+    log_path = os.path.join(directory, f"{base_name}.log")
+    summary = {
+        "project_name": project["project_name"],
+        "schema_path": None,
+        "log_path": log_path,
+        "fields": 0,
+        "files": 0,
+        "error": None
+    }
+
+    # Each worker is its own process, so redirecting stdout only captures this project
+    with open(log_path, 'w', encoding='utf-8') as log, \
+            contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        try:
+            schema, summary["files"] = generate_project_schema(base_url, project, job_dir)
+            if not schema:
+                raise RuntimeError("Schema generation failed")
+            summary["fields"] = len(schema.get("fields", []))
+            if not appdeux.write_schema_file(schema, schema_path):
+                raise RuntimeError(f"Could not write {schema_path}")
+            summary["schema_path"] = schema_path
+            if project["save_to_api"] and not appdeux.post_schema_to_api(
+                    base_url, schema, project["project_name"], project["force_save"]):
+                raise RuntimeError("Saving the schema to the API failed")
+        except Exception as e:
+            print(f"Error: {str(e)}")
+            summary["error"] = str(e)
+
+    summary["seconds"] = time.time() - started
+    return summary
+
+def check_api(base_url):
+    """True if the API answers its connection test"""
+    try:
+        response = requests.get(f"{base_url}/api/test-claude-connection", timeout=30)
+    except Exception as e:
+        print(f"Error connecting to API: {str(e)}")
+        return False
+    if response.status_code != 200:
+        print(f"Warning: API connection returned status {response.status_code}")
+        return False
+    return True
+
+def run_job(job_path, concurrency=None, base_url=None, only=None):
+    """Run every project in a job file; returns the list of project summaries"""
+    job = load_job(job_path)
+    job_dir = os.path.dirname(os.path.abspath(job_path))
+    base_url = base_url or job["url"]
+    concurrency = max(1, concurrency or job["concurrency"])
+    projects = [project for project in job["projects"] if not only or project["project_name"] in only]
+
+    appdeux.print_header(f"Batch Schema Generation: {len(projects)} projects, {concurrency} at a time")
+    summaries = []
+    with ProcessPoolExecutor(max_workers=min(concurrency, len(projects)) or 1) as executor:
+        futures = {executor.submit(run_project, base_url, project, job_dir): project for project in projects}
+        for number, future in enumerate(as_completed(futures), 1):
+            project = futures[future]
+            try:
+                summary = future.result()
+            except Exception as e:
+                summary = {"project_name": project["project_name"], "error": str(e), "log_path": None,
+                           "schema_path": None, "fields": 0, "files": 0, "seconds": 0}
+            summaries.append(summary)
+            if summary["error"]:
+                print(f"[{number}/{len(projects)}] {summary['project_name']}: FAILED - {summary['error']} "
+                      f"(log: {summary['log_path']})")
+            else:
+                print(f"[{number}/{len(projects)}] {summary['project_name']}: {summary['fields']} fields "
+                      f"from {summary['files']} files in {summary['seconds']:.1f}s -> {summary['schema_path']}")
+    return summaries
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Generate due diligence schemas for every project in a job file")
+    parser.add_argument("job", help="Path to the JSON job file")
+    parser.add_argument("--url", help="Base URL of the API (overrides the job file)")
+    parser.add_argument("--concurrency", type=int, help="Projects processed at the same time (overrides the job file)")
+    parser.add_argument("--only", nargs="+", help="Only run these project names")
+    parser.add_argument("--skip-check", action="store_true", help="Do not test the API connection first")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.job):
+        print(f"Error: Job file '{args.job}' does not exist.")
+        sys.exit(1)
+
+    try:
+        job = load_job(args.job)
+    except (ValueError, json.JSONDecodeError) as e:
+        print(f"Error reading job file: {str(e)}")
+        sys.exit(1)
+
+    base_url = args.url or job["url"]
+    if not args.skip_check and not check_api(base_url):
+        print(f"Please make sure the API is running at {base_url}, or pass --skip-check")
+        sys.exit(1)
+
+    started = time.time()
+    summaries = run_job(args.job, args.concurrency, base_url, args.only)
+    failed = [summary for summary in summaries if summary["error"]]
+
+    appdeux.print_header("Batch Complete")
+    print(f"{len(summaries) - len(failed)} of {len(summaries)} schemas generated in {time.time() - started:.1f}s")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Content-addressed document store for the analysis API
+
+Server half of the deduplicated upload protocol used by appdeux.py. Files are
+stored by SHA-256 digest, so a data room that was analyzed before never has to
+be uploaded again. Per-file analyses are cached by (file digest, document
+type, extraction goals, analyzer version), so only new documents are analyzed;
+the analysis cache is size-bounded and evicts least recently used entries.
+Uploads abandoned part way are deleted once they have not grown for
+PARTIAL_UPLOAD_MAX_AGE_HOURS.
+
+Protocol (the Flask routes are thin wrappers around DocumentStore):
+
+    POST /api/analyze-documents/lookup
+        {"context": {...}, "files": [{"digest", "filename", "size"}]}
+        -> {"analyses": {digest: analysis}, "offsets": {digest: bytes_stored}}
+    PUT  /api/uploads/<digest>          body = chunk, Content-Range: bytes a-b/total
+        -> {"offset": bytes_stored, "complete": bool}   (409 with offset on a gap)
+    POST /api/analyze-documents/<digest>
+        {"context": {...}, "filename": "..."}  -> analysis
+
+An analysis, both here and in lookup's "analyses", has the shape of an
+/api/analyze-documents response for the one file, {"file_analyses": [{...}],
+...}; it is whatever the analyzer passed to analyze() returns, so analyzers
+should return that shape. appdeux.py also accepts a bare per-file analysis.
+
+Example wiring:
+
+    store = DocumentStore("uploads")
+
+    @app.route("/api/uploads/<digest>", methods=["PUT"])
+    def upload_chunk(digest):
+        status, body = store.write_chunk(digest, request.headers.get("Content-Range"), request.get_data())
+        return jsonify(body), status
+
+The plain multipart /api/analyze-documents route can use the same cache:
+
+    digest = store.ingest(request.files["file_0"].stream)
+    status, analysis = store.analyze(digest, context, filename, analyze_file)
+"""
+
+import os
+import re
+import json
+import hashlib
+import time
+import tempfile
+import threading
+
+DIGEST_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+CONTENT_RANGE_PATTERN = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+
+# Bump when the analyzer changes so cached analyses are recomputed
+ANALYZER_VERSION = int(os.getenv("ANALYZER_VERSION", "1"))
+ANALYSIS_CACHE_MAX_MB = int(os.getenv("ANALYSIS_CACHE_MAX_MB", "500"))
+# Eviction runs once the cache passes its maximum and trims it to this fraction of it
+ANALYSIS_CACHE_LOW_WATER = 0.8
+PARTIAL_UPLOAD_MAX_AGE_HOURS = float(os.getenv("PARTIAL_UPLOAD_MAX_AGE_HOURS", "24"))
+# Seconds between checks for abandoned partial uploads
+PARTIAL_SWEEP_INTERVAL = 3600
+# Digests share a fixed pool of locks, so the lock table does not grow with the store
+LOCK_STRIPES = 256
+
+def analysis_key(context, analyzer_version=ANALYZER_VERSION):
+    """
+    Key for the inputs that determine a file's analysis. Free-form user notes
+    are deliberately left out so they do not defeat the cache.
+    """
+    parts = {
+        "document_type": context.get("documentType"),
+        "extraction_goals": context.get("extractionGoals") or [],
+        "analyzer_version": analyzer_version
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+def parse_content_range(header):
+    """Parse 'bytes start-end/total' into (start, end, total), or None"""
+    match = CONTENT_RANGE_PATTERN.match(header or "")
+    if not match:
+        return None
+    start, end, total = (int(value) for value in match.groups())
+    if end < start or end >= total:
+        return None
+    return start, end, total
+
+def file_sha256(path):
+    """SHA-256 of a file, read in 1 MB blocks"""
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+class DocumentStore:
+    """Uploaded files and their analyses, addressed by content digest"""
+
+    def __init__(self, root, analyzer_version=ANALYZER_VERSION, max_analysis_bytes=ANALYSIS_CACHE_MAX_MB * 1024 * 1024):
+        self.root = root
+        self.analyzer_version = analyzer_version
+        self.max_analysis_bytes = max_analysis_bytes
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self._evict_lock = threading.Lock()
+        self._sweep_lock = threading.Lock()
+        self._next_partial_sweep = 0
+        # Running size of analyses/, scanned once on first write and then kept up to date
+        self._analysis_bytes = None
+
+    def _lock(self, digest):
+        return self._locks[int(digest[:8], 16) % LOCK_STRIPES]
+
+    def object_path(self, digest):
+        return os.path.join(self.root, "objects", digest[:2], digest)
+
+    def partial_path(self, digest):
+        return os.path.join(self.root, "partial", f"{digest}.part")
+
+    def analysis_path(self, digest, context):
+        return os.path.join(self.root, "analyses", digest[:2], digest,
+                            f"{analysis_key(context, self.analyzer_version)}.json")
+
+    def stored_bytes(self, digest):
+        """Bytes held for a digest: its full size once complete, else the partial upload size"""
+        for path in (self.object_path(digest), self.partial_path(digest)):
+            if os.path.exists(path):
+                return os.path.getsize(path)
+        return 0
+
+    def get_analysis(self, digest, context):
+        """Cached analysis of a file for this context, or None"""
+        path = self.analysis_path(digest, context)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                analysis = json.load(f)
+        except (OSError, ValueError):
+            return None
+        try:
+            # Mark as recently used for eviction
+            os.utime(path)
+        except OSError:
+            pass
+        return analysis
+
+    def _scan_analyses(self):
+        """(mtime, size, path) of every cached analysis"""
+        entries = []
+        for root, _, files in os.walk(os.path.join(self.root, "analyses")):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def add_analysis_bytes(self, size):
+        """Count a written (or, negative, replaced) analysis; True once the cache is over its limit"""
+        with self._evict_lock:
+            if self._analysis_bytes is None:
+                # The new file is already on disk, so the scan includes it
+                self._analysis_bytes = sum(entry[1] for entry in self._scan_analyses())
+            else:
+                self._analysis_bytes += size
+            return self._analysis_bytes > self.max_analysis_bytes
+
+    def evict_analyses(self):
+        """Delete least recently used analyses until the cache is down to its low-water mark"""
+        with self._evict_lock:
+            entries = self._scan_analyses()
+            total = sum(entry[1] for entry in entries)
+            target = self.max_analysis_bytes * ANALYSIS_CACHE_LOW_WATER
+            for _, size, path in sorted(entries):
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+            self._analysis_bytes = total
+
+    def ingest(self, stream):
+        """Store a complete file from a readable stream and return its digest"""
+        sha = hashlib.sha256()
+        directory = os.path.join(self.root, "partial")
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for block in iter(lambda: stream.read(1024 * 1024), b""):
+                    sha.update(block)
+                    f.write(block)
+            digest = sha.hexdigest()
+            target = self.object_path(digest)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(temp_path, target)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return digest
+
+    def lookup(self, context, files):
+        """Report which files already have an analysis for this context and how much of the rest is stored"""
+        analyses = {}
+        offsets = {}
+        for entry in files:
+            digest = entry.get("digest", "")
+            if not DIGEST_PATTERN.match(digest):
+                continue
+            analysis = self.get_analysis(digest, context)
+            if analysis is not None:
+                analyses[digest] = analysis
+            else:
+                offsets[digest] = self.stored_bytes(digest)
+        return {"analyses": analyses, "offsets": offsets}
+
+    def expire_partials(self, max_age=None, force=False):
+        """
+        Delete partial uploads that have not grown for max_age seconds (default
+        PARTIAL_UPLOAD_MAX_AGE_HOURS). Unless forced, runs at most once every
+        PARTIAL_SWEEP_INTERVAL. Returns the digests removed.
+        """
+        now = time.time()
+        with self._sweep_lock:
+            if not force and now < self._next_partial_sweep:
+                return []
+            self._next_partial_sweep = now + PARTIAL_SWEEP_INTERVAL
+        if max_age is None:
+            max_age = PARTIAL_UPLOAD_MAX_AGE_HOURS * 3600
+
+        removed = []
+        directory = os.path.join(self.root, "partial")
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return removed
+        for name in names:
+            digest = name[:-len(".part")]
+            if not name.endswith(".part") or not DIGEST_PATTERN.match(digest):
+                continue
+            with self._lock(digest):
+                path = self.partial_path(digest)
+                try:
+                    if now - os.path.getmtime(path) < max_age:
+                        continue
+                    os.remove(path)
+                    removed.append(digest)
+                except OSError:
+                    pass
+        return removed
+
+    def write_chunk(self, digest, content_range, data):
+        """
+        Append one chunk of an upload. Chunks must arrive in order; a chunk that
+        does not start at the stored offset gets 409 and the offset to resume from.
+        Returns (status_code, body).
+        """
+        if not DIGEST_PATTERN.match(digest):
+            return 400, {"error": "Invalid digest"}
+        parsed = parse_content_range(content_range)
+        if parsed is None or parsed[1] - parsed[0] + 1 != len(data):
+            return 400, {"error": "Invalid Content-Range"}
+        start, end, total = parsed
+        self.expire_partials()
+
+        with self._lock(digest):
+            if os.path.exists(self.object_path(digest)):
+                return 200, {"offset": total, "complete": True}
+
+            partial = self.partial_path(digest)
+            offset = os.path.getsize(partial) if os.path.exists(partial) else 0
+            if start != offset:
+                return 409, {"error": "Chunk does not start at the stored offset", "offset": offset}
+
+            os.makedirs(os.path.dirname(partial), exist_ok=True)
+            with open(partial, "ab") as f:
+                f.write(data)
+            offset = end + 1
+            if offset < total:
+                return 200, {"offset": offset, "complete": False}
+
+            # Only a file whose content matches its digest is kept
+            if file_sha256(partial) != digest:
+                os.remove(partial)
+                return 422, {"error": "Uploaded content does not match digest", "offset": 0}
+            target = self.object_path(digest)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(partial, target)
+            return 200, {"offset": total, "complete": True}
+
+    def analyze(self, digest, context, filename, analyzer):
+        """
+        Return the analysis of a stored file, running analyzer(path, filename, context)
+        and caching its result on first use. Returns (status_code, body).
+        """
+        if not DIGEST_PATTERN.match(digest):
+            return 400, {"error": "Invalid digest"}
+        path = self.object_path(digest)
+        if not os.path.exists(path):
+            return 404, {"error": "File has not been uploaded", "offset": self.stored_bytes(digest)}
+
+        over_limit = False
+        with self._lock(digest):
+            analysis = self.get_analysis(digest, context)
+            if analysis is None:
+                analysis = analyzer(path, filename, context)
+                target = self.analysis_path(digest, context)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".tmp")
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(analysis, f)
+                size = os.path.getsize(temp_path)
+                try:
+                    size -= os.path.getsize(target)
+                except OSError:
+                    pass
+                os.replace(temp_path, target)
+                over_limit = self.add_analysis_bytes(size)
+        # Evicting walks the whole cache, so it runs rarely and outside the per-file lock
+        if over_limit:
+            self.evict_analyses()
+        return 200, analysis
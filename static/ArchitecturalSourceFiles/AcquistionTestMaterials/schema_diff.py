@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Structural diff and patch for generated schemas
+
+Saving a schema used to resend the whole document. diff_schemas() instead
+produces JSON-Patch (RFC 6902) style operations between two versions of a
+schema. Entries of "fields" lists are matched by name rather than position,
+so adding, removing or editing one field yields a few small operations
+instead of a rewrite of every field after it.
+
+Versions are content hashes (schema_version), so client and server agree on
+a version without sharing a counter. A patch names the version it was made
+against; if the stored schema has changed since, apply_schema_patch refuses
+it with 409 so a concurrent edit is not silently overwritten.
+
+    ops = diff_schemas(last_saved, schema)
+    # PATCH /api/save-schema/<project_id>  {"baseVersion": ..., "operations": ops}
+    status, body = apply_schema_patch(stored_schema, base_version, ops)
+"""
+
+import copy
+import json
+import hashlib
+
+class PatchError(Exception):
+    """A patch operation could not be applied"""
+
+def schema_version(schema):
+    """Content hash of a schema, used as its version"""
+    return hashlib.sha256(json.dumps(schema, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+def escape_pointer(token):
+    """Escape one JSON Pointer segment"""
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+def unescape_pointer(token):
+    return token.replace("~1", "/").replace("~0", "~")
+
+def _named_entries(values):
+    """Names of a list of named objects, or None if the list is not one (or names repeat)"""
+    if not all(isinstance(value, dict) and isinstance(value.get("name"), str) for value in values):
+        return None
+    names = [value["name"] for value in values]
+    return names if len(set(names)) == len(names) else None
+
+def _diff_named_list(old, new, path, ops):
+    """Diff two lists of uniquely named objects by name; False if the kept entries were reordered"""
+    old_names = _named_entries(old)
+    new_names = _named_entries(new)
+    if old_names is None or new_names is None:
+        return False
+    new_set = set(new_names)
+    old_set = set(old_names)
+    kept_old_order = [name for name in old_names if name in new_set]
+    kept_new_order = [name for name in new_names if name in old_set]
+    if kept_old_order != kept_new_order:
+        return False
+
+    # Remove from the end so earlier indexes stay valid
+    for index in range(len(old) - 1, -1, -1):
+        if old_names[index] not in new_set:
+            ops.append({"op": "remove", "path": f"{path}/{index}"})
+    # With removals done, inserting in target order lands every entry at its final index
+    for index, name in enumerate(new_names):
+        if name not in old_set:
+            ops.append({"op": "add", "path": f"{path}/{index}", "value": copy.deepcopy(new[index])})
+    old_by_name = dict(zip(old_names, old))
+    for index, name in enumerate(new_names):
+        if name in old_set:
+            _diff(old_by_name[name], new[index], f"{path}/{index}", ops)
+    return True
+
+def _diff(old, new, path, ops):
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": f"{path}/{escape_pointer(key)}"})
+        for key, value in new.items():
+            child = f"{path}/{escape_pointer(key)}"
+            if key not in old:
+                ops.append({"op": "add", "path": child, "value": copy.deepcopy(value)})
+            else:
+                _diff(old[key], value, child, ops)
+    elif isinstance(old, list) and isinstance(new, list):
+        if old == new:
+            return
+        if _diff_named_list(old, new, path, ops):
+            return
+        if len(old) == len(new):
+            for index, (old_item, new_item) in enumerate(zip(old, new)):
+                _diff(old_item, new_item, f"{path}/{index}", ops)
+        else:
+            ops.append({"op": "replace", "path": path, "value": copy.deepcopy(new)})
+    elif old != new or type(old) is not type(new):
+        ops.append({"op": "replace", "path": path, "value": copy.deepcopy(new)})
+
+def diff_schemas(old, new):
+    """JSON-Patch operations that turn schema old into schema new"""
+    ops = []
+    _diff(old, new, "", ops)
+    return ops
+
+def _resolve(document, path):
+    """Return (parent, key) for a JSON Pointer"""
+    if not path.startswith("/"):
+        raise PatchError(f"Invalid path {path!r}")
+    tokens = [unescape_pointer(token) for token in path[1:].split("/")]
+    parent = document
+    for token in tokens[:-1]:
+        try:
+            parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+        except (KeyError, IndexError, ValueError, TypeError):
+            raise PatchError(f"Path {path!r} does not exist")
+    key = tokens[-1]
+    if isinstance(parent, list):
+        if key == "-":
+            return parent, len(parent)
+        try:
+            key = int(key)
+        except ValueError:
+            raise PatchError(f"Invalid array index in {path!r}")
+    elif not isinstance(parent, dict):
+        raise PatchError(f"Path {path!r} does not exist")
+    return parent, key
+
+def apply_patch(document, ops):
+    """Apply JSON-Patch add/remove/replace/test operations to a copy of document"""
+    document = copy.deepcopy(document)
+    for op in ops:
+        kind = op.get("op")
+        path = op.get("path", "")
+        if path == "":
+            if kind not in ("replace", "add"):
+                raise PatchError(f"Cannot {kind} the whole document")
+            document = copy.deepcopy(op["value"])
+            continue
+
+        parent, key = _resolve(document, path)
+        if kind == "add":
+            if isinstance(parent, list):
+                if not 0 <= key <= len(parent):
+                    raise PatchError(f"Index out of range in {path!r}")
+                parent.insert(key, copy.deepcopy(op["value"]))
+            else:
+                parent[key] = copy.deepcopy(op["value"])
+        elif kind in ("remove", "replace", "test"):
+            exists = (0 <= key < len(parent)) if isinstance(parent, list) else key in parent
+            if not exists:
+                raise PatchError(f"Path {path!r} does not exist")
+            if kind == "remove":
+                del parent[key]
+            elif kind == "replace":
+                parent[key] = copy.deepcopy(op["value"])
+            elif parent[key] != op.get("value"):
+                raise PatchError(f"Test failed at {path!r}")
+        else:
+            raise PatchError(f"Unsupported operation {kind!r}")
+    return document
+
+def apply_schema_patch(current, base_version, ops):
+    """
+    Apply a client's patch to the stored schema, checking it was made against
+    the stored version. Returns (status_code, body); on 200 body["schema"] is
+    the schema to store.
+    """
+    if current is None:
+        return 404, {"error": "No schema saved for this project yet"}
+    current_version = schema_version(current)
+    if base_version != current_version:
+        return 409, {"error": "Schema was changed since this patch was made", "version": current_version}
+    try:
+        updated = apply_patch(current, ops)
+    except (PatchError, KeyError) as e:
+        return 422, {"error": str(e)}
+    return 200, {"version": schema_version(updated), "schema": updated}
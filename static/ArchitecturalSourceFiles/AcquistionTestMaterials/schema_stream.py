@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Incremental delivery of generated schemas as NDJSON
+
+/api/generate-schema normally answers with the whole schema once Claude has
+finished writing it. In streaming mode ("stream": true in the request body)
+it answers with application/x-ndjson instead, one event per line, as soon as
+each part of the schema is complete:
+
+    {"type": "property", "key": "name", "value": "due_diligence_schema"}
+    {"type": "field", "index": 0, "field": {"name": "document_id", "type": "string", ...}}
+    ...
+    {"type": "done", "complete": true, "errors": []}
+
+Server side, the route wraps Claude's text stream:
+
+    with client.messages.stream(...) as claude_stream:
+        return Response(stream_schema_events(claude_stream.text_stream), mimetype=NDJSON_CONTENT_TYPE)
+
+(the generator must run inside the stream context, so real code nests it in a
+generator function). Client side, appdeux.py reads the events with
+read_schema_events() and prints fields as they arrive.
+"""
+
+import json
+
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+
+SCHEMA_FIELD_TYPES = {"string", "number", "integer", "boolean", "date", "array", "object"}
+
+def validate_field_definition(field, path="fields"):
+    """Check a schema field definition (and nested fields/items); returns a list of errors"""
+    if not isinstance(field, dict):
+        return [f"{path}: field is not an object"]
+
+    errors = []
+    name = field.get("name")
+    if not isinstance(name, str) or not name.strip():
+        errors.append(f"{path}: name is required")
+    else:
+        path = f"{path}.{name}"
+    field_type = field.get("type")
+    if field_type not in SCHEMA_FIELD_TYPES:
+        errors.append(f"{path}: type must be one of {sorted(SCHEMA_FIELD_TYPES)}, got {field_type!r}")
+    if "required" in field and not isinstance(field["required"], bool):
+        errors.append(f"{path}: required must be true or false")
+
+    for index, child in enumerate(field.get("fields") or []):
+        errors.extend(validate_field_definition(child, f"{path}.fields[{index}]"))
+    items = field.get("items")
+    if isinstance(items, dict):
+        for index, child in enumerate(items.get("fields") or []):
+            errors.extend(validate_field_definition(child, f"{path}.items.fields[{index}]"))
+    return errors
+
+class SchemaStreamScanner:
+    """
+    Fed a schema JSON document piece by piece, returns each top-level property
+    and each element of the top-level "fields" array as soon as it is complete.
+    Text before the first '{' (such as a markdown fence) and after the
+    document closes is ignored.
+    """
+
+    def __init__(self):
+        self.stack = []
+        self.in_string = False
+        self.escaped = False
+        self.started = False
+        self.done = False
+        self.properties = {}
+        self.fields = []
+        self.errors = []
+        self._key = None
+        self._key_chars = None
+        self._value = None
+        self._item = None
+        self._in_fields = False
+
+    def _append(self, char):
+        if self._item is not None:
+            self._item.append(char)
+        elif self._value is not None:
+            self._value.append(char)
+        elif self._key_chars is not None:
+            self._key_chars.append(char)
+
+    def _finish_value(self, events):
+        raw = "".join(self._value).strip()
+        self._value = None
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError as e:
+            self.errors.append(f"{self._key}: {e}")
+            return
+        self.properties[self._key] = value
+        events.append({"type": "property", "key": self._key, "value": value})
+
+    def _finish_item(self, events):
+        raw = "".join(self._item)
+        self._item = None
+        index = len(self.fields)
+        try:
+            field = json.loads(raw)
+        except json.JSONDecodeError as e:
+            self.errors.append(f"fields[{index}]: {e}")
+            return
+        errors = validate_field_definition(field, f"fields[{index}]")
+        if errors:
+            self.errors.extend(errors)
+            return
+        self.fields.append(field)
+        events.append({"type": "field", "index": index, "field": field})
+
+    def feed(self, text):
+        """Consume a chunk of text; returns the events completed in it"""
+        events = []
+        for char in text:
+            if self.done:
+                break
+            if not self.started:
+                if char == "{":
+                    self.started = True
+                    self.stack.append(char)
+                continue
+
+            depth = len(self.stack)
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                    if self._key_chars is not None and self._item is None and self._value is None:
+                        self._key = json.loads('"' + "".join(self._key_chars) + '"')
+                        self._key_chars = None
+                        continue
+                self._append(char)
+                continue
+
+            if char == '"':
+                self.in_string = True
+                if depth == 1 and self._value is None:
+                    self._key_chars = []
+                else:
+                    self._append(char)
+            elif char == ":" and depth == 1 and self._value is None:
+                if self._key == "fields":
+                    self._in_fields = True
+                else:
+                    self._value = []
+            elif char in "{[":
+                if self._in_fields and depth == 2 and char == "{":
+                    self._item = []
+                self._append(char)
+                self.stack.append(char)
+            elif char in "}]":
+                self.stack.pop()
+                if depth == 1:
+                    if self._value is not None:
+                        self._finish_value(events)
+                    self.done = True
+                    continue
+                self._append(char)
+                if self._item is not None and depth == 3:
+                    self._finish_item(events)
+                elif self._in_fields and depth == 2:
+                    self._in_fields = False
+            elif char == "," and depth == 1:
+                if self._value is not None:
+                    self._finish_value(events)
+            else:
+                self._append(char)
+        return events
+
+    @property
+    def complete(self):
+        """True once the outermost object has closed"""
+        return self.done
+
+    def result(self):
+        """The schema received so far"""
+        schema = dict(self.properties)
+        schema["fields"] = list(self.fields)
+        return schema
+
+def stream_schema_events(chunks):
+    """Turn a stream of schema JSON text into NDJSON event lines"""
+    scanner = SchemaStreamScanner()
+    for chunk in chunks:
+        for event in scanner.feed(chunk):
+            yield json.dumps(event) + "\n"
+    yield json.dumps({"type": "done", "complete": scanner.complete, "errors": scanner.errors}) + "\n"
+
+def read_schema_events(lines, on_event=None):
+    """
+    Assemble a schema from NDJSON event lines, calling on_event(event) for each.
+    Returns (schema, complete, errors).
+    """
+    schema = {"fields": []}
+    complete = False
+    errors = []
+    for line in lines:
+        if not line:
+            continue
+        event = json.loads(line)
+        if event.get("type") == "property":
+            schema[event["key"]] = event["value"]
+        elif event.get("type") == "field":
+            field_errors = validate_field_definition(event["field"], f"fields[{event.get('index')}]")
+            if field_errors:
+                errors.extend(field_errors)
+                continue
+            schema["fields"].append(event["field"])
+        elif event.get("type") == "done":
+            complete = event.get("complete", False)
+            errors.extend(event.get("errors", []))
+        elif event.get("type") == "error":
+            errors.append(event.get("error", "Unknown error"))
+        if on_event:
+            on_event(event)
+    return schema, complete, errors
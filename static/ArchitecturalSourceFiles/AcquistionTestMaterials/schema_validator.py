@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Compiled validation of extracted records against a generated schema
+
+Schemas such as static/data/schemas/avignon/schema.json describe records with
+nested "fields" (objects) and "items" (arrays). compile_schema() turns one
+into a validator once: required-field sets are precomputed and every field
+becomes a small type-checking closure, so validating a record is a handful of
+function calls with no schema lookups. Each field has two closures, a fast
+True/False check used for every record and a slower one that builds error
+paths, run only for records that fail.
+
+    validator = compile_schema(schema)
+    report = validator.validate_many(records)
+    report["errors"]   # [{"record": 3, "path": "$.risks[0].severity", "message": "..."}]
+
+The /api/validate-schema and /api/extract-document-data routes can use
+get_validator(schema), which keeps compiled validators for recently seen schemas.
+
+Usage:
+    python schema_validator.py schema.json records.json      # JSON list or NDJSON
+"""
+
+import re
+import sys
+import json
+import hashlib
+import argparse
+from datetime import date, datetime
+from collections import OrderedDict
+
+# Compiled validators kept by get_validator()
+VALIDATOR_CACHE_SIZE = 64
+
+# Errors collected per record before giving up on it
+MAX_ERRORS_PER_RECORD = 20
+
+DATE_FORMAT_TOKENS = [("YYYY", "%Y"), ("MM", "%m"), ("DD", "%d"), ("HH", "%H"), ("mm", "%M"), ("ss", "%S")]
+
+def date_checker(date_format):
+    """Return a predicate for date strings in a schema date format such as YYYY-MM-DD"""
+    if not date_format or date_format == "YYYY-MM-DD":
+        iso_date = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+        def is_date(value):
+            if not isinstance(value, str) or not iso_date.match(value):
+                return False
+            try:
+                date.fromisoformat(value)
+            except ValueError:
+                return False
+            return True
+        return is_date
+
+    pattern = date_format
+    for token, directive in DATE_FORMAT_TOKENS:
+        pattern = pattern.replace(token, directive)
+
+    def is_formatted_date(value):
+        if not isinstance(value, str):
+            return False
+        try:
+            datetime.strptime(value, pattern)
+        except ValueError:
+            return False
+        return True
+    return is_formatted_date
+
+def scalar_checker(field_type, field):
+    """Return (predicate, expected_description) for a scalar type"""
+    if field_type == "string":
+        return (lambda value: isinstance(value, str)), "string"
+    if field_type == "number":
+        return (lambda value: isinstance(value, (int, float)) and not isinstance(value, bool)), "number"
+    if field_type == "integer":
+        return (lambda value: isinstance(value, int) and not isinstance(value, bool)), "integer"
+    if field_type == "boolean":
+        return (lambda value: isinstance(value, bool)), "boolean"
+    if field_type == "date":
+        return date_checker(field.get("format")), f"date ({field.get('format') or 'YYYY-MM-DD'})"
+    # Unknown types accept anything rather than rejecting every record
+    return (lambda value: True), field_type
+
+def compile_field(field):
+    """Compile one field definition into (fast_check, full_check) closures"""
+    field_type = field.get("type", "string")
+
+    if field_type == "object":
+        return compile_object(field.get("fields") or [])
+
+    if field_type == "array":
+        items = field.get("items") or {}
+        if items.get("type", "object") == "object" and items.get("fields"):
+            item_fast, item_full = compile_object(items["fields"])
+        elif items:
+            item_fast, item_full = compile_field(items)
+        else:
+            item_fast, item_full = None, None
+
+        def array_fast(value):
+            if not isinstance(value, list):
+                return False
+            if item_fast is None:
+                return True
+            for item in value:
+                if item is not None and not item_fast(item):
+                    return False
+            return True
+
+        def array_full(value, path, errors):
+            if not isinstance(value, list):
+                errors.append((path, f"expected array, got {type(value).__name__}"))
+                return
+            if item_full is None:
+                return
+            for index, item in enumerate(value):
+                if item is not None and not item_fast(item):
+                    item_full(item, f"{path}[{index}]", errors)
+        return array_fast, array_full
+
+    predicate, expected = scalar_checker(field_type, field)
+    allowed = field.get("enum")
+    if allowed:
+        allowed = frozenset(allowed)
+
+        def scalar_fast(value):
+            return predicate(value) and value in allowed
+    else:
+        scalar_fast = predicate
+
+    def scalar_full(value, path, errors):
+        if not predicate(value):
+            errors.append((path, f"expected {expected}, got {value!r}"))
+        elif allowed and value not in allowed:
+            errors.append((path, f"must be one of {sorted(allowed)}, got {value!r}"))
+    return scalar_fast, scalar_full
+
+def compile_object(fields):
+    """Compile a list of field definitions into checks for one object"""
+    required = tuple(field["name"] for field in fields if field.get("required"))
+    checks = tuple((field["name"],) + compile_field(field) for field in fields if field.get("name"))
+
+    def object_fast(value):
+        if not isinstance(value, dict):
+            return False
+        for name in required:
+            if value.get(name) is None:
+                return False
+        for name, fast, _ in checks:
+            item = value.get(name)
+            if item is not None and not fast(item):
+                return False
+        return True
+
+    def object_full(value, path, errors):
+        if not isinstance(value, dict):
+            errors.append((path, f"expected object, got {type(value).__name__}"))
+            return
+        for name in required:
+            if value.get(name) is None:
+                errors.append((f"{path}.{name}", "required field is missing"))
+        for name, fast, full in checks:
+            if len(errors) >= MAX_ERRORS_PER_RECORD:
+                return
+            item = value.get(name)
+            if item is not None and not fast(item):
+                full(item, f"{path}.{name}", errors)
+    return object_fast, object_full
+
+class CompiledSchema:
+    """Validator for records of one schema"""
+
+    def __init__(self, schema):
+        self.name = schema.get("name")
+        self.fast, self.full = compile_object(schema.get("fields") or [])
+
+    def is_valid(self, record):
+        return self.fast(record)
+
+    def validate(self, record):
+        """Return [(json_path, message)] for one record; empty when valid"""
+        if self.fast(record):
+            return []
+        errors = []
+        self.full(record, "$", errors)
+        return errors
+
+    def validate_many(self, records):
+        """Validate a batch; returns {"total", "valid", "invalid", "errors"}"""
+        fast = self.fast
+        full = self.full
+        errors = []
+        invalid = 0
+        total = 0
+        for index, record in enumerate(records):
+            total += 1
+            if fast(record):
+                continue
+            invalid += 1
+            record_errors = []
+            full(record, "$", record_errors)
+            errors.extend({"record": index, "path": path, "message": message} for path, message in record_errors)
+        return {"total": total, "valid": total - invalid, "invalid": invalid, "errors": errors}
+
+def compile_schema(schema):
+    """Compile a schema dict into a CompiledSchema"""
+    return CompiledSchema(schema)
+
+_validators = OrderedDict()
+
+def get_validator(schema):
+    """Compiled validator for a schema, reused across calls with the same schema"""
+    key = hashlib.sha1(json.dumps(schema, sort_keys=True).encode("utf-8")).hexdigest()
+    validator = _validators.get(key)
+    if validator is None:
+        validator = compile_schema(schema)
+        _validators[key] = validator
+        if len(_validators) > VALIDATOR_CACHE_SIZE:
+            _validators.popitem(last=False)
+    else:
+        _validators.move_to_end(key)
+    return validator
+
+def load_records(path):
+    """Records from a JSON list (or single object) or an NDJSON file"""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    return data if isinstance(data, list) else [data]
+
+def main():
+    """Main function to validate a records file against a schema"""
+    parser = argparse.ArgumentParser(description="Validate extracted records against a schema")
+    parser.add_argument("schema", help="Schema JSON file")
+    parser.add_argument("records", help="Records file (JSON list or NDJSON)")
+    parser.add_argument("--max-errors", type=int, default=50, help="Errors to print (default: 50)")
+    args = parser.parse_args()
+
+    try:
+        with open(args.schema, "r", encoding="utf-8") as f:
+            validator = compile_schema(json.load(f))
+        records = load_records(args.records)
+    except (OSError, ValueError) as e:
+        print(f"Error: {str(e)}")
+        sys.exit(1)
+
+    report = validator.validate_many(records)
+    print(f"{report['valid']} of {report['total']} records valid")
+    for error in report["errors"][:args.max_errors]:
+        print(f"  record {error['record']}: {error['path']}: {error['message']}")
+    if len(report["errors"]) > args.max_errors:
+        print(f"  ... and {len(report['errors']) - args.max_errors} more errors")
+    sys.exit(1 if report["invalid"] else 0)
+
+if __name__ == "__main__":
+    main()
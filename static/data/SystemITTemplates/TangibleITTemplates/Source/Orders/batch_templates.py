@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Batch Template Conversion
+
+Converts every order .docx under one or more directories with one replacement
+profile, several templates at a time, without any prompts. Each
+template is processed exactly as templatemaker.py does it: a _processed copy
+next to the source, a copy in Foundational/ and the source archived to
+ArchivedSource/ (see templatemaker.get_paths_for_file). Templates whose source
+and replacements are unchanged since the last build (build_manifest.py) are
+skipped unless --force is given.
+
+The profile is a name from Source/Profiles (default: "default") or the path
+of a profile saved with `python templatemaker.py --save-profile profile.json`;
+see replacement_profiles.py. It is validated and compiled once, and every
+worker loads the compiled matcher instead of building it again.
+
+Usage:
+    python batch_templates.py . ../SupportPackage --profile ups
+    python batch_templates.py .. --workers 8 --report report.json
+    python batch_templates.py . ../SupportPackage --force --dedupe-archives
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import templatemaker
+from build_manifest import BuildManifest, file_sha256, dedupe_archives
+from replacement_profiles import DEFAULT_PROFILE, ProfileError, get_profile, load_artifact
+
+DEFAULT_WORKERS = 4
+
+# Phases loaded once per worker process by init_worker(), and the manifest it was given
+_phases = None
+_manifest = None
+
+def find_templates(directories):
+    """Every source .docx under the directories, skipping Word lock files and _processed outputs"""
+    files = []
+    for directory in directories:
+        for root, dirs, names in os.walk(os.path.abspath(directory)):
+            dirs.sort()
+            for name in sorted(names):
+                if not name.lower().endswith('.docx') or name.startswith('~'):
+                    continue
+                if name[:-len('.docx')].endswith('_processed'):
+                    continue
+                path = os.path.join(root, name)
+                if path not in files:
+                    files.append(path)
+    return files
+
+def init_worker(artifact_path, fingerprint, profile_name, manifest):
+    global _phases, _manifest
+    # The parent compiled the profile already, so workers only load its artifact
+    _phases = load_artifact(artifact_path, fingerprint)
+    if _phases is None:
+        # The artifact could not be written; compile the profile here instead
+        _phases = get_profile(profile_name).phases
+    _manifest = manifest
+
+def empty_report(file_path):
+    return {
+        'file': file_path,
+        'error': None,
+        'skipped': False,
+        'replacements': {},
+        'total_replacements': 0,
+        'processed_path': None,
+        'foundational_path': None,
+        'archive_path': None,
+        'log': '',
+        'seconds': 0
+    }
+
+def convert_one(file_path, source_hash):
+    """Convert one template in a worker process; returns its report entry"""
+    started = time.time()
+    report = empty_report(file_path)
+    # Output is kept with the report instead of interleaving with other workers
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        try:
+            report.update(templatemaker.convert_template(file_path, _phases, _manifest, source_hash))
+            report['total_replacements'] = sum(report['replacements'].values())
+        except Exception as e:
+            print(f"Error: {str(e)}")
+            report['error'] = str(e)
+    report['log'] = log.getvalue()
+    report['seconds'] = time.time() - started
+    return report
+
+def run_batch(files, profile_name=DEFAULT_PROFILE, workers=DEFAULT_WORKERS, manifest=None, force=False):
+    """
+    Convert every file that changed since the last build in a process pool,
+    recording each conversion in the manifest. Returns the per-file reports in
+    file order.
+    """
+    manifest = manifest or BuildManifest(templatemaker.MANIFEST_PATH)
+    profile = get_profile(profile_name)
+    fingerprint = profile.fingerprint
+
+    reports = {}
+    pending = {}
+    for path in files:
+        source_hash = file_sha256(path)
+        if not force and manifest.is_current(path, source_hash, fingerprint):
+            report = empty_report(path)
+            report.update(manifest.entry(path), skipped=True)
+            reports[path] = report
+            print(f"unchanged: {os.path.relpath(path)}")
+        else:
+            pending[path] = source_hash
+    if not pending:
+        return [reports[path] for path in files]
+
+    # Compile (or load) the matcher once here so the workers only load it
+    profile.phases
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(pending)),
+                             initializer=init_worker, initargs=(profile.artifact_path, fingerprint, profile_name, manifest)) as executor:
+        futures = {executor.submit(convert_one, path, source_hash): path for path, source_hash in pending.items()}
+        for number, future in enumerate(as_completed(futures), 1):
+            path = futures[future]
+            try:
+                report = future.result()
+            except Exception as e:
+                report = empty_report(path)
+                report['error'] = str(e)
+            reports[path] = report
+            name = os.path.relpath(path)
+            if report['error']:
+                print(f"[{number}/{len(pending)}] {name}: FAILED - {report['error']}")
+                continue
+            print(f"[{number}/{len(pending)}] {name}: {report['total_replacements']} replacements "
+                  f"in {report['seconds']:.1f}s -> {report['foundational_path']}")
+            # Saved after every file so an interrupted batch keeps what it finished
+            manifest.record(path, pending[path], fingerprint, report)
+            manifest.save()
+    return [reports[path] for path in files]
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Convert every order template under the given directories")
+    parser.add_argument("directories", nargs="+", help="Directories to search for .docx templates (recursively)")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE,
+                        help=f"Replacement profile name or .json path (default: {DEFAULT_PROFILE})")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Templates converted at the same time (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--report", help="Write the per-file report to this JSON file")
+    parser.add_argument("--force", action="store_true", help="Convert every template, even unchanged ones")
+    parser.add_argument("--dedupe-archives", action="store_true",
+                        help="First delete archived sources that duplicate an older archived copy")
+    args = parser.parse_args()
+
+    for directory in args.directories:
+        if not os.path.isdir(directory):
+            print(f"Error: Directory '{directory}' does not exist.")
+            sys.exit(1)
+
+    # Check the profile once here rather than failing in every worker
+    try:
+        get_profile(args.profile)
+    except ProfileError as e:
+        print(f"Error reading profile: {str(e)}")
+        sys.exit(1)
+
+    files = find_templates(args.directories)
+    if not files:
+        print("No .docx templates found")
+        sys.exit(1)
+
+    manifest = BuildManifest(templatemaker.MANIFEST_PATH)
+    if args.dedupe_archives:
+        removed = dedupe_archives(templatemaker.ARCHIVE_BASE_PATH, manifest)
+        manifest.save()
+        print(f"Removed {len(removed)} duplicate archive copies from {templatemaker.ARCHIVE_BASE_PATH}")
+
+    print(f"Checking {len(files)} templates, converting up to {max(1, args.workers)} at a time")
+    started = time.time()
+    reports = run_batch(files, args.profile, max(1, args.workers), manifest, args.force)
+    failed = [report for report in reports if report['error']]
+    skipped = [report for report in reports if report['skipped']]
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, indent=2)
+        print(f"Report written to {args.report}")
+
+    converted = len(reports) - len(failed) - len(skipped)
+    print(f"\n{converted} templates converted, {len(skipped)} unchanged, {len(failed)} failed "
+          f"in {time.time() - started:.1f}s")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
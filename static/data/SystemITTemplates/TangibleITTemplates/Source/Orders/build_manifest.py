@@ -0,0 +1,190 @@
+"""
+Build manifest for incremental template conversion
+
+Records, for each converted template, the SHA-256 of the source .docx and a
+fingerprint of the replacement set it was converted with: the exact, wildcard
+and cleanup dictionaries of its replacement profile (ReplacementProfile.replacements
+in replacement_profiles.py, of which variables_config.py is only a view). A
+template whose source and fingerprint both match its entry, and whose outputs
+still exist, does not need converting again.
+
+The manifest also maps source hashes to their copy in ArchivedSource/, so an
+unchanged source is archived once rather than on every run:
+
+    manifest = BuildManifest(MANIFEST_PATH)
+    fingerprint = replacement_fingerprint(exact, wildcard, cleanup)
+    source_hash = file_sha256(path)
+    if not manifest.is_current(path, source_hash, fingerprint):
+        ...
+        manifest.record(path, source_hash, fingerprint, report)
+    manifest.save()
+"""
+
+import os
+import re
+import json
+import hashlib
+import tempfile
+from datetime import datetime
+
+from ooxml_templates import ENGINE_VERSION
+
+# templatemaker.get_paths_for_file names archive copies <stem>_%Y%m%d_%H%M%S.docx
+ARCHIVE_TIMESTAMP_PATTERN = re.compile(r"_(\d{8}_\d{6})\.docx$", re.IGNORECASE)
+
+def file_sha256(path):
+    """SHA-256 of a file, read in 1 MB blocks"""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+def replacement_fingerprint(exact_replacements, wildcard_replacements=None, cleanup_replacements=None):
+    """Hash of a replacement set; dictionary order is kept since it can change the result"""
+    data = {
+        "engine": ENGINE_VERSION,
+        "exact": list((exact_replacements or {}).items()),
+        "wildcard": list((wildcard_replacements or {}).items()),
+        "cleanup": list((cleanup_replacements or {}).items())
+    }
+    return hashlib.sha256(json.dumps(data, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+class BuildManifest:
+    """Source and replacement fingerprints of converted templates, kept in one JSON file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.templates = {}
+        self.archives = {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.templates = data.get("templates", {})
+            self.archives = data.get("archives", {})
+        except (OSError, ValueError):
+            pass
+
+    def _key(self, file_path):
+        # Relative to the manifest so the tree can be moved or checked out elsewhere
+        return os.path.relpath(os.path.abspath(file_path), os.path.dirname(os.path.abspath(self.path)))
+
+    def _absolute(self, path):
+        return os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(self.path)), path))
+
+    def is_current(self, file_path, source_hash, fingerprint):
+        """True if file_path was last converted from the same source with the same replacements"""
+        entry = self.templates.get(self._key(file_path))
+        if not entry:
+            return False
+        if entry.get("source_sha256") != source_hash or entry.get("replacements_sha256") != fingerprint:
+            return False
+        outputs = [entry.get("processed_path"), entry.get("foundational_path")]
+        return all(path and os.path.exists(self._absolute(path)) for path in outputs)
+
+    def entry(self, file_path):
+        """The recorded outputs of a template (absolute paths), or None"""
+        entry = self.templates.get(self._key(file_path))
+        if not entry:
+            return None
+        entry = dict(entry)
+        for name in ("processed_path", "foundational_path", "archive_path"):
+            if entry.get(name):
+                entry[name] = self._absolute(entry[name])
+        return entry
+
+    def archived_copy(self, source_hash, archive_dir=None, file_stem=None):
+        """
+        An existing archive copy with this content, or None. Archives from
+        before the manifest are found by hashing the <stem>_*.docx files in
+        archive_dir.
+        """
+        path = self.archives.get(source_hash)
+        if path and os.path.exists(self._absolute(path)):
+            return self._absolute(path)
+        if not archive_dir or not file_stem or not os.path.isdir(archive_dir):
+            return None
+
+        for name in sorted(os.listdir(archive_dir)):
+            if not (name.startswith(f"{file_stem}_") and name.endswith(".docx")):
+                continue
+            candidate = os.path.join(archive_dir, name)
+            try:
+                if file_sha256(candidate) == source_hash:
+                    self.archives[source_hash] = self._key(candidate)
+                    return candidate
+            except OSError:
+                continue
+        return None
+
+    def record(self, file_path, source_hash, fingerprint, report):
+        """Remember a successful conversion described by a convert_template() report"""
+        entry = {
+            "source_sha256": source_hash,
+            "replacements_sha256": fingerprint,
+            "built_at": datetime.now().isoformat(timespec="seconds")
+        }
+        for name in ("processed_path", "foundational_path", "archive_path"):
+            entry[name] = self._key(report[name]) if report.get(name) else None
+        self.templates[self._key(file_path)] = entry
+        if report.get("archive_path"):
+            self.archives[source_hash] = self._key(report["archive_path"])
+
+    def replace_archive(self, old_path, new_path, source_hash):
+        """Point everything recorded for an archive copy at another copy"""
+        old_key = self._key(old_path)
+        new_key = self._key(new_path)
+        for entry in self.templates.values():
+            if entry.get("archive_path") == old_key:
+                entry["archive_path"] = new_key
+        if self.archives.get(source_hash) in (None, old_key):
+            self.archives[source_hash] = new_key
+
+    def save(self):
+        """Write the manifest atomically, so an interrupted run cannot leave it half written"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({"templates": self.templates, "archives": self.archives}, f, indent=2, sort_keys=True)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+def archive_time(path):
+    """
+    When an archive copy was made, from the timestamp in its name, else its
+    ctime (shutil.copy2 keeps the source's mtime, so that says nothing).
+    """
+    match = ARCHIVE_TIMESTAMP_PATTERN.search(os.path.basename(path))
+    if match:
+        try:
+            return datetime.strptime(match.group(1), "%Y%m%d_%H%M%S").timestamp()
+        except ValueError:
+            pass
+    return os.path.getctime(path)
+
+def dedupe_archives(archive_root, manifest=None):
+    """
+    Delete archive copies whose content duplicates an earlier copy in the same
+    directory, keeping the earliest by archive_time(). Returns the paths
+    removed; manifest entries pointing at a removed copy are pointed at the
+    copy kept.
+    """
+    removed = []
+    for root, dirs, names in os.walk(archive_root):
+        kept = {}
+        paths = [os.path.join(root, name) for name in names
+                 if name.lower().endswith(".docx") and not name.startswith("~")]
+        for path in sorted(paths, key=lambda path: (archive_time(path), path)):
+            digest = file_sha256(path)
+            if digest not in kept:
+                kept[digest] = path
+                continue
+            os.remove(path)
+            removed.append(path)
+            if manifest is not None:
+                manifest.replace_archive(path, kept[digest], digest)
+    return removed
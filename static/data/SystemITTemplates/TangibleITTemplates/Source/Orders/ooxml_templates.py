@@ -0,0 +1,455 @@
+"""
+Headless find/replace for .docx templates
+
+Works directly on the OOXML inside the .docx zip, so it needs neither Word nor
+Windows. Word splits visible text across many <w:r> runs ("[", "nke_entname_lu",
+"], " are three runs in our templates), so each paragraph's <w:t> text is
+joined before matching; a replacement is written into the run where the match
+starts and the matched text is removed from the runs it spilled into, which
+keeps that run's formatting just as Word's Replace All does.
+
+The three replacement phases of templatemaker.py (exact, wildcard, cleanup)
+are applied in one pass over word/document.xml and every header and footer:
+
+    counts = process_docx("template.docx", "template_processed.docx",
+                          exact_replacements, wildcard_replacements, cleanup_replacements)
+
+Each phase is one scan of the text however many search strings it has: exact
+and cleanup strings are found together by an Aho-Corasick automaton, and the
+wildcard patterns are joined into one regex. Exact replacements may also be an
+ordered list of dictionaries (PlaceholderMappings.ordered_replacements), where
+earlier dictionaries take precedence. Unlike replacing with each dictionary in
+turn, replacement text is not searched again, so a later key never matches
+inside or across the edge of an earlier replacement or deletion.
+
+Matching follows the Word options templatemaker used: case-sensitive, whole
+words for single-word search text, straight quotes also matching curly ones
+in exact mode (and replacements keeping them curly), and Word wildcard syntax (_@, *, ?, [...], {n,m}, <, >, \\1).
+"""
+
+import re
+import html
+import bisect
+import zipfile
+from collections import deque
+
+# Bumped when a change here changes the converted output, so build manifests
+# (build_manifest.py) rebuild templates converted by an older version
+ENGINE_VERSION = 2
+
+# Parts of the document searched, like Word's main story, headers and footers
+TEXT_PART_PATTERN = re.compile(r"^word/(document|header\d*|footer\d*)\.xml$")
+
+# <w:t> text nodes, plus the tags that separate runs of text that must not be
+# matched across: paragraph boundaries, tabs and breaks
+TOKEN_PATTERN = re.compile(
+    r"<w:t(?=[\s>/])([^>]*?)(?:/>|>(.*?)</w:t>)"
+    r"|</w:p>|<w:p(?=[\s>/])|<w:tab(?=[\s/>])|<w:br(?=[\s/>])|<w:cr(?=[\s/>])",
+    re.S
+)
+
+CURLY_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+
+def smarten_quotes(text):
+    """Curl straight quotes the way Word's smart-quote AutoFormat does"""
+    result = []
+    for index, char in enumerate(text):
+        if char in "\"'":
+            opening = index == 0 or text[index - 1].isspace() or text[index - 1] in "([{"
+            if char == '"':
+                char = "“" if opening else "”"
+            else:
+                char = "‘" if opening else "’"
+        result.append(char)
+    return "".join(result)
+
+def word_wildcard_to_regex(pattern):
+    """Translate a Word wildcard search string into a Python regex"""
+    out = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\" and i + 1 < len(pattern):
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+            continue
+        if char == "[":
+            end = pattern.find("]", i + 2)
+            if end == -1:
+                raise ValueError(f"Unclosed [ in wildcard pattern {pattern!r}")
+            body = pattern[i + 1:end]
+            negate = body.startswith("!")
+            if negate:
+                body = body[1:]
+            members = "".join(ch if ch == "-" else re.escape(ch) for ch in body)
+            out.append(f"[{'^' if negate else ''}{members}]")
+            i = end + 1
+            continue
+        if char == "{":
+            end = pattern.find("}", i)
+            if end == -1:
+                raise ValueError(f"Unclosed {{ in wildcard pattern {pattern!r}")
+            # Word writes {n;m} in some locales
+            out.append("{" + pattern[i + 1:end].replace(";", ",") + "}")
+            i = end + 1
+            continue
+        if char == "?":
+            out.append(".")
+        elif char == "*":
+            out.append(".*?")
+        elif char == "@":
+            out.append("+")
+        elif char == "<":
+            out.append(r"\b(?=\w)")
+        elif char == ">":
+            out.append(r"\b(?<=\w)")
+        elif char in "()":
+            out.append(char)
+        else:
+            out.append(re.escape(char))
+        i += 1
+    return "".join(out)
+
+class WordReplacement:
+    """
+    A Word wildcard replacement (\\1, ^&) as a function of the match. A class
+    rather than a closure so compiled phases can be pickled. group_offset is
+    the number of regex groups in front of the pattern's own when it is part
+    of a combined regex.
+    """
+
+    def __init__(self, replace_text, group_offset=0):
+        self.pieces = re.split(r"(\\\d|\^&)", replace_text)
+        self.group_offset = group_offset
+
+    def __call__(self, match):
+        result = []
+        for piece in self.pieces:
+            if piece == "^&":
+                result.append(match.group(self.group_offset))
+            elif re.fullmatch(r"\\\d", piece):
+                result.append(match.group(self.group_offset + int(piece[1])) or "")
+            else:
+                result.append(piece)
+        return "".join(result)
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over a list of keywords. iter_matches() reports
+    every occurrence of every keyword, overlapping ones included, in a single
+    left-to-right pass over the text however many keywords there are.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = list(keywords)
+        self.lengths = [len(keyword) for keyword in self.keywords]
+        goto = [{}]
+        output = [()]
+        for index, keyword in enumerate(self.keywords):
+            state = 0
+            for char in keyword:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    output.append(())
+                state = next_state
+            if state:
+                output[state] += (index,)
+
+        # Breadth first, so a state's failure link is finished before its children need it
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = goto[fallback].get(char, 0)
+                output[next_state] += output[fail[next_state]]
+
+        self.goto = goto
+        self.fail = fail
+        self.output = output
+
+    def iter_matches(self, text):
+        """Yield (start, end, keyword_index) for each occurrence, ordered by end"""
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        lengths = self.lengths
+        state = 0
+        for end, char in enumerate(text, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                for index in output[state]:
+                    yield end - lengths[index], end, index
+
+def is_word_char(char):
+    return char.isalnum() or char == "_"
+
+class ExactReplacer:
+    """
+    One exact-text phase: all search strings of an ordered list of
+    replacement dictionaries, found with a single KeywordAutomaton pass.
+
+    Earlier dictionaries take precedence: a match from a later dictionary is
+    only used where it does not overlap one from an earlier dictionary
+    (PlaceholderMappings.ordered_replacements relies on this: its possessive
+    forms come in the first dictionary, so "Service Provider's" is replaced
+    before "Service Provider" can be). Within one dictionary the leftmost
+    match wins, and of matches starting at the same place the longest.
+
+    Replacement text is never searched again, so a later key never matches
+    inside or across the edge of an earlier replacement (or a deletion). The
+    result is the same as replacing with each dictionary in turn only when no
+    later key could match there: [{"[a]": "[b]"}, {"[b]": "B"}] turns
+    "[a] [b]" into "[b] B", and [{"b": ""}, {'""': "X"}] leaves '"b"' as '""',
+    where replacing in turn would give "B B" and "X".
+    """
+
+    def __init__(self, replacement_groups):
+        if isinstance(replacement_groups, dict):
+            replacement_groups = [replacement_groups]
+        keywords = []
+        self.values = []
+        self.priorities = []
+        self.whole_word = []
+        seen = set()
+        for priority, replacements in enumerate(replacement_groups):
+            for find_text, replace_text in replacements.items():
+                keyword = find_text.translate(CURLY_QUOTES)
+                if not keyword or keyword in seen:
+                    continue
+                seen.add(keyword)
+                keywords.append(keyword)
+                self.values.append(replace_text)
+                self.priorities.append(priority)
+                # Word only honours "whole word" for search text that is a single word
+                self.whole_word.append(bool(re.fullmatch(r"\w+", keyword)))
+        self.automaton = KeywordAutomaton(keywords)
+        self.single_group = len(set(self.priorities)) <= 1
+
+    def find(self, text):
+        """Return the (start, end, replacement) edits for text, in order"""
+        straight = text.translate(CURLY_QUOTES)
+        priorities = self.priorities
+        candidates = [(priorities[index], start, start - end, index)
+                      for start, end, index in self.automaton.iter_matches(straight)]
+        if not candidates:
+            return []
+        candidates.sort()
+
+        starts = []
+        ends = []
+        chosen = []
+
+        # A replacement made for an earlier dictionary changes what is next to a
+        # later match, so whole-word checks look at the replacement text there
+        def char_before(start, position, priority):
+            while position and ends[position - 1] == start and priorities[chosen[position - 1]] < priority:
+                value = self.values[chosen[position - 1]]
+                if value:
+                    return value[-1]
+                position -= 1
+                start = starts[position]
+            return straight[start - 1] if start else ""
+
+        def char_after(end, position, priority):
+            while position < len(starts) and starts[position] == end and priorities[chosen[position]] < priority:
+                value = self.values[chosen[position]]
+                if value:
+                    return value[0]
+                end = ends[position]
+                position += 1
+            return straight[end] if end < len(straight) else ""
+
+        for priority, start, negative_length, index in candidates:
+            end = start - negative_length
+            if self.single_group:
+                if starts and start < ends[-1]:
+                    continue
+                position = len(starts)
+            else:
+                position = bisect.bisect_right(starts, start)
+                if (position and ends[position - 1] > start) or (position < len(starts) and starts[position] < end):
+                    continue
+            if self.whole_word[index] and (is_word_char(char_before(start, position, priority))
+                                           or is_word_char(char_after(end, position, priority))):
+                continue
+            starts.insert(position, start)
+            ends.insert(position, end)
+            chosen.insert(position, index)
+
+        edits = []
+        for start, end, index in zip(starts, ends, chosen):
+            value = self.values[index]
+            # Text that used curly quotes keeps them, as Word's replace does
+            if text[start:end] != straight[start:end]:
+                value = smarten_quotes(value)
+            edits.append((start, end, value))
+        return edits
+
+class WildcardReplacer:
+    """
+    One phase for all Word wildcard replacements: the patterns are joined into
+    a single alternation, earlier patterns winning where several match at the
+    same place.
+    """
+
+    def __init__(self, replacements):
+        alternatives = []
+        self.expanders = {}
+        group_count = 0
+        for number, (find_text, replace_text) in enumerate(replacements.items()):
+            pattern = word_wildcard_to_regex(find_text)
+            name = f"w{number}"
+            # Each pattern's own groups are numbered after its wrapping group
+            self.expanders[name] = WordReplacement(replace_text, group_count + 1)
+            group_count += 1 + re.compile(pattern).groups
+            alternatives.append(f"(?P<{name}>{pattern})")
+        self.regex = re.compile("|".join(alternatives))
+
+    def find(self, text):
+        """Return the (start, end, replacement) edits for text, in order"""
+        edits = []
+        for match in self.regex.finditer(text):
+            if match.end() > match.start():
+                edits.append((match.start(), match.end(), self.expanders[match.lastgroup](match)))
+        return edits
+
+def compile_phases(exact_replacements, wildcard_replacements=None, cleanup_replacements=None):
+    """
+    Compile the replacements into the ordered phases replace_in_group applies.
+    exact_replacements (and cleanup_replacements) may be one dictionary or a
+    list of dictionaries applied in order, such as
+    PlaceholderMappings.ordered_replacements; each phase is a single scan of
+    the text however many search strings it has.
+    """
+    phases = []
+    if exact_replacements:
+        phases.append(ExactReplacer(exact_replacements))
+    if wildcard_replacements:
+        phases.append(WildcardReplacer(wildcard_replacements))
+    if cleanup_replacements:
+        phases.append(ExactReplacer(cleanup_replacements))
+    return phases
+
+class TextNode:
+    """One <w:t> element: its position in the XML and its (unescaped) text"""
+
+    __slots__ = ("start", "end", "attrs", "text", "changed")
+
+    def __init__(self, start, end, attrs, text):
+        self.start = start
+        self.end = end
+        self.attrs = attrs
+        self.text = text
+        self.changed = False
+
+    def to_xml(self):
+        attrs = self.attrs.rstrip("/")
+        if self.text[:1].isspace() or self.text[-1:].isspace():
+            if "xml:space" not in attrs:
+                attrs += ' xml:space="preserve"'
+        return f"<w:t{attrs}>{html.escape(self.text, quote=False)}</w:t>"
+
+def text_groups(xml):
+    """Split a part's text nodes into groups that can be matched as one string"""
+    groups = []
+    current = []
+    for match in TOKEN_PATTERN.finditer(xml):
+        if match.group(1) is not None:
+            current.append(TextNode(match.start(), match.end(), match.group(1) or "",
+                                    html.unescape(match.group(2) or "")))
+        elif current:
+            groups.append(current)
+            current = []
+    if current:
+        groups.append(current)
+    return groups
+
+def replace_in_group(nodes, phases):
+    """Apply every phase to one group of text nodes; returns the number of replacements"""
+    count = 0
+    for phase in phases:
+        text = "".join(node.text for node in nodes)
+        edits = phase.find(text)
+        if not edits:
+            continue
+
+        starts = []
+        position = 0
+        for node in nodes:
+            starts.append(position)
+            position += len(node.text)
+
+        # Work backwards so text before each match keeps its offsets
+        node_index = len(nodes) - 1
+        for start, end, replacement in reversed(edits):
+            while starts[node_index] > start:
+                node_index -= 1
+            first = node_index
+            last = first
+            while last + 1 < len(nodes) and starts[last + 1] < end:
+                last += 1
+
+            first_node = nodes[first]
+            prefix = first_node.text[:start - starts[first]]
+            suffix = nodes[last].text[end - starts[last]:]
+            if first == last:
+                first_node.text = prefix + replacement + suffix
+            else:
+                first_node.text = prefix + replacement
+                for middle in range(first + 1, last):
+                    nodes[middle].text = ""
+                    nodes[middle].changed = True
+                nodes[last].text = suffix
+                nodes[last].changed = True
+            first_node.changed = True
+            count += 1
+    return count
+
+def replace_in_xml(xml, phases):
+    """Apply the phases to one XML part; returns (new_xml, replacement_count)"""
+    groups = text_groups(xml)
+    count = sum(replace_in_group(nodes, phases) for nodes in groups)
+    if not count:
+        return xml, 0
+
+    pieces = []
+    position = 0
+    for nodes in groups:
+        for node in nodes:
+            if node.changed:
+                pieces.append(xml[position:node.start])
+                pieces.append(node.to_xml())
+                position = node.end
+    pieces.append(xml[position:])
+    return "".join(pieces), count
+
+def process_docx(source_path, output_path, exact_replacements, wildcard_replacements=None,
+                 cleanup_replacements=None, phases=None):
+    """
+    Write a copy of source_path with all replacements applied to output_path.
+    Returns {part_name: replacement_count} for the parts that changed.
+    """
+    if phases is None:
+        phases = compile_phases(exact_replacements, wildcard_replacements, cleanup_replacements)
+    counts = {}
+    with zipfile.ZipFile(source_path) as source, \
+            zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as output:
+        for item in source.infolist():
+            data = source.read(item.filename)
+            if TEXT_PART_PATTERN.match(item.filename):
+                xml, count = replace_in_xml(data.decode("utf-8"), phases)
+                if count:
+                    counts[item.filename] = count
+                    data = xml.encode("utf-8")
+            output.writestr(item, data, compress_type=item.compress_type)
+    return counts
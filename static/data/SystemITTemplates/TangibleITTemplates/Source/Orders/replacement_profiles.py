@@ -0,0 +1,246 @@
+"""
+Replacement profiles for template conversion
+
+A profile declares, as JSON data, the replacements templatemaker applies to
+turn an order into a template. Profiles live in Source/Profiles (or
+TEMPLATE_PROFILES_PATH) as <name>.json, and one may extend another; every
+profile except "default" extends "default" unless it says otherwise:
+
+    {
+      "extends": "default",
+      "description": "UPS customer templates",
+      "terms": {"customer_terms": ["Company", "Client", "Customer"]},
+      "custom_replacements": {"United Parcel Service, Inc.": "{{CustomerName}}"}
+    }
+
+Keys (dictionaries are merged over the ones inherited):
+    exact_replacements      search text -> replacement, applied first
+    term_categories         category -> {"variable", "marker", "terms"}; each term's
+                            ("term") and (the "term") forms get the category's marker,
+                            which a wildcard replacement then turns into {{variable}}
+    terms                   category -> term list, replacing the inherited list
+    custom_replacements     search text -> replacement, added after the term categories
+    wildcard_replacements   Word wildcard pattern -> replacement
+    cleanup_replacements    search text -> replacement, applied last
+
+get_profile() validates a profile once and returns a ReplacementProfile. Its
+compiled matcher (ooxml_templates phases) is only built when first used, and
+is pickled to Profiles/.profile_cache keyed by the replacement fingerprint, so
+later runs and conversion workers load it instead of compiling again. Copies
+made with with_terms() (templatemaker's interactive terms) are compiled in
+memory only, so one-off term lists do not pile up in the cache.
+"""
+
+import os
+import re
+import json
+import pickle
+import tempfile
+
+from ooxml_templates import ENGINE_VERSION, compile_phases, word_wildcard_to_regex
+from build_manifest import replacement_fingerprint
+
+PROFILES_PATH = os.getenv("TEMPLATE_PROFILES_PATH",
+                          os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Profiles')))
+PROFILE_CACHE_PATH = os.getenv("TEMPLATE_PROFILE_CACHE_PATH", os.path.join(PROFILES_PATH, ".profile_cache"))
+
+DEFAULT_PROFILE = "default"
+
+REPLACEMENT_KEYS = ("exact_replacements", "custom_replacements", "wildcard_replacements", "cleanup_replacements")
+PROFILE_KEYS = {"extends", "description", "term_categories", "terms"} | set(REPLACEMENT_KEYS)
+
+class ProfileError(ValueError):
+    """A profile could not be found or is not valid"""
+
+def add_variations(terms):
+    """Generate variations with and without "the" """
+    variations = []
+    for term in terms:
+        variations.append(f'("{term}")')
+        variations.append(f'(the "{term}")')
+    return variations
+
+def profile_path(name):
+    """Path of a profile given by name, or by the path of its .json file"""
+    if name.endswith(".json") or os.sep in name or "/" in name:
+        return os.path.abspath(name)
+    return os.path.join(PROFILES_PATH, f"{name}.json")
+
+def load_profile_data(name, _seen=()):
+    """Read a profile and everything it extends into one merged dict"""
+    path = profile_path(name)
+    if path in _seen:
+        raise ProfileError(f"Profile {name!r} is part of an extends loop")
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except OSError:
+        raise ProfileError(f"Profile {name!r} not found at {path}")
+    except ValueError as e:
+        raise ProfileError(f"Profile {name!r} is not valid JSON: {str(e)}")
+    if not isinstance(data, dict):
+        raise ProfileError(f"Profile {name!r} must be a JSON object")
+
+    unknown = sorted(set(data) - PROFILE_KEYS)
+    if unknown:
+        raise ProfileError(f"Profile {name!r} has unknown keys: {', '.join(unknown)}")
+
+    stem = os.path.splitext(os.path.basename(path))[0]
+    parent = data.get("extends", None if stem == DEFAULT_PROFILE else DEFAULT_PROFILE)
+    if not parent:
+        merged = {"term_categories": {}}
+        merged.update((key, {}) for key in REPLACEMENT_KEYS)
+    else:
+        merged = load_profile_data(parent, _seen + (path,))
+
+    for key in REPLACEMENT_KEYS:
+        if key in data:
+            merged[key] = dict(merged[key], **_mapping(data[key], name, key))
+    for category, settings in _mapping(data.get("term_categories", {}), name, "term_categories").items():
+        merged["term_categories"][category] = dict(merged["term_categories"].get(category, {}), **_mapping(
+            settings, name, f"term_categories.{category}"))
+    for category, terms in _mapping(data.get("terms", {}), name, "terms").items():
+        if category not in merged["term_categories"]:
+            raise ProfileError(f"Profile {name!r} sets terms for unknown category {category!r}")
+        merged["term_categories"][category] = dict(merged["term_categories"][category], terms=terms)
+    merged["description"] = data.get("description", merged.get("description", ""))
+    return merged
+
+def _mapping(value, name, key):
+    if not isinstance(value, dict):
+        raise ProfileError(f"Profile {name!r}: {key} must be an object")
+    return value
+
+def validate_profile_data(data):
+    """Check a merged profile; returns a list of problems"""
+    errors = []
+    for key in REPLACEMENT_KEYS:
+        for find_text, replace_text in data[key].items():
+            if not find_text:
+                errors.append(f"{key}: empty search text")
+            if not isinstance(replace_text, str):
+                errors.append(f"{key}[{find_text!r}]: replacement must be a string")
+    for pattern in data["wildcard_replacements"]:
+        try:
+            re.compile(word_wildcard_to_regex(pattern))
+        except (ValueError, re.error) as e:
+            errors.append(f"wildcard_replacements[{pattern!r}]: {str(e)}")
+
+    markers = {}
+    for category, settings in data["term_categories"].items():
+        marker = settings.get("marker")
+        if not isinstance(marker, str) or not re.fullmatch(r"\w+", marker):
+            errors.append(f"term_categories.{category}: marker must be a single word")
+        elif marker in markers:
+            errors.append(f"term_categories.{category}: marker {marker!r} is also used by {markers[marker]}")
+        else:
+            markers[marker] = category
+        terms = settings.get("terms")
+        if not isinstance(terms, list) or not all(isinstance(term, str) and term.strip() for term in terms):
+            errors.append(f"term_categories.{category}: terms must be a list of non-empty strings")
+    return errors
+
+def build_replacements(data):
+    """(exact, wildcard, cleanup) replacement dictionaries for a merged profile"""
+    exact_replacements = dict(data["exact_replacements"])
+    for settings in data["term_categories"].values():
+        for term in add_variations(settings["terms"]):
+            exact_replacements[term] = f'{settings["marker"]} {term}'
+    exact_replacements.update(data["custom_replacements"])
+    return exact_replacements, dict(data["wildcard_replacements"]), dict(data["cleanup_replacements"])
+
+def load_artifact(path, fingerprint=None):
+    """Compiled phases from a profile artifact, or None if it is missing, stale or unreadable"""
+    try:
+        with open(path, 'rb') as f:
+            artifact = pickle.load(f)
+    except Exception:
+        return None
+    if not isinstance(artifact, dict) or artifact.get("engine") != ENGINE_VERSION:
+        return None
+    if fingerprint and artifact.get("fingerprint") != fingerprint:
+        return None
+    return artifact.get("phases")
+
+def store_artifact(path, fingerprint, phases):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump({"engine": ENGINE_VERSION, "fingerprint": fingerprint, "phases": phases}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        # Replaced atomically so concurrent runs never read half an artifact
+        os.replace(temp_path, path)
+    except OSError as e:
+        print(f"Warning: could not cache compiled profile: {str(e)}")
+
+class ReplacementProfile:
+    """
+    A validated profile, with its compiled matcher loaded or built on first
+    use. Only a cached profile reads and writes an artifact; artifact_path is
+    None otherwise.
+    """
+
+    def __init__(self, name, data, cached=False):
+        self.name = name
+        self.data = data
+        self.description = data.get("description", "")
+        self.replacements = build_replacements(data)
+        self.fingerprint = replacement_fingerprint(*self.replacements)
+        self.artifact_path = os.path.join(PROFILE_CACHE_PATH, f"{self.fingerprint}.pickle") if cached else None
+        self._phases = None
+
+    @property
+    def term_categories(self):
+        """category -> {"variable", "marker", "terms"}"""
+        return self.data["term_categories"]
+
+    def term_lists(self):
+        """Copies of the term list of each category"""
+        return {category: list(settings["terms"]) for category, settings in self.term_categories.items()}
+
+    @property
+    def phases(self):
+        """Compiled replacement phases, from the artifact cache when possible"""
+        if self._phases is None and self.artifact_path:
+            self._phases = load_artifact(self.artifact_path, self.fingerprint)
+        if self._phases is None:
+            self._phases = compile_phases(*self.replacements)
+            if self.artifact_path:
+                store_artifact(self.artifact_path, self.fingerprint, self._phases)
+        return self._phases
+
+    def with_terms(self, term_categories=None, custom_replacements=None):
+        """A copy of this profile with other term lists and extra custom replacements, not cached"""
+        data = dict(self.data)
+        data["term_categories"] = {category: dict(settings) for category, settings in self.term_categories.items()}
+        for category, terms in (term_categories or {}).items():
+            if category not in data["term_categories"]:
+                raise ProfileError(f"Unknown term category: {category}")
+            data["term_categories"][category]["terms"] = list(terms)
+        data["custom_replacements"] = dict(data["custom_replacements"], **(custom_replacements or {}))
+        errors = validate_profile_data(data)
+        if errors:
+            raise ProfileError("; ".join(errors))
+        return ReplacementProfile(self.name, data)
+
+_profiles = {}
+
+def get_profile(name=DEFAULT_PROFILE):
+    """Load and validate a profile (by name or path), once per process"""
+    path = profile_path(name)
+    profile = _profiles.get(path)
+    if profile is None:
+        data = load_profile_data(name)
+        errors = validate_profile_data(data)
+        if errors:
+            raise ProfileError(f"Profile {name!r} is not valid: " + "; ".join(errors))
+        profile = ReplacementProfile(name, data, cached=True)
+        _profiles[path] = profile
+    return profile
+
+def list_profiles():
+    """Names of the profiles in PROFILES_PATH"""
+    if not os.path.isdir(PROFILES_PATH):
+        return []
+    return sorted(os.path.splitext(name)[0] for name in os.listdir(PROFILES_PATH) if name.endswith(".json"))
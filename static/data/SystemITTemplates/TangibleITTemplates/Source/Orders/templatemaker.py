@@ -1,25 +1,37 @@
-import win32com.client as win32
 import os
+import json
 import shutil
+import argparse
+import tempfile
 from pathlib import Path
-import subprocess
 import time
 import re
 
-# Import the configuration from variables_config
-from variables_config import (
-    provider_terms, customer_terms, effective_date_terms,
-    other_terms, other_terms_also, yet_more_other_terms,
-    exact_replacements as base_exact_replacements,
-    wildcard_replacements as base_wildcard_replacements,
-    cleanup_replacements as base_cleanup_replacements,
-    add_variations
-)
+from ooxml_templates import process_docx
+from build_manifest import BuildManifest, file_sha256
 
-# Base paths
-SOURCE_BASE_PATH = r"C:\Users\RobertReynolds\Python Projects\Python Development Projects\TransactionPlatformDevelopmentAlphaLocal\transaction_platform_app\static\data\SystemITTemplates\TangibleITTemplates\ArchivedSource"
-FOUNDATIONAL_BASE_PATH = r"C:\Users\RobertReynolds\Python Projects\Python Development Projects\TransactionPlatformDevelopmentAlphaLocal\transaction_platform_app\static\data\SystemITTemplates\TangibleITTemplates\Foundational"
-ARCHIVE_BASE_PATH = r"C:\Users\RobertReynolds\Python Projects\Python Development Projects\TransactionPlatformDevelopmentAlphaLocal\transaction_platform_app\static\data\SystemITTemplates\TangibleITTemplates\ArchivedSource"
+# Replacements come from replacement profiles (Source/Profiles/*.json)
+from replacement_profiles import DEFAULT_PROFILE, get_profile
+
+# Base paths (TangibleITTemplates is three levels above this file)
+TEMPLATES_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+SOURCE_BASE_PATH = os.getenv("TEMPLATE_SOURCE_BASE_PATH", os.path.join(TEMPLATES_ROOT, "ArchivedSource"))
+FOUNDATIONAL_BASE_PATH = os.getenv("TEMPLATE_FOUNDATIONAL_BASE_PATH", os.path.join(TEMPLATES_ROOT, "Foundational"))
+ARCHIVE_BASE_PATH = os.getenv("TEMPLATE_ARCHIVE_BASE_PATH", os.path.join(TEMPLATES_ROOT, "ArchivedSource"))
+
+# Source and replacement fingerprints of converted templates, so unchanged ones are skipped
+MANIFEST_PATH = os.getenv("TEMPLATE_BUILD_MANIFEST", os.path.join(TEMPLATES_ROOT, ".build_manifest.json"))
+
+def default_term_categories():
+    """Copies of the term category lists of the default replacement profile"""
+    return get_profile(DEFAULT_PROFILE).term_lists()
+
+def save_profile(profile_path, term_categories, custom_replacements, base_profile=DEFAULT_PROFILE):
+    """Save term categories and custom replacements as a replacement profile extending base_profile"""
+    with open(profile_path, 'w', encoding='utf-8') as f:
+        json.dump({'extends': base_profile, 'terms': term_categories,
+                   'custom_replacements': custom_replacements}, f, indent=2)
+    print(f"\nSaved replacement profile to: {profile_path}")
 
 def prompt_for_additional_terms():
     """
@@ -29,34 +41,21 @@ def prompt_for_additional_terms():
     print("\n=== TERM CATEGORY CONFIGURATION ===")
     print("You can add terms to be automatically processed as specific types.")
     print("\nCurrently configured term categories:")
-    print(f"1. Provider terms: {provider_terms}")
-    print(f"2. Customer terms: {customer_terms}")
-    print(f"3. Effective date terms: {effective_date_terms}")
-    print(f"4. Other terms category 1: {other_terms}")
-    print(f"5. Other terms category 2: {other_terms_also}")
-    print(f"6. Other terms category 3: {yet_more_other_terms}")
+    terms = default_term_categories()
+    print(f"1. Provider terms: {terms['provider_terms']}")
+    print(f"2. Customer terms: {terms['customer_terms']}")
+    print(f"3. Effective date terms: {terms['effective_date_terms']}")
+    print(f"4. Other terms category 1: {terms['other_terms']}")
+    print(f"5. Other terms category 2: {terms['other_terms_also']}")
+    print(f"6. Other terms category 3: {terms['yet_more_other_terms']}")
     
     add_terms = input("\nWould you like to add terms to any category? (y/n): ").lower().strip()
     if add_terms != 'y':
         # Return copies of the original lists
-        return {
-            'provider_terms': provider_terms.copy(),
-            'customer_terms': customer_terms.copy(),
-            'effective_date_terms': effective_date_terms.copy(),
-            'other_terms': other_terms.copy(),
-            'other_terms_also': other_terms_also.copy(),
-            'yet_more_other_terms': yet_more_other_terms.copy()
-        }
+        return default_term_categories()
     
     # Create local copies of the lists that we can modify
-    local_terms = {
-        'provider_terms': provider_terms.copy(),
-        'customer_terms': customer_terms.copy(),
-        'effective_date_terms': effective_date_terms.copy(),
-        'other_terms': other_terms.copy(),
-        'other_terms_also': other_terms_also.copy(),
-        'yet_more_other_terms': yet_more_other_terms.copy()
-    }
+    local_terms = default_term_categories()
     
     template_var_names = {
         'provider_terms': 'ContractorDefinedTerm',
@@ -121,7 +120,7 @@ def prompt_for_custom_replacements():
         return custom_replacements
     
     print("\nCurrently configured replacements include:")
-    for i, (key, value) in enumerate(base_exact_replacements.items(), 1):
+    for i, (key, value) in enumerate(get_profile(DEFAULT_PROFILE).data['exact_replacements'].items(), 1):
         if key.startswith('(') or key.startswith('"'):
             continue  # Skip the automatically generated variations
         print(f"{i}. '{key}' → '{value}'")
@@ -142,119 +141,6 @@ def prompt_for_custom_replacements():
     
     return custom_replacements
 
-def build_replacements_with_terms(term_categories, custom_replacements=None):
-    """Build all replacement dictionaries using the provided term categories"""
-    # Start with the base exact replacements
-    exact_replacements = base_exact_replacements.copy()
-    
-    # Add provider terms
-    for term in add_variations(term_categories['provider_terms']):
-        exact_replacements[term] = f'Kk97999kK {term}'
-    
-    # Add company terms
-    for term in add_variations(term_categories['customer_terms']):
-        exact_replacements[term] = f'Kk97099kK {term}'
-    
-    # Add date terms
-    for term in add_variations(term_categories['effective_date_terms']):
-        exact_replacements[term] = f'Kk979kK {term}'
-        
-    # Add other term categories
-    for term in add_variations(term_categories['other_terms']):
-        exact_replacements[term] = f'Kk961kK {term}'
-    
-    for term in add_variations(term_categories['other_terms_also']):
-        exact_replacements[term] = f'Kk961999kK {term}'
-    
-    for term in add_variations(term_categories['yet_more_other_terms']):
-        exact_replacements[term] = f'Kk961099kK {term}'
-    
-    # Add any custom direct replacements
-    if custom_replacements:
-        exact_replacements.update(custom_replacements)
-    
-    # Use the base wildcard and cleanup replacements
-    wildcard_replacements = base_wildcard_replacements.copy()
-    cleanup_replacements = base_cleanup_replacements.copy()
-    
-    return exact_replacements, wildcard_replacements, cleanup_replacements
-
-def cleanup_word():
-    """Force cleanup of any existing Word processes"""
-    try:
-        subprocess.run(['taskkill', '/IM', 'winword.exe', '/F'], 
-                      capture_output=True, 
-                      check=False)
-        time.sleep(2)
-    except Exception as e:
-        print(f"Cleanup warning: {str(e)}")
-
-def safe_find_replace(doc, find_text, replace_text, use_wildcards=False):
-    """
-    Perform a single find/replace operation with safety checks
-    """
-    print(f"\nDEBUG - Starting find/replace operation:")
-    print(f"DEBUG - Find text: '{find_text}'")
-    print(f"DEBUG - Replace text: '{replace_text}'")
-    print(f"DEBUG - Using wildcards: {use_wildcards}")
-    
-    # First do the main content as before
-    find = doc.Content.Find
-    find.ClearFormatting()
-    find.Replacement.ClearFormatting()
-    
-    # Basic setup
-    find.Text = find_text
-    find.Replacement.Text = replace_text
-    find.Forward = True
-    find.Wrap = 1  # wdFindContinue
-    find.Format = False
-    find.MatchCase = True
-    find.MatchWholeWord = not use_wildcards
-    find.MatchWildcards = use_wildcards
-    
-    try:
-        # Execute find/replace for main content
-        result = find.Execute(
-            FindText=find_text,
-            ReplaceWith=replace_text,
-            Replace=2,  # wdReplaceAll
-            Forward=True,
-            MatchCase=True,
-            MatchWholeWord=not use_wildcards
-        )
-        
-        # Now check footers
-        for section in doc.Sections:
-            for footer in section.Footers:
-                if footer.Exists:
-                    footer_find = footer.Range.Find
-                    footer_find.ClearFormatting()
-                    footer_find.Replacement.ClearFormatting()
-                    footer_find.Text = find_text
-                    footer_find.Replacement.Text = replace_text
-                    footer_find.Forward = True
-                    footer_find.Wrap = 1
-                    footer_find.Format = False
-                    footer_find.MatchCase = True
-                    footer_find.MatchWholeWord = not use_wildcards
-                    footer_find.MatchWildcards = use_wildcards
-                    
-                    footer_find.Execute(
-                        FindText=find_text,
-                        ReplaceWith=replace_text,
-                        Replace=2,
-                        Forward=True,
-                        MatchCase=True,
-                        MatchWholeWord=not use_wildcards
-                    )
-        
-        return True
-        
-    except Exception as e:
-        print(f"Warning: Could not replace '{find_text}': {str(e)}")
-        return False
-
 def get_paths_for_file(file_path):
     """
     Determine the appropriate paths for saving processed files
@@ -307,112 +193,114 @@ def archive_source_file(file_path, archive_path):
         print(f"Warning: Could not archive source file: {str(e)}")
         return False
 
-def process_template(file_path):
-    """Process template with careful replacements and save to multiple locations"""
-    word = None
-    print(f"\nStarting to process: {os.path.basename(file_path)}")
+def convert_template(file_path, phases, manifest=None, source_hash=None):
+    """
+    Apply compiled replacement phases to one template and save it to the
+    current, Foundational and archive locations. With a manifest, a source
+    that is already archived is not copied again.
+    Returns a report dict with the paths written and the replacement counts.
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"Could not find file: {file_path}")
+    
+    # Get appropriate save paths
+    current_processed_path, foundational_path, archive_path = get_paths_for_file(file_path)
     
+    fd, temp_path = tempfile.mkstemp(suffix=".docx")
+    os.close(fd)
     try:
-        # Get additional terms from user
-        term_categories = prompt_for_additional_terms()
-        
-        # ALWAYS get custom replacements from user after term categories,
-        # regardless of whether they added terms or not
-        custom_replacements = prompt_for_custom_replacements()
-        
-        # Build replacement dictionaries with user-provided terms and replacements
-        exact_replacements, wildcard_replacements, cleanup_replacements = build_replacements_with_terms(
-            term_categories, custom_replacements
-        )
-        
-        print("Initializing Word...")
-        word = win32.gencache.EnsureDispatch('Word.Application')
-        word.Visible = True
-        
-        if not os.path.exists(file_path):
-            raise FileNotFoundError(f"Could not find file: {file_path}")
-        
-        print("Opening document...")
-        doc = word.Documents.Open(file_path)
-        
-        # Process exact replacements first
-        print("\nProcessing exact replacements...")
-        for find_text, replace_text in exact_replacements.items():
-            print(f"\nProcessing replacement: {find_text}")
-            safe_find_replace(doc, find_text, replace_text, use_wildcards=False)
-        
-        # Process wildcard replacements
-        print("\nProcessing wildcard replacements...")
-        for find_text, replace_text in wildcard_replacements.items():
-            print(f"\nProcessing wildcard replacement: {find_text}")
-            safe_find_replace(doc, find_text, replace_text, use_wildcards=True)
-        
-        # Process any cleanup replacements
-        if cleanup_replacements:
-            print("\nProcessing final cleanup replacements...")
-            for find_text, replace_text in cleanup_replacements.items():
-                print(f"\nProcessing cleanup: {find_text}")
-                safe_find_replace(doc, find_text, replace_text, use_wildcards=False)
-        
-        # Get appropriate save paths
-        current_processed_path, foundational_path, archive_path = get_paths_for_file(file_path)
-        
-        # Create a temporary directory in a shorter path for initial save
-        temp_dir = Path(os.environ['TEMP']) / 'doc_processing'
-        temp_dir.mkdir(exist_ok=True)
-        temp_path = temp_dir / f"temp_processed_{int(time.time())}.docx"
-        
-        print(f"\nSaving processed file to temporary location: {temp_path}")
-        doc.SaveAs2(str(temp_path))
-        doc.Close()
+        counts = process_docx(file_path, temp_path, None, phases=phases)
+        for part, count in sorted(counts.items()):
+            print(f"  {part}: {count} replacements")
+        if not counts:
+            print("  No replacements matched")
         
         # Now copy the file to both locations
         print(f"\nSaving to current directory: {os.path.basename(current_processed_path)}")
-        if os.path.exists(current_processed_path):
-            os.remove(current_processed_path)
-        
         Path(os.path.dirname(current_processed_path)).mkdir(parents=True, exist_ok=True)
-        shutil.copy2(str(temp_path), current_processed_path)
+        shutil.copyfile(temp_path, current_processed_path)
         
         print(f"\nSaving to foundational directory: {os.path.basename(foundational_path)}")
-        if os.path.exists(foundational_path):
-            os.remove(foundational_path)
-            
         Path(os.path.dirname(foundational_path)).mkdir(parents=True, exist_ok=True)
-        shutil.copy2(str(temp_path), foundational_path)
-        
-        # Clean up temp file
+        shutil.copyfile(temp_path, foundational_path)
+    finally:
         os.remove(temp_path)
+    
+    # Archive the source file, unless this exact content already is
+    archived_copy = None
+    if manifest is not None:
+        archived_copy = manifest.archived_copy(source_hash or file_sha256(file_path),
+                                               os.path.dirname(archive_path), Path(file_path).stem)
+    if archived_copy:
+        print(f"\nSource already archived as: {archived_copy}")
+        archive_path = archived_copy
+    elif not archive_source_file(file_path, archive_path):
+        archive_path = None
+    
+    return {
+        'replacements': counts,
+        'processed_path': current_processed_path,
+        'foundational_path': foundational_path,
+        'archive_path': archive_path
+    }
+
+def build_template(file_path, phases, fingerprint, manifest, force=False):
+    """
+    Convert a template unless the manifest shows it was already converted
+    from the same source with the same replacements. The report has
+    'skipped': True when nothing was done.
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"Could not find file: {file_path}")
+    
+    source_hash = file_sha256(file_path)
+    if not force and manifest.is_current(file_path, source_hash, fingerprint):
+        report = manifest.entry(file_path)
+        report.update({'replacements': {}, 'skipped': True})
+        return report
+    
+    report = convert_template(file_path, phases, manifest, source_hash)
+    manifest.record(file_path, source_hash, fingerprint, report)
+    report['skipped'] = False
+    return report
+
+def process_template(file_path, profile_path=None, save_profile_path=None, force=False):
+    """Process template with careful replacements and save to multiple locations"""
+    print(f"\nStarting to process: {os.path.basename(file_path)}")
+    
+    try:
+        if profile_path:
+            # Use a saved or named profile instead of asking again
+            profile = get_profile(profile_path)
+            print(f"Using replacement profile: {profile_path}")
+        else:
+            # Get additional terms from user
+            term_categories = prompt_for_additional_terms()
+            
+            # ALWAYS get custom replacements from user after term categories,
+            # regardless of whether they added terms or not
+            custom_replacements = prompt_for_custom_replacements()
+            
+            # The default profile with user-provided terms and replacements
+            profile = get_profile(DEFAULT_PROFILE).with_terms(term_categories, custom_replacements)
+            if save_profile_path:
+                save_profile(save_profile_path, term_categories, custom_replacements)
         
-        # Archive the source file
-        archive_source_file(file_path, archive_path)
+        # Exact, wildcard and cleanup replacements are applied in one pass over
+        # the document body, headers and footers
+        print("\nApplying replacements...")
+        manifest = BuildManifest(MANIFEST_PATH)
+        report = build_template(file_path, profile.phases, profile.fingerprint, manifest, force)
+        if report['skipped']:
+            print("  Source and replacements unchanged since the last build, nothing to do (use --force to rebuild)")
+            print(f"  Foundational copy: {report['foundational_path']}")
+        manifest.save()
         
         return True
         
     except Exception as e:
         print(f"An error occurred: {str(e)}")
         return False
-    
-    finally:
-        if word:
-            try:
-                word.Quit()
-                print("Word closed successfully")
-            except:
-                print("Note: Could not close Word normally")
-                cleanup_word()
-        
-        # Cleanup temp directory
-        try:
-            if 'temp_dir' in locals():
-                for file in temp_dir.glob('*'):
-                    try:
-                        file.unlink()
-                    except:
-                        pass
-                temp_dir.rmdir()
-        except:
-            pass
 
 def list_docx_files():
     """List all .docx files in current directory and return full paths"""
@@ -429,8 +317,11 @@ def list_docx_files():
     return files, file_paths
 
 def main():
-    # Initial cleanup
-    cleanup_word()
+    parser = argparse.ArgumentParser(description="Turn an order .docx into a template")
+    parser.add_argument("--profile", help="Use a replacement profile (name or .json path) instead of the prompts")
+    parser.add_argument("--save-profile", help="Save the terms and custom replacements used to this profile file")
+    parser.add_argument("--force", action="store_true", help="Convert even if the source and replacements are unchanged")
+    args = parser.parse_args()
     
     print("Available files:")
     files, file_paths = list_docx_files()
@@ -455,7 +346,7 @@ def main():
                 full_path = file_paths[selected_file]
                 print(f"You selected: {selected_file}")
                 
-                if process_template(full_path):
+                if process_template(full_path, args.profile, args.save_profile, args.force):
                     print("\nProcessing complete!")
                 else:
                     print("\nProcessing failed!")
@@ -1,81 +1,22 @@
-# Group related terms
-provider_terms = ['Supplier', 'Provider', 'Vendor', 'Contractor', 'Consultant']
-customer_terms = ['Company', 'Client', 'Customer', 'Purchaser','Buyer', 'Service PRovider']
-effective_date_terms = ['Order Effective Date', 'Effective Date', 'Agreement Effective Date', 'Contract Effective Date']
-other_terms = []
-other_terms_also =[]
-yet_more_other_terms = []
-
-# Generate variations with and without "the"
-def add_variations(terms):
-    variations = []
-    for term in terms:
-        variations.append(f'("{term}")')
-        variations.append(f'(the "{term}")')
-    return variations
-
-# Phase 1: Exact replacements
-exact_replacements = {
-    'Authorized Buyer': '{{CustomerDefinedTerm}}',
-    '[nke_entname_lu]': '{{CustomerName}}',
-    '[nke_entlcaname_lu]': '{{LocalCountryAgreement}}',
-    '[nke_entlcadate_lu]': '{{LocalCountryAgreementDate}}',
-    '[IS_entname_lu]': '{{ContractorName}}',
-    '[IS_entadd_lu]': '{{ContractorAddress}}',
-    '[IS_entcity_lu]': '{{ContractorCity}}',
-    '[IS_entcountry_lu]': '{{ContractorCountry}}',
-    '[program_name]': '{{ProgramName}}',
-    '[program_desc]': '{{ProgramDescription}}',
-    '[N_domain_name_lu]': '{{DomainName}}', 
-    '[msacheck]': '{{MasterAgreement}}',
-    #'(the "Order Effective Date")': ' Kk979kK (the "Order Effective Date")'
-}
-
-# Add provider terms
-for term in add_variations(provider_terms):
-    exact_replacements[term] = f'Kk97999kK {term}'
- 
+"""
+Replacement settings of the default profile, for scripts that import them
 
-# Add company terms
-for term in add_variations(customer_terms):
-    exact_replacements[term] = f'Kk97099kK {term}'
-  
+The terms and replacements now live in the "default" replacement profile
+(Source/Profiles/default.json); see replacement_profiles.py.
+"""
 
-# Add date terms
-for term in add_variations(effective_date_terms):
-    exact_replacements[term] = f'Kk979kK {term}'
-    
-    
-    
- # Add provider terms
-for term in add_variations(other_terms):
-    exact_replacements[term] = f'Kk961kK {term}'
-  
+from replacement_profiles import DEFAULT_PROFILE, add_variations, get_profile
 
-# Add company terms
-for term in add_variations(other_terms_also):
-    exact_replacements[term] = f'Kk961999kK {term}'
-   
+_profile = get_profile(DEFAULT_PROFILE)
+_terms = _profile.term_lists()
 
-# Add date terms
-for term in add_variations(yet_more_other_terms):
-    exact_replacements[term] = f'Kk961099kK {term}'   
-
-# Phase 2: Wildcard cleanup operations
-wildcard_replacements = {
-    '_@ *Kk979kK': ' {{EffectiveDate}}',
-    '_@ *Kk97999kK': ' {{ContractorDefinedTerm}}',
-    '_@ *Kk97099kK': ' {{CustomerDefinedTerm}}',
-    '_@ *Kk961kK': ' {{OtherTerms}}',
-    '_@ *Kk961999kK': ' {{MoreTerms}}',
-    '_@ *Kk961099kK': ' {{YetMoreTerms}}' 
-    
-    
-    
-    # Replace underscores+marker with template variable
-}
-
-# Phase 3: Final cleanup if needed
-cleanup_replacements = {
-    # Any final cleanup replacements would go here
-}
+# Group related terms
+provider_terms = _terms['provider_terms']
+customer_terms = _terms['customer_terms']
+effective_date_terms = _terms['effective_date_terms']
+other_terms = _terms['other_terms']
+other_terms_also = _terms['other_terms_also']
+yet_more_other_terms = _terms['yet_more_other_terms']
+
+# Phase 1: exact, phase 2: wildcard cleanup operations, phase 3: final cleanup
+exact_replacements, wildcard_replacements, cleanup_replacements = _profile.replacements
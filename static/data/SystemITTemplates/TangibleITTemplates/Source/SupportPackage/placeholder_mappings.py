@@ -62,3 +62,7 @@ class PlaceholderMappings:
     def get_patterns(self):
         """Get all regex patterns"""
         return self.patterns
+    
+    def get_wildcard_replacements(self):
+        """Get the patterns as one {pattern: replacement} dictionary, in order"""
+        return {entry["pattern"]: entry["replacement"] for entry in self.patterns}